@@ -0,0 +1,26 @@
+"""Add session global_version
+
+Revision ID: 3b71c2d9e4a6
+Revises: 0f0e6a0230b9
+Create Date: 2026-10-18 14:12:37.504118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b71c2d9e4a6'
+down_revision: Union[str, None] = '0f0e6a0230b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('federated_sessions', sa.Column('global_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('federated_sessions', 'global_version')
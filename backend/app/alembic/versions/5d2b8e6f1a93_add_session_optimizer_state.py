@@ -0,0 +1,26 @@
+"""Add session optimizer_state
+
+Revision ID: 5d2b8e6f1a93
+Revises: c81f5e3a9d27
+Create Date: 2026-10-18 16:54:02.661318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2b8e6f1a93'
+down_revision: Union[str, None] = 'c81f5e3a9d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('federated_sessions', sa.Column('optimizer_state', sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('federated_sessions', 'optimizer_state')
@@ -0,0 +1,31 @@
+"""Add session phase and lease columns
+
+Revision ID: 8caffeeda358
+Revises: 52ce5a43d222
+Create Date: 2026-10-18 11:04:52.718305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8caffeeda358'
+down_revision: Union[str, None] = '52ce5a43d222'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Sessions created before this revision ran in a process that is gone, they cannot be resumed
+    op.add_column('federated_sessions', sa.Column('phase', sa.String(), nullable=False, server_default='completed'))
+    op.add_column('federated_sessions', sa.Column('lease_owner', sa.String(), nullable=True))
+    op.add_column('federated_sessions', sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('federated_sessions', 'lease_expires_at')
+    op.drop_column('federated_sessions', 'lease_owner')
+    op.drop_column('federated_sessions', 'phase')
@@ -0,0 +1,28 @@
+"""Add round deadline columns
+
+Revision ID: a4e9d1f07c52
+Revises: 3b71c2d9e4a6
+Create Date: 2026-10-18 15:26:48.913520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4e9d1f07c52'
+down_revision: Union[str, None] = '3b71c2d9e4a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('federated_sessions', sa.Column('round_started_at', sa.DateTime(), nullable=True))
+    op.add_column('federated_session_clients', sa.Column('round_history', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('federated_session_clients', 'round_history')
+    op.drop_column('federated_sessions', 'round_started_at')
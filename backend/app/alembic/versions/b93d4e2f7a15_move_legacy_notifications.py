@@ -0,0 +1,88 @@
+"""Move legacy notifications to the broadcast notification tables
+
+Revision ID: b93d4e2f7a15
+Revises: e7a3c5b90d14
+Create Date: 2026-10-18 21:04:12.518093
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b93d4e2f7a15'
+down_revision: Union[str, None] = 'e7a3c5b90d14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_ROWS = 1000
+
+# the tables as of this revision, independent of later model changes
+notifications = sa.table(
+    'notifications',
+    sa.column('id', sa.Integer), sa.column('user_id', sa.Integer), sa.column('message', sa.JSON),
+    sa.column('created_at', sa.DateTime), sa.column('notified_at', sa.DateTime), sa.column('valid_until', sa.DateTime),
+)
+notification_messages = sa.table(
+    'notification_messages',
+    sa.column('id', sa.Integer), sa.column('message', sa.JSON),
+    sa.column('created_at', sa.DateTime), sa.column('valid_until', sa.DateTime),
+)
+notification_recipients = sa.table(
+    'notification_recipients',
+    sa.column('id', sa.Integer), sa.column('message_id', sa.Integer),
+    sa.column('user_id', sa.Integer), sa.column('notified_at', sa.DateTime),
+)
+
+
+def upgrade() -> None:
+    """
+    Copies every row of the legacy notifications table (one row per user) into
+    notification_messages / notification_recipients, which the notification stream reads, and
+    drains the legacy table. The rows a broadcast wrote per user (same payload, created_at and
+    valid_until) become one message with a recipient per user; each recipient keeps its notified_at.
+    """
+    bind = op.get_bind()
+    while True:
+        rows = bind.execute(
+            sa.select(notifications).order_by(notifications.c.id).limit(BATCH_ROWS)
+        ).mappings().all()
+        if not rows:
+            break
+
+        # legacy order, so the new message ids keep the order the stream replays them in
+        groups = {}
+        for row in rows:
+            key = (json.dumps(row['message'], sort_keys=True), row['created_at'], row['valid_until'])
+            groups.setdefault(key, []).append(row)
+        for group in groups.values():
+            first = group[0]
+            message_id = bind.execute(
+                sa.insert(notification_messages)
+                .values(message=first['message'], created_at=first['created_at'], valid_until=first['valid_until'])
+                .returning(notification_messages.c.id)
+            ).scalar_one()
+            bind.execute(
+                sa.insert(notification_recipients),
+                [{'message_id': message_id, 'user_id': row['user_id'], 'notified_at': row['notified_at']} for row in group]
+            )
+        bind.execute(sa.delete(notifications).where(notifications.c.id.in_([row['id'] for row in rows])))
+
+
+def downgrade() -> None:
+    """Copies every recipient back into a legacy notifications row and empties the broadcast tables"""
+    bind = op.get_bind()
+    recipients = sa.select(
+        notification_recipients.c.user_id, notification_messages.c.message, notification_messages.c.created_at,
+        notification_recipients.c.notified_at, notification_messages.c.valid_until,
+    ).select_from(
+        notification_recipients.join(notification_messages, notification_recipients.c.message_id == notification_messages.c.id)
+    ).order_by(notification_recipients.c.message_id, notification_recipients.c.id)
+    bind.execute(
+        sa.insert(notifications).from_select(['user_id', 'message', 'created_at', 'notified_at', 'valid_until'], recipients)
+    )
+    bind.execute(sa.delete(notification_recipients))
+    bind.execute(sa.delete(notification_messages))
@@ -0,0 +1,26 @@
+"""Add session round_clients
+
+Revision ID: c81f5e3a9d27
+Revises: a4e9d1f07c52
+Create Date: 2026-10-18 16:08:21.377046
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81f5e3a9d27'
+down_revision: Union[str, None] = 'a4e9d1f07c52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('federated_sessions', sa.Column('round_clients', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('federated_sessions', 'round_clients')
@@ -0,0 +1,26 @@
+"""Add session best_parameters
+
+Revision ID: e7a3c5b90d14
+Revises: 5d2b8e6f1a93
+Create Date: 2026-10-18 18:21:47.305912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3c5b90d14'
+down_revision: Union[str, None] = '5d2b8e6f1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('federated_sessions', sa.Column('best_parameters', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('federated_sessions', 'best_parameters')
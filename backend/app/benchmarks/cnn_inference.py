@@ -0,0 +1,77 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utility.CustomModels.NumpyCNN import NumpyCNN
+
+"""
+Global evaluation throughput of a CNN session: NumpyCNN against the Keras CustomCNN (when
+TensorFlow is installed) on an MNIST shaped model, plus the largest output difference.
+
+    python benchmarks/cnn_inference.py --samples 10000 --batch-size 256
+"""
+
+
+def mnist_config(batch_size):
+    return {
+        "input_shape": "(28, 28, 1)",
+        "layers": [
+            {"layer_type": "convolution", "filters": "32", "kernel_size": "(3, 3)", "stride": "(1, 1)", "activation_function": "relu"},
+            {"layer_type": "pooling", "pooling_type": "max", "pool_size": "(2, 2)", "stride": "(2, 2)"},
+            {"layer_type": "convolution", "filters": "64", "kernel_size": "(3, 3)", "stride": "(1, 1)", "activation_function": "relu"},
+            {"layer_type": "pooling", "pooling_type": "max", "pool_size": "(2, 2)", "stride": "(2, 2)"},
+            {"layer_type": "flatten"},
+            {"layer_type": "dense", "num_nodes": "128", "activation_function": "relu"},
+        ],
+        "output_layer": {"num_nodes": "10", "activation_function": "softmax"},
+        "loss": "categorical_crossentropy",
+        "optimizer": "adam",
+        "predict_batch_size": str(batch_size),
+    }
+
+
+def random_parameters(rng):
+    shapes = [((3, 3, 1, 32), (32,)), None, ((3, 3, 32, 64), (64,)), None, None, ((1600, 128), (128,)), ((128, 10), (10,))]
+    return {"weights": [
+        [(rng.normal(size=kernel) * 0.1).tolist(), (rng.normal(size=bias) * 0.1).tolist()] if kernel else []
+        for kernel, bias in (shape or (None, None) for shape in shapes)
+    ]}
+
+
+def throughput(predict, X):
+    predict(X[:64])  # warm up
+    start = time.perf_counter()
+    outputs = predict(X)
+    return len(X) / (time.perf_counter() - start), outputs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X = rng.random((args.samples, 28, 28, 1), dtype=np.float32)
+    config = mnist_config(args.batch_size)
+    parameters = random_parameters(rng)
+
+    numpy_model = NumpyCNN(config)
+    numpy_model.update_parameters(parameters)
+    numpy_rate, numpy_outputs = throughput(numpy_model.predict, X)
+    print(f"NumpyCNN: {numpy_rate:10.0f} samples/s")
+
+    try:
+        from utility.CustomModels.CustomCNN import CustomCNN
+    except ImportError:
+        print("TensorFlow is not installed, Keras skipped.")
+        sys.exit(0)
+    keras_model = CustomCNN(config)
+    keras_model.update_parameters(parameters)
+    keras_rate, keras_outputs = throughput(lambda X: keras_model.model.predict(X, batch_size=args.batch_size, verbose=0), X)
+    print(f"   Keras: {keras_rate:10.0f} samples/s")
+    print(f"max |numpy - keras| = {np.abs(numpy_outputs - keras_outputs).max():.2e}")
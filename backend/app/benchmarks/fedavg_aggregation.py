@@ -0,0 +1,90 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utility.aggregation import FedAvgAggregator
+
+"""
+Aggregation time and peak memory of the flat FedAvgAggregator against the former recursive
+per-layer list walk, on CNN sized parameter trees of nested python lists.
+
+    python benchmarks/fedavg_aggregation.py --clients 10 --filters 32
+"""
+
+
+def cnn_parameters(rng, filters):
+    return {"weights": [
+        [rng.normal(size=(3, 3, 1, filters)).tolist(), rng.normal(size=(filters,)).tolist()],
+        [rng.normal(size=(3, 3, filters, 2 * filters)).tolist(), rng.normal(size=(2 * filters,)).tolist()],
+        [rng.normal(size=(5 * 5 * 2 * filters, 128)).tolist(), rng.normal(size=(128,)).tolist()],
+        [rng.normal(size=(128, 10)).tolist(), rng.normal(size=(10,)).tolist()],
+    ]}
+
+
+def per_layer_fedavg(clients):
+    """The recursive initialize / sum / average walk aggregate_weights_fedAvg_Neural used before"""
+    def initialize(param):
+        if isinstance(param, list):
+            return [initialize(sub_param) for sub_param in param]
+        return np.zeros_like(param)
+
+    def add(aggregated, param):
+        if isinstance(param, list):
+            for i in range(len(param)):
+                aggregated[i] = add(aggregated[i], param[i])
+            return aggregated
+        return aggregated + np.array(param)
+
+    def average(aggregated, count):
+        if isinstance(aggregated, list):
+            return [average(sub_aggregated, count) for sub_aggregated in aggregated]
+        return (aggregated / count).tolist()
+
+    sums = {}
+    for client in clients:
+        if not sums:
+            sums = {key: initialize(client[key]) for key in client}
+        for key in client:
+            sums[key] = add(sums[key], client[key])
+    return {key: average(sums[key], len(clients)) for key in sums}
+
+
+def flat_fedavg(clients):
+    aggregator = FedAvgAggregator()
+    for client in clients:
+        aggregator.add(client)
+    return aggregator.result()
+
+
+def measure(fn, clients):
+    start = time.perf_counter()
+    fn(clients)
+    seconds = time.perf_counter() - start
+    # tracing slows python code down, the peak is taken in a second run
+    tracemalloc.start()
+    fn(clients)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--filters", type=int, default=32)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    clients = [cnn_parameters(rng, args.filters) for _ in range(args.clients)]
+    num_parameters = FedAvgAggregator()
+    num_parameters.add(clients[0])
+    print(f"{args.clients} clients, {num_parameters.manifest.size} parameters each")
+
+    for name, fn in (("per-layer lists", per_layer_fedavg), ("flat accumulator", flat_fedavg)):
+        seconds, peak = measure(fn, clients)
+        print(f"{name:>17}: {seconds * 1000:8.1f} ms, peak {peak / 2 ** 20:7.1f} MiB")
@@ -0,0 +1,50 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+"""
+Cold start of an API worker: wall time and peak RSS of `import main` in a fresh interpreter,
+and the same after building a model through the lazy registry (what the first round pays).
+
+    python benchmarks/import_time.py --repeat 5 --model LinearRegression
+"""
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+import main
+import_seconds = time.perf_counter() - start
+import_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+from utility.ModelBuilder import model_classes
+start = time.perf_counter()
+model_classes[sys.argv[1]]
+print(json.dumps({
+    "import_seconds": import_seconds,
+    "import_rss_kb": import_rss,
+    "model_seconds": time.perf_counter() - start,
+    "model_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}))
+"""
+
+
+def run_once(model):
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, model], cwd=APP_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--model", default="LinearRegression")
+    args = parser.parse_args()
+
+    runs = [run_once(args.model) for _ in range(args.repeat)]
+    median = lambda key: sorted(run[key] for run in runs)[len(runs) // 2]
+    print(f"import main:          {median('import_seconds') * 1000:8.0f} ms, peak RSS {median('import_rss_kb') / 1024:6.0f} MiB")
+    print(f"first {args.model} class: +{median('model_seconds') * 1000:7.0f} ms, peak RSS {median('model_rss_kb') / 1024:6.0f} MiB")
@@ -0,0 +1,79 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utility.CustomModels.LandMarkSVM import LandMarkSVM
+
+"""
+Transform throughput, kernel approximation error and test accuracy of LandMarkSVM with the exact
+landmark path against the 'rff' and 'nystroem' kernel approximations, on a binary rbf problem
+(points inside / outside a sphere) that a linear SVM can not separate.
+
+The kernel error is the mean absolute difference between z(x).z(y) and the exact rbf kernel
+over pairs of test points. The exact landmark path does not approximate the kernel, it has none.
+
+    python benchmarks/kernel_approximation.py --train 20000 --test 5000 --components 100 500
+"""
+
+
+def sphere_data(rng, samples, features):
+    X = rng.normal(size=(samples, features))
+    # median radius of a standard normal in this dimension, so the classes are balanced
+    y = (np.linalg.norm(X, axis=1) < np.sqrt(features - 2 / 3)).astype(np.float64)
+    return X, y
+
+
+def exact_rbf(X, gamma):
+    sq_norms = np.sum(X ** 2, axis=1)
+    return np.exp(-gamma * np.maximum(sq_norms[:, np.newaxis] - 2 * X @ X.T + sq_norms, 0))
+
+
+def model_config(gamma, epochs, **options):
+    return {
+        "C": 0.0001, "lr": 0.05, "n_iters": epochs, "gamma": gamma, "kernel": "rbf", "is_binary": "true",
+        "batch_size": 32, "shuffle": "true", "seed": 0, "landmark_seed": 0, **options,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--train", type=int, default=20000)
+    parser.add_argument("--test", type=int, default=5000)
+    parser.add_argument("--features", type=int, default=10)
+    parser.add_argument("--gamma", type=float, default=0.1)
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--components", type=int, nargs="+", default=[100, 500])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X_train, y_train = sphere_data(rng, args.train, args.features)
+    X_test, y_test = sphere_data(rng, args.test, args.features)
+    pairs = X_test[:500]
+    kernel = exact_rbf(pairs, args.gamma)
+    print(f"{args.train} training / {args.test} test rows, {args.features} features, gamma {args.gamma}, {args.epochs} epochs")
+
+    runs = []
+    for components in args.components:
+        runs.append((f"exact, {components} landmarks", {"num_landmarks": components}))
+        runs.append((f"rff, {components}", {"kernel_approximation": "rff", "n_components": components}))
+        runs.append((f"nystroem, {components}", {"kernel_approximation": "nystroem", "n_components": components}))
+
+    for name, options in runs:
+        model = LandMarkSVM(model_config(args.gamma, args.epochs, **options))
+        model.transform(X_test[:1])  # the feature map is built on first use
+        start = time.perf_counter()
+        model.transform(X_train)
+        rows_per_second = len(X_train) / (time.perf_counter() - start)
+
+        if "kernel_approximation" in options:
+            features = model.transform(pairs)
+            kernel_error = f"{np.mean(np.abs(features @ features.T - kernel)):.4f}"
+        else:
+            kernel_error = "-"
+        model.fit(X_train, y_train)
+        accuracy = np.mean(model.predict(X_test) == y_test)
+        print(f"{name:>22}: {rows_per_second / 1000:7.0f}k rows/s, kernel error {kernel_error:>6}, test accuracy {accuracy:.3f}")
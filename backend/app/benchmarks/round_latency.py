@@ -0,0 +1,86 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helpers import round_executor
+from utility.aggregation import FedAvgAggregator
+
+"""
+Latency of requests served by the event loop while a CNN sized round aggregates.
+
+A probe coroutine stands in for the API requests (logins, SSE streams): every --interval ms
+it is due and records how late the loop gets to it. "idle" runs no round (1 s), the round runs
+    inline      on the event loop, as start_federated_learning did before
+    thread      through run_round_task with ROUND_WORKERS=0 (default threadpool)
+    process     through run_round_task with a round worker process
+
+    python benchmarks/round_latency.py --clients 10 --filters 32
+"""
+
+
+def cnn_parameters(rng, filters):
+    return {"weights": [
+        [rng.normal(size=(3, 3, 1, filters)).tolist(), rng.normal(size=(filters,)).tolist()],
+        [rng.normal(size=(3, 3, filters, 2 * filters)).tolist(), rng.normal(size=(2 * filters,)).tolist()],
+        [rng.normal(size=(5 * 5 * 2 * filters, 128)).tolist(), rng.normal(size=(128,)).tolist()],
+        [rng.normal(size=(128, 10)).tolist(), rng.normal(size=(10,)).tolist()],
+    ]}
+
+
+def aggregate_round(num_clients, filters):
+    """Decodes and averages num_clients CNN updates given as nested lists, like a round task"""
+    rng = np.random.default_rng(0)
+    aggregator = FedAvgAggregator()
+    for _ in range(num_clients):
+        aggregator.add(cnn_parameters(rng, filters))
+    return aggregator.manifest.size
+
+
+async def probe(interval, stop, delays):
+    while not stop.is_set():
+        due = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        delays.append(time.perf_counter() - due)
+
+
+async def run(mode, args):
+    stop = asyncio.Event()
+    delays = []
+    probe_task = asyncio.create_task(probe(args.interval / 1000, stop, delays))
+    await asyncio.sleep(0.2)
+
+    start = time.perf_counter()
+    if mode == "idle":
+        await asyncio.sleep(1.0)
+    elif mode == "inline":
+        aggregate_round(args.clients, args.filters)
+    else:
+        await round_executor.run_round_task(aggregate_round, args.clients, args.filters)
+    seconds = time.perf_counter() - start
+
+    stop.set()
+    await probe_task
+    return seconds, np.asarray(delays) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--filters", type=int, default=32)
+    parser.add_argument("--interval", type=float, default=5.0, help="ms between probe requests")
+    args = parser.parse_args()
+
+    print(f"{'':>8} {'round s':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for mode in ("idle", "inline", "thread", "process"):
+        round_executor.ROUND_WORKERS = 1 if mode == "process" else 0
+        if mode == "process":
+            # start the worker before measuring, like a running server
+            asyncio.run(round_executor.run_round_task(aggregate_round, 1, 1))
+        seconds, delays = asyncio.run(run(mode, args))
+        print(f"{mode:>8} {seconds:>8.2f} {np.percentile(delays, 50):>8.2f} {np.percentile(delays, 99):>8.2f} {delays.max():>8.1f}")
+    round_executor.shutdown_round_executor()
@@ -0,0 +1,109 @@
+import argparse
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utility.CustomModels.LinearRegression import LinearRegression
+from utility.evaluation_data import GLOBAL_TEST_DATA_DIR, EvaluationDataCache
+from utility.server_optimizers import FedAdam, FedAvgM, FedYogi
+
+"""
+Rounds until the global model reaches a target test MSE with plain FedAvg and with each server
+optimizer, for LinearRegression clients doing a few local gradient steps per round.
+
+The data is the bundled global test data (utility/global_test_data, or --data-dir, X_test.npy and
+Y_test.npy, --dataset-code picks a sub folder like the sessions do), split 80/20 into training and
+evaluation rows. Without it a synthetic regression problem is used. The training rows are sorted
+by target and cut into one shard per client, so the clients are non-IID and their local models
+drift apart. The target is the MSE of the centralized least-squares fit times (1 + --tolerance).
+
+    python benchmarks/server_optimizers.py --clients 10 --local-steps 5 --rounds 200 --tolerance 0.05
+"""
+
+
+def load_data(data_dir, dataset_code, rng, samples, features):
+    try:
+        dataset = EvaluationDataCache(float("inf"), data_dir).get(dataset_code)
+        X = np.asarray(dataset.X, dtype=np.float64).reshape(len(dataset), -1)
+        Y = np.asarray(dataset.Y, dtype=np.float64).reshape(len(dataset), -1)[:, 0]
+        source = f"test data '{dataset.key}' in {dataset.data_dir}"
+    except FileNotFoundError:
+        X = rng.normal(size=(samples, features)) * rng.uniform(0.5, 3.0, size=features)
+        Y = X @ rng.normal(size=features) + 2.0 + rng.normal(scale=0.5, size=samples)
+        source = "synthetic data (no global test data found)"
+    # LinearRegression assumes standardized features
+    X = (X - X.mean(axis=0)) / np.where(X.std(axis=0) > 0, X.std(axis=0), 1.0)
+    return X, Y, source
+
+
+def centralized_mse(X_train, Y_train, X_test, Y_test):
+    model = LinearRegression({})
+    model.update_parameters(LinearRegression.solve_sufficient_statistics(model.sufficient_statistics(X_train, Y_train)))
+    return np.mean((model.predict(X_test) - Y_test) ** 2)
+
+
+def rounds_to_target(optimizer, shards, X_test, Y_test, target, rounds, local_lr, local_steps):
+    """
+    Returns:
+        (int or None, float): first round whose global model reaches the target, and the final test MSE.
+    """
+    features = X_test.shape[1]
+    global_buffer = np.zeros(features + 1)
+    weights = np.array([len(Y) for _, Y in shards], dtype=np.float64)
+    reached = None
+    for round in range(1, rounds + 1):
+        local_buffers = []
+        for X, Y in shards:
+            model = LinearRegression({"lr": local_lr, "n_iters": local_steps})
+            model.update_parameters({"m": global_buffer[:-1], "c": [global_buffer[-1]]})
+            model.fit(X, Y)
+            local_buffers.append(np.append(model.m, model.c))
+        average = np.average(local_buffers, axis=0, weights=weights)
+        global_buffer = average if optimizer is None else optimizer.step(global_buffer, average)
+
+        mse = np.mean((X_test @ global_buffer[:-1] + global_buffer[-1] - Y_test) ** 2)
+        if reached is None and mse <= target:
+            reached = round
+    return reached, mse
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data-dir", default=GLOBAL_TEST_DATA_DIR)
+    parser.add_argument("--dataset-code", default=None)
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--local-steps", type=int, default=5)
+    parser.add_argument("--local-lr", type=float, default=0.01)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--tolerance", type=float, default=0.05)
+    parser.add_argument("--adaptive-lr", type=float, default=0.1)
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--features", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X, Y, source = load_data(args.data_dir, args.dataset_code, rng, args.samples, args.features)
+    order = rng.permutation(len(Y))
+    split = int(0.8 * len(Y))
+    X_train, Y_train, X_test, Y_test = X[order[:split]], Y[order[:split]], X[order[split:]], Y[order[split:]]
+    by_target = np.argsort(Y_train)
+    shards = [(X_train[rows], Y_train[rows]) for rows in np.array_split(by_target, args.clients)]
+
+    best = centralized_mse(X_train, Y_train, X_test, Y_test)
+    target = best * (1 + args.tolerance)
+    print(f"{source}: {len(Y_train)} training / {len(Y_test)} test rows, {X.shape[1]} features, {args.clients} non-IID clients")
+    print(f"centralized MSE {best:.4f}, target {target:.4f}, {args.local_steps} local steps of lr {args.local_lr}")
+
+    optimizers = [
+        ("fedavg", lambda: None),
+        ("fedavgm", lambda: FedAvgM(lr=1.0, momentum=0.9)),
+        ("fedadam", lambda: FedAdam(lr=args.adaptive_lr)),
+        ("fedyogi", lambda: FedYogi(lr=args.adaptive_lr)),
+    ]
+    print(f"{'':>8} {'rounds to target':>17} {'final MSE':>10}")
+    for name, make_optimizer in optimizers:
+        reached, mse = rounds_to_target(make_optimizer(), shards, X_test, Y_test, target, args.rounds, args.local_lr, args.local_steps)
+        reached = f"{reached}" if reached is not None else f"> {args.rounds}"
+        print(f"{name:>8} {reached:>17} {mse:>10.4f}")
@@ -0,0 +1,76 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utility.CustomModels.CustomSVM import CustomSVM
+
+"""
+Training time and held-out accuracy of CustomSVM: the former per-sample one-vs-rest loop
+against SVMTrainer with batch_size 1 (the default, same updates) and opt-in mini-batches.
+
+    python benchmarks/svm_training.py --samples 5000 --features 20 --classes 5 --epochs 5
+"""
+
+
+def classification_data(rng, samples, features, classes):
+    """Overlapping gaussian blobs around one random center per class, 80 / 20 train / test split"""
+    centers = rng.normal(scale=0.5, size=(classes, features))
+    y = rng.integers(0, classes, size=samples).astype(np.float64)
+    X = centers[y.astype(int)] + rng.normal(size=(samples, features))
+    split = int(0.8 * samples)
+    return X[:split], y[:split], X[split:], y[split:]
+
+
+def per_sample_fit(X, y, classes, C, lr, n_iters):
+    """The per-class, per-sample loop CustomSVM.fit used before SVMTrainer"""
+    weights = np.zeros((classes, X.shape[1]))
+    biases = np.zeros(classes)
+    for i in range(classes):
+        binary_y = np.where(y == i, 1, -1)
+        for _ in range(n_iters):
+            for idx, x in enumerate(X):
+                if binary_y[idx] * (np.dot(x, weights[i]) + biases[i]) < 1:
+                    weights[i] += lr * (binary_y[idx] * x - 2 * C * weights[i])
+                    biases[i] += lr * binary_y[idx]
+                else:
+                    weights[i] += lr * (-2 * C * weights[i])
+    return weights, biases
+
+
+def accuracy(weights, biases, X, y):
+    return float(np.mean(np.argmax(X @ weights.T + biases, axis=1) == y))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=5000)
+    parser.add_argument("--features", type=int, default=20)
+    parser.add_argument("--classes", type=int, default=5)
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[32, 256])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X_train, y_train, X_test, y_test = classification_data(rng, args.samples, args.features, args.classes)
+    config = {"C": 0.01, "lr": 0.01, "n_iters": args.epochs, "weights_shape": "None", "is_binary": "false"}
+    print(f"{len(X_train)} training / {len(X_test)} test samples, {args.features} features, {args.classes} classes, {args.epochs} epochs")
+
+    start = time.perf_counter()
+    weights, biases = per_sample_fit(X_train, y_train, args.classes, config["C"], config["lr"], args.epochs)
+    seconds = time.perf_counter() - start
+    print(f"{'per-sample loop':>22}: {seconds * 1000:8.1f} ms, test accuracy {accuracy(weights, biases, X_test, y_test):.3f}")
+
+    runs = [("SVMTrainer batch 1", {})] + [
+        (f"SVMTrainer batch {batch_size}", {"batch_size": str(batch_size), "shuffle": "true", "seed": "0"})
+        for batch_size in args.batch_sizes
+    ]
+    for name, options in runs:
+        model = CustomSVM({**config, **options})
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        seconds = time.perf_counter() - start
+        print(f"{name:>22}: {seconds * 1000:8.1f} ms, test accuracy {accuracy(model.weights, model.biases, X_test, y_test):.3f}")
@@ -0,0 +1,60 @@
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utility.tensor_codec import decode_flat, decode_parameters, encode_parameters
+
+"""
+Payload size and encode / decode time of the binary tensor format against the JSON transport,
+for a CNN sized parameter tree.
+
+    python benchmarks/tensor_transport.py --filters 32
+"""
+
+
+def cnn_parameters(rng, filters):
+    return {"weights": [
+        [rng.normal(size=(3, 3, 1, filters)).astype(np.float32), rng.normal(size=(filters,)).astype(np.float32)],
+        [rng.normal(size=(3, 3, filters, 2 * filters)).astype(np.float32), rng.normal(size=(2 * filters,)).astype(np.float32)],
+        [rng.normal(size=(5 * 5 * 2 * filters, 128)).astype(np.float32), rng.normal(size=(128,)).astype(np.float32)],
+        [rng.normal(size=(128, 10)).astype(np.float32), rng.normal(size=(10,)).astype(np.float32)],
+    ]}
+
+
+def as_lists(parameters):
+    return {"weights": [[kernel.tolist(), bias.tolist()] for kernel, bias in parameters["weights"]]}
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filters", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    parameters = cnn_parameters(np.random.default_rng(0), args.filters)
+    lists = as_lists(parameters)
+
+    json_encode, json_payload = best_of(lambda: json.dumps({"client_parameter": lists}).encode("utf-8"), args.repeat)
+    json_decode, _ = best_of(lambda: json.loads(json_payload), args.repeat)
+    binary_encode, binary_payload = best_of(lambda: encode_parameters(parameters, {"session_id": 1}, dtype=None), args.repeat)
+    flat_decode, _ = best_of(lambda: decode_flat(binary_payload), args.repeat)
+    tree_decode, _ = best_of(lambda: decode_parameters(binary_payload), args.repeat)
+
+    print(f"{'':>8} {'bytes':>12} {'encode ms':>10} {'decode ms':>10}")
+    print(f"{'json':>8} {len(json_payload):>12,} {json_encode * 1000:>10.1f} {json_decode * 1000:>10.1f}")
+    print(f"{'binary':>8} {len(binary_payload):>12,} {binary_encode * 1000:>10.1f} {flat_decode * 1000:>10.3f}  (flat buffer, as the server aggregates)")
+    print(f"{'':>8} {'':>12} {'':>10} {tree_decode * 1000:>10.1f}  (nested lists)")
@@ -0,0 +1,101 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tensor_transport import cnn_parameters
+from utility.aggregation import FedAvgAggregator
+from utility.parameters import flatten_parameters, unflatten_parameters
+from utility.tensor_codec import decode_update
+from utility.update_compression import ErrorFeedbackCompressor, TopKDeltaCompressor
+
+"""
+Bytes uploaded per round and server aggregation time (decode + FedAvg of every upload) for each
+update codec, on CNN sized models. Every round each client moves the global model by a local
+change and uploads it with its own compressor, so error feedback carries over the rounds. The
+error is the largest deviation of the final global model from the uncompressed run, relative to
+the largest total change of that run.
+
+    python benchmarks/update_codecs.py --clients 10 --filters 32 --rounds 5 --top-k 0.01
+"""
+
+
+def aggregate(payloads, base):
+    aggregator = FedAvgAggregator()
+    for payload in payloads:
+        update, manifest, _ = decode_update(payload)
+        if isinstance(update, np.ndarray):
+            aggregator.add_flat(update, manifest)
+        else:
+            aggregator.add_sparse_delta(update, manifest, base)
+    return aggregator.average_buffer()
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def run(make_compressor, encode, start, changes, manifest, repeat):
+    """
+    Rounds of FedAvg with compressed uploads.
+
+    Returns:
+        (np.ndarray, int, float): final global buffer, bytes per round and the aggregation time of the last round.
+    """
+    compressors = [make_compressor() for _ in changes[0]]
+    global_buffer = start
+    total_bytes = 0
+    for round_changes in changes:
+        global_parameters = unflatten_parameters(global_buffer, manifest)
+        payloads = [
+            encode(compressor, unflatten_parameters(global_buffer + change, manifest), global_parameters)
+            for compressor, change in zip(compressors, round_changes)
+        ]
+        total_bytes += sum(len(payload) for payload in payloads)
+        seconds, global_buffer = best_of(lambda: aggregate(payloads, global_buffer), repeat)
+    return global_buffer, total_bytes // len(changes), seconds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--filters", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--top-k", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    start, manifest = flatten_parameters(cnn_parameters(rng, args.filters), np.float64)
+    # a shared drift every client sees plus client noise, like local training on similar data
+    changes = []
+    for _ in range(args.rounds):
+        drift = rng.normal(scale=0.01, size=start.size)
+        changes.append([drift + rng.normal(scale=0.01, size=start.size) for _ in range(args.clients)])
+    exact = start + sum(np.mean(round_changes, axis=0) for round_changes in changes)
+    total_change = np.abs(exact - start).max()
+    print(f"{args.clients} clients, {manifest.size:,} parameters each, {args.rounds} rounds")
+
+    dense = lambda compressor, parameters, global_parameters: compressor.encode(parameters)
+    sparse = lambda compressor, parameters, global_parameters: compressor.encode(parameters, global_parameters, 1)
+    codecs = [
+        ("float32", lambda: ErrorFeedbackCompressor("float32"), dense),
+        ("float16", lambda: ErrorFeedbackCompressor("float16"), dense),
+        ("int8", lambda: ErrorFeedbackCompressor("int8"), dense),
+        (f"top-{args.top_k:g} f32", lambda: TopKDeltaCompressor(args.top_k, "float32"), sparse),
+        (f"top-{args.top_k:g} f16", lambda: TopKDeltaCompressor(args.top_k, "float16"), sparse),
+    ]
+
+    print(f"{'':>14} {'bytes / round':>14} {'aggregate ms':>13} {'error':>8}")
+    for name, make_compressor, encode in codecs:
+        final, bytes_per_round, seconds = run(make_compressor, encode, start, changes, manifest, args.repeat)
+        error = np.abs(final - exact).max() / total_change
+        print(f"{name:>14} {bytes_per_round:>14,} {seconds * 1000:>13.1f} {error:>8.3f}")
@@ -0,0 +1,83 @@
+import asyncio
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class SessionCoordinator:
+    """
+    In-process wake-ups for the federated learning round loop.
+
+    Request handlers call notify(session_id) after committing a change (price decision,
+    client decision, stage four, uploaded parameters) and the waiting phase re-checks its
+    condition right away instead of on the next 5 second tick. The condition itself still
+    reads the DB, and every wait falls back to a re-check every `fallback_interval` seconds,
+    so changes committed by another worker or before a restart are not missed. Wake-ups only
+    reach the worker that received the request, with several workers the fallback is the
+    latency of the others, so it defaults to the former 5 second poll.
+    """
+
+    def __init__(self, fallback_interval: float = 5):
+        self.fallback_interval = fallback_interval
+        self._events: dict[int, asyncio.Event] = {}
+        self._loop = None
+
+    def notify(self, session_id):
+        """Wakes the phase waiting on this session, safe to call from the threadpool"""
+        event = self._events.get(int(session_id))
+        loop = self._loop
+        if event is None or loop is None or loop.is_closed():
+            return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is loop:
+            event.set()
+        else:
+            loop.call_soon_threadsafe(event.set)
+
+    async def wait_until(self, session_id, condition, timeout: float = None):
+        """
+        Waits until condition() returns a truthy value, re-evaluating it whenever the session
+        is notified or `fallback_interval` seconds have passed.
+
+        Args:
+            session_id: The ID of the federated learning session.
+            condition (callable): Synchronous check, usually a small DB query.
+            timeout (float, optional): Maximum time to wait in seconds.
+
+        Returns:
+            The truthy value of condition(), or None if the timeout expired first.
+        """
+        self._loop = asyncio.get_running_loop()
+        event = self._events.setdefault(int(session_id), asyncio.Event())
+        deadline = None if timeout is None else self._loop.time() + timeout
+
+        while True:
+            # clear before checking, a notify that lands after the check wakes the wait below
+            event.clear()
+            result = condition()
+            if result:
+                return result
+
+            wait_time = self.fallback_interval
+            if deadline is not None:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    return None
+                wait_time = min(wait_time, remaining)
+
+            try:
+                await asyncio.wait_for(event.wait(), wait_time)
+            except asyncio.TimeoutError:
+                pass
+
+    def release(self, session_id):
+        """Forgets the session once its round loop has finished"""
+        self._events.pop(int(session_id), None)
+
+
+session_coordinator = SessionCoordinator(float(os.getenv("SESSION_FALLBACK_POLL_SECONDS", 5)))
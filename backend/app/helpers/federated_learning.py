@@ -1,21 +1,25 @@
 
 from datetime import datetime
-from typing import Dict
-from requests import session
-from sqlalchemy import Null
-from helpers.websocket import ConnectionManager
-from models.FederatedSession import FederatedSession, FederatedSessionClient
+from sqlalchemy import select, update
+from helpers.coordinator import session_coordinator
+from helpers.round_executor import run_round_task
+from models.FederatedSession import ClientUpdate, FederatedSession, FederatedSessionClient, SessionPhase
 from utility import FederatedLearning
-from models import User
 import asyncio
-import json
 from db import engine
 from sqlalchemy.orm import Session
-from models.Notification import Notification
 from utility.test import Test
+from utility.round_worker import aggregate_and_test_buffer, aggregate_and_test_round
+from utility.ModelBuilder import is_one_shot_aggregation
+from utility.fedbuff import fedbuff_settings, is_too_stale
+from utility.client_sampling import jain_fairness_index, participation_counts, record_round_skipped, sampling_settings, select_clients
+from utility.round_completion import LATE_UPDATES_DISCARD, RoundSettings, record_round_arrival, record_round_missed, round_settings
+from utility.early_stopping import STOP_EARLY, STOP_MAX_ROUND, EarlyStopping, early_stopping_settings
 from models.Benchmark import Benchmark
 from utility.notification import add_notifications_for, add_notifications_for_user, add_notifications_for_recently_active_users
 from utility.SampleSizeEstimation import calculate_required_data_points
+from utility.client_updates import clear_client_updates, count_buffered_updates, count_client_updates
+from fastapi import HTTPException
 
 
 
@@ -57,12 +61,23 @@ def fetch_benchmark_and_calculate_price(session_data: FederatedSession, db: Sess
     )
     return price
     
-async def start_federated_learning(federated_manager: FederatedLearning, user: User, session_data: FederatedSession, db: Session):
+def set_session_phase(session_id: int, phase: str, **values):
+    """Commit the phase the session has reached, together with any other round state"""
+    with Session(engine) as db:
+        db.execute(
+            update(FederatedSession)
+            .where(FederatedSession.id == session_id)
+            .values(phase = phase, **values)
+        )
+        db.commit()
+
+async def start_federated_learning(federated_manager: FederatedLearning, session_id: int):
     """
-    Background task to manage federated learning rounds.
+    Task to manage federated learning rounds, run by the worker holding the session's lease (see helpers/scheduler.py).
 
     This function runs in the background, waiting for client responses before proceeding with each round
-    of federated learning.
+    of federated learning. The phase and round reached are committed to the DB, so if the worker
+    stops, any other worker can resume the session from its last committed phase / round.
 
     Each round consists of:
     1. Setting the current round number (`curr_round`) in the server.
@@ -71,84 +86,295 @@ async def start_federated_learning(federated_manager: FederatedLearning, user: U
     4. Aggregating weights using federated averaging with neural networks.
 
     """
-    
-    # Fetch benchmark stats and calculate required data points (price)
-    required_data_points = fetch_benchmark_and_calculate_price(session_data, db)
-
-    print("Price for Training :", required_data_points)
-    # Store the calculated price in the session
-    federated_session = db.query(FederatedSession).filter_by(id=session_data.id).first()
-    if federated_session:    
-        federated_session.session_price = required_data_points
-        db.commit()
-        db.refresh(federated_session)
-    else:
-        raise ValueError(f"FederatedSession with ID {session_data.id} not found.")
-    
-    # Send the price to the client and wait for approval
-    approved = await wait_for_price_confirmation(federated_manager, session_data.id)
-
-    if not approved:
-        print(f"Client {user.id} declined the price. Aborting training session {session_data.id}.")
-        return  # Stop execution if client rejects price
-
-    print(f"Client {user.id} accepted the price. Starting federated learning session {session_data.id}.")
-    
-    # Send the price to the client and wait for approval
-    await wait_for_price_confirmation(federated_manager, session_data.id)
-    
-    message = {
-        'type': "new-session",
-        'message': "New Federated Session Avaliable!",
-        'session_id': session_data.id
-    }
-    
-    add_notifications_for_recently_active_users(db=db, message=message, valid_until=session_data.wait_till, excluded_users=[user])
-    
-    # Wait for client confirmation of interest
-    await wait_for_client_confirmation(federated_manager, session_data.id)
-
-    # Send Model Configurations to interested clients and wait for their confirmation
-    await send_model_configs_and_wait_for_confirmation(federated_manager, session_data.id)
+    with Session(engine) as db:
+        session_data = db.query(FederatedSession).filter_by(id=session_id).first()
+        if not session_data:
+            raise ValueError(f"FederatedSession with ID {session_id} not found.")
+        admin_id = session_data.admin_id
+        phase = session_data.phase
+
+        if phase == SessionPhase.PRICING:
+            # Fetch benchmark stats and calculate required data points (price)
+            required_data_points = fetch_benchmark_and_calculate_price(session_data, db)
+
+            print("Price for Training :", required_data_points)
+            # Store the calculated price in the session
+            session_data.session_price = required_data_points
+            db.commit()
+
+    resuming = phase != SessionPhase.PRICING
+
+    if phase == SessionPhase.PRICING:
+        # Send the price to the client and wait for approval
+        approved = await wait_for_price_confirmation(federated_manager, session_id)
+
+        if not approved:
+            print(f"Client {admin_id} declined the price. Aborting training session {session_id}.")
+            set_session_phase(session_id, SessionPhase.ABORTED)
+            session_coordinator.release(session_id)
+            return  # Stop execution if client rejects price
+
+        print(f"Client {admin_id} accepted the price. Starting federated learning session {session_id}.")
+        
+        message = {
+            'type': "new-session",
+            'message': "New Federated Session Avaliable!",
+            'session_id': session_id
+        }
+        
+        with Session(engine) as db:
+            session_data = db.query(FederatedSession).filter_by(id=session_id).first()
+            add_notifications_for_recently_active_users(db=db, message=message, valid_until=session_data.wait_till, excluded_users=[session_data.admin])
+        phase = SessionPhase.RECRUITING
+        set_session_phase(session_id, phase)
+
+    if phase == SessionPhase.RECRUITING:
+        # Wait for client confirmation of interest
+        await wait_for_client_confirmation(federated_manager, session_id)
+        phase = SessionPhase.CONFIGURING
+        set_session_phase(session_id, phase)
+
+    if phase == SessionPhase.CONFIGURING:
+        # Send Model Configurations to interested clients and wait for their confirmation
+        await send_model_configs_and_wait_for_confirmation(federated_manager, session_id)
+        phase = SessionPhase.TRAINING
+        set_session_phase(session_id, phase)
+
+    if phase not in (SessionPhase.TRAINING, SessionPhase.AGGREGATING):
+        session_coordinator.release(session_id)
+        return
 
     #############################################
     # code used to get instance of testing unit
     # Here Input has to be taken in future for the metrics
-    test = Test(session_data.id, session_data)
+    test = Test(session_id, session_data, resume=resuming)
     #############################################
 
-    # Start Training
-    for i in range(1, session_data.max_round + 1):
+    # Start Training, from the last committed round when resuming
+    with Session(engine) as db:
+        first_round, max_round = db.query(FederatedSession.curr_round, FederatedSession.max_round).filter_by(id = session_id).one()
+
+    # Sufficient statistics are exact after one exchange, the session ends with this round
+    if is_one_shot_aggregation(test.model_config) and max_round != first_round:
+        max_round = first_round
+        set_session_phase(session_id, SessionPhase.TRAINING, max_round = max_round)
+
+    stopping_settings = early_stopping_settings(test.model_config)
+    early_stopping = EarlyStopping(stopping_settings, test.early_stopping) if stopping_settings else None
+    stop_reason = STOP_MAX_ROUND
+
+    # only training clients are signalled, the buffer must be fillable by them alone
+    settings = fedbuff_settings(test.model_config, count_training_clients(session_id))
+    if settings is not None:
+        # No round barrier, every fold of the update buffer is one round
+        stop_reason = await run_buffered_rounds(federated_manager, session_id, test, first_round, max_round, settings, early_stopping)
+    else:
+        round_config = round_settings(test.model_config)
+        i = first_round
+        while i <= max_round:
+            print("-" * 50)
+            print(f"Round {i}")
+            print("-" * 50)
+
+            if phase == SessionPhase.AGGREGATING:
+                # Resumed after the round was closed, its updates are final
+                print(f"Round {i} was already closed, aggregating it.")
+                phase = SessionPhase.TRAINING
+            else:
+                await send_training_signal_and_wait_for_clients_training(federated_manager, session_id, round_config)
+                close_round(session_id, i)
+            # Aggregate and test in the round worker pool so the event loop keeps serving requests
+            print("Done upto just before aggregation...")
+            aggregated, results = await run_round_task(aggregate_and_test_round, session_id, test.model_config, test.metrics)
+            if not aggregated:
+                # e.g. every update was a sparse delta racing the last aggregation, the session goes on
+                reopen_round(session_id, i)
+                continue
+            test.record_results(results)
+            print("Global test results: ", results)
+            test.client_sampling = sampling_summary(session_id)
+            stop = check_early_stopping(session_id, test, early_stopping, i, results)
+            # Save test results for future reference, a resumed session continues from this file
+            test.save_test_results()
+
+            with Session(engine) as db:
+                # Drop this round's client updates, they are folded into global_parameters now
+                clear_client_updates(db, session_id, i)
+                print(f"Client parameters reset after Round {i}.")
+
+            if stop:
+                stop_reason = STOP_EARLY
+                break
+
+            # Commit the round as done, uploads are stored against the committed curr_round
+            if i < max_round:
+                set_session_phase(session_id, SessionPhase.TRAINING, curr_round = i + 1, round_started_at = None, round_clients = None)
+            i += 1
+
+    finish_session(session_id, test, early_stopping, stop_reason)
+    session_coordinator.release(session_id)
+    print("##########################Training Ends####################################")
+
+
+def count_training_clients(session_id: int):
+    """Clients that reached training (status 4), the only ones sent the training signal"""
+    with Session(engine) as db:
+        return db.query(FederatedSessionClient.id).filter_by(session_id = session_id, status = 4).count()
+
+
+async def run_buffered_rounds(federated_manager: FederatedLearning, session_id: int, test: Test, first_round: int, max_round: int, settings, early_stopping: EarlyStopping = None):
+    """
+    Rounds of an asynchronous (fedbuff) session, see utility/fedbuff.py. A round ends as soon as
+    settings.buffer_size fresh updates are buffered, whichever clients sent them. The clients of a
+    folded buffer are told to pull the new global model and continue training, nobody waits for
+    the slowest client.
+
+    Returns:
+        str: why the rounds ended, STOP_MAX_ROUND or STOP_EARLY.
+    """
+    send_training_signal(federated_manager, session_id)
+
+    i = first_round
+    while i <= max_round:
         print("-" * 50)
-        federated_session = db.query(FederatedSession).filter_by(id = session_data.id).first()
-        federated_session.curr_round = i
-        print(f"Round {i}")
+        print(f"Round {i} (buffered)")
         print("-" * 50)
 
-        await send_training_signal_and_wait_for_clients_training(federated_manager, session_data.id)
-        # Aggregate
-        print("Done upto just before aggregation...")
-        federated_manager.aggregate_weights_fedAvg_Neural(session_data.id)
-        with Session(engine) as db:
-            federated_session = db.query(FederatedSession).filter_by(id=session_data.id).first()
-            if not federated_session:
-                raise ValueError(f"FederatedSession with ID {session_data.id} not found.")
-            
-            ################# Testing start
-            results = test.start_test(json.loads(federated_session.global_parameters))
+        await wait_for_buffered_updates(session_id, settings)
+        folded, results, user_ids = await run_round_task(aggregate_and_test_buffer, session_id, test.model_config, test.metrics)
+
+        if folded:
+            test.record_results(results)
             print("Global test results: ", results)
-            ################## Testing end
-            # Reset client_parameters to an empty JSON object
-            federated_session.client_parameters = "{}"  # Empty JSON object
-            db.commit()  # Save the reset to the database
-            print(f"Client parameters reset after Round {i}.")
-
-        # Save test results for future reference
-        """ Yashvir: here you can delete the data of this session from the federated_sessions dictionary after saving the results 
-            , saved results contains session_data and test_results across all rounds
-        """
-    test.save_test_results()
-    print("##########################Training Ends####################################")
+            stop = check_early_stopping(session_id, test, early_stopping, i, results)
+            test.save_test_results()
+            if stop:
+                return STOP_EARLY
+            if i < max_round:
+                set_session_phase(session_id, SessionPhase.TRAINING, curr_round = i + 1)
+            i += 1
+
+        if i <= max_round:
+            send_training_signal(federated_manager, session_id, user_ids)
+
+    return STOP_MAX_ROUND
+
+
+def check_early_stopping(session_id: int, test: Test, early_stopping: EarlyStopping, round: int, results):
+    """
+    Updates the early stopping state with a round's test results and checkpoints the global
+    parameters of a new best round in best_parameters, see utility/early_stopping.py.
+
+    Returns:
+        bool: True if the session should end after this round.
+    """
+    if early_stopping is None:
+        return False
+    if early_stopping.update(round, results):
+        with Session(engine) as db:
+            # copied inside the DB, the parameters never leave it
+            db.execute(
+                update(FederatedSession)
+                .where(FederatedSession.id == session_id)
+                .values(best_parameters = FederatedSession.global_parameters)
+            )
+            db.commit()
+    test.early_stopping = early_stopping.state()
+
+    if early_stopping.should_stop:
+        print(
+            f"No improvement of {early_stopping.settings.metric} for {early_stopping.settings.patience} rounds, "
+            f"stopping after round {round}. Best round: {early_stopping.best_round} ({early_stopping.best_value})."
+        )
+    return early_stopping.should_stop
+
+
+def finish_session(session_id: int, test: Test, early_stopping: EarlyStopping, stop_reason: str):
+    """
+    Completes the session: the best round's checkpoint becomes the final global model (when
+    early stopping restores it), the results are saved with the stop reason and the training
+    clients and the admin are notified.
+    """
+    best_round = early_stopping.best_round if early_stopping is not None else None
+    with Session(engine) as db:
+        if best_round is not None and early_stopping.settings.restore_best and best_round != early_stopping.last_round:
+            db.execute(
+                update(FederatedSession)
+                .where(FederatedSession.id == session_id, FederatedSession.best_parameters.is_not(None))
+                .values(
+                    global_parameters = FederatedSession.best_parameters,
+                    global_version = FederatedSession.global_version + 1
+                )
+            )
+            print(f"Global parameters restored to the checkpoint of round {best_round}.")
+        session = db.query(FederatedSession).filter_by(id = session_id).first()
+        session.phase = SessionPhase.COMPLETED
+        db.commit()
+
+        test.stop_reason = stop_reason
+        test.save_test_results()
+
+        message = {
+            "type": MessageType.TRAINING_COMPLETED,
+            "data": {
+                "stop_reason": stop_reason,
+                "last_round": session.curr_round,
+                "best_round": best_round,
+            },
+            "session_id": session_id,
+        }
+        users_to_notify = {client.user_id for client in session.clients if client.status == 4}
+        users_to_notify.add(session.admin_id)
+        add_notifications_for(db, message, sorted(users_to_notify))
+
+
+async def wait_for_buffered_updates(session_id: int, settings):
+    last_buffered = None
+
+    def buffer_full():
+        nonlocal last_buffered
+        with Session(engine) as db:
+            global_version = db.query(FederatedSession.global_version).filter_by(id = session_id).scalar()
+            # too stale updates are dropped by the fold, they do not fill the buffer
+            min_base_version = None if settings.max_staleness is None else global_version - settings.max_staleness
+            buffered = count_buffered_updates(db, session_id, min_base_version)
+        # every wake-up re-checks, only a change is worth a line
+        if buffered != last_buffered:
+            print(f"Buffered updates: {buffered}/{settings.buffer_size}")
+            last_buffered = buffered
+        return buffered >= settings.buffer_size
+
+    await session_coordinator.wait_until(session_id, buffer_full)
+
+
+def check_update_version(upload, global_version: int, settings):
+    """
+    Rejects an upload that does not fit the current global model, see ClientUpload.base_version.
+    Synchronous sessions only take updates based on the current version, asynchronous ones
+    any version not staler than settings.max_staleness.
+
+    Raises:
+        HTTPException: 400 for an asynchronous upload without base_version, 409 for an outdated one.
+    """
+    base_version = upload.base_version
+    if upload.sparse and global_version == 0:
+        raise HTTPException(status_code=409, detail="There is no global model yet to send a delta against.")
+
+    if settings is None:
+        if base_version is not None and base_version != global_version:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Update is based on global version {base_version}, current version is {global_version}. Download the global parameters again."
+            )
+        return
+
+    if base_version is None:
+        raise HTTPException(status_code=400, detail="Asynchronous sessions need the base_version the update was trained from.")
+    if base_version > global_version or is_too_stale(global_version - base_version, settings):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Update is based on global version {base_version}, current version is {global_version}. Download the global parameters again."
+        )
 
 
 async def wait_for_price_confirmation(federated_manager: FederatedLearning, session_id: str, timeout: int = 300):
@@ -161,41 +387,49 @@ async def wait_for_price_confirmation(federated_manager: FederatedLearning, sess
         timeout (int): Maximum time (in seconds) to wait for the price confirmation. Default is 5 minutes.
 
     Returns:
-        bool: True if the client accepted the price, False if timeout occurred.
+        bool: True if the client accepted the price, False if the price was rejected or timeout occurred.
     """
-    start_time = asyncio.get_event_loop().time()  # Get async time to prevent blocking
+    def price_decision():
+        with Session(engine) as db:
+            training_status = db.query(FederatedSession.training_status).filter_by(id = session_id).scalar()
+        # Status 2 means price was accepted, -1 means it was rejected
+        return training_status if training_status in (2, -1) else None
 
-    while True:
-        session_data = federated_manager.get_session(session_id)
+    print("⌛ Waiting for client price confirmations... (Training Status: 1)")
+    decision = await session_coordinator.wait_until(session_id, price_decision, timeout)
 
-        if session_data.training_status == 2:  # Status 2 means price was accepted
-            print(f"✅ Client accepted the price for session {session_id}. Proceeding with training.")
-            return True
+    if decision is None:
+        print(f"⏳ Timeout: Client did not confirm the price within {timeout} seconds. Aborting session {session_id}.")
+        return False
 
-        # Check for timeout
-        if asyncio.get_event_loop().time() - start_time > timeout:
-            print(f"⏳ Timeout: Client did not confirm the price within {timeout} seconds. Aborting session {session_id}.")
-            return False
+    if decision == -1:
+        print(f"Client rejected the price for session {session_id}.")
+        return False
 
-        print("⌛ Waiting for client price confirmations... (Training Status: 1)")
-        await asyncio.sleep(5)  # Non-blocking sleep
+    print(f"✅ Client accepted the price for session {session_id}. Proceeding with training.")
+    return True
 
 async def wait_for_client_confirmation(federated_manager: FederatedLearning, session_id: int):
-    all_ready_for_training = False
-
-    while not all_ready_for_training:
-        session_data = federated_manager.get_session(session_id)
-        await asyncio.sleep(5)
-        now = datetime.now()
-        all_ready_for_training = all(client.status != 1 for client in session_data.clients) and session_data.wait_till < now
-        
+    # Clients can decide until wait_till, nothing can move the session forward before that
+    session_data = federated_manager.get_session(session_id)
+    remaining = (session_data.wait_till - datetime.now()).total_seconds()
+    if remaining > 0:
         print("Waiting for client confirmations....Stage 1")
+        await asyncio.sleep(remaining)
+
+    def all_clients_decided():
+        with Session(engine) as db:
+            undecided = db.query(FederatedSessionClient.id).filter_by(session_id = session_id, status = 1).count()
+        return undecided == 0
+
+    await session_coordinator.wait_until(session_id, all_clients_decided)
 
     print("All Clients have taken their decision.")
 
 class MessageType:
     GET_MODEL_PARAMETERS_START_BACKGROUND_PROCESS = "get_model_parameters_start_background_process"
     START_TRAINING = "start_training"
+    TRAINING_COMPLETED = "training_completed"
 
 async def send_model_configs_and_wait_for_confirmation(federated_manager: FederatedLearning, session_id: int):
 
@@ -234,29 +468,80 @@ async def wait_for_all_clients_to_stage_four(session_data: FederatedSession):
     # Implement the logic to wait for all clients to confirm that they have started background process
     # session_data = federated_manager.federated_sessions[session_id]
     # interested_clients = [client for client in session_data.clients if client.status == 2]
+    last_waiting = None
+
+    def all_clients_sent_model_id():
+        nonlocal last_waiting
+        with Session(engine) as db:
+            waiting = db.query(FederatedSessionClient.id).filter(
+                FederatedSessionClient.session_id == session_data.id,
+                FederatedSessionClient.local_model_id.is_(None)
+            ).count()
+        if waiting != last_waiting:
+            print(f"Waiting for {waiting} clients to send local model id.")
+            last_waiting = waiting
+        return waiting == 0
+
+    await session_coordinator.wait_until(session_data.id, all_clients_sent_model_id)
+    print("All sent local model id")
+
+
+async def send_training_signal_and_wait_for_clients_training(federated_manager: FederatedLearning, session_id: str, round_config: RoundSettings = None):
+    selected = start_round(session_id)
+    session_data = send_training_signal(federated_manager, session_id, selected)
+        
+    # Run the wait_for_all_clients_to_local_training task in the background
+    await wait_for_all_clients_to_local_training(session_data, round_config or round_settings(session_data.federated_info))
+
+
+def start_round(session_id: int):
+    """
+    Selects the clients of curr_round (see utility/client_sampling.py) and starts its deadline.
+    A resumed round keeps the clients and the start time committed when it first started.
+
+    Returns:
+        list: user ids of the selected clients.
+    """
     with Session(engine) as db:
-        while True:
-            # Expire all objects in the session to force reloading
-            db.expire_all()
-            
-            interested_clients = db.query(FederatedSessionClient).filter_by(session_id = session_data.id).all()
-            all_clients_ready = True
-            for client in interested_clients:
-                if client.local_model_id == None:
-                    all_clients_ready = False
-                    break
-
-            if all_clients_ready:
-                print("All sent local model id")
-                break
-            else:
-                await asyncio.sleep(5)
-                print("Waiting for all clients to send local model id.")
+        session = db.query(FederatedSession).filter(FederatedSession.id == session_id).first()
+        if session.round_started_at is not None and session.round_clients is not None:
+            return session.round_clients
+
+        clients = [client for client in session.clients if client.status == 4]
+        histories = {client.user_id: client.round_history or [] for client in clients}
+        selected = select_clients(
+            sampling_settings(session.federated_info), histories, session_id, session.curr_round,
+            round_settings(session.federated_info).deadline
+        )
+        for client in clients:
+            if client.user_id not in selected:
+                record_round_skipped(client, session.curr_round)
+        if len(selected) < len(clients):
+            print(f"Round {session.curr_round}: selected {len(selected)}/{len(clients)} clients.")
+
+        session.round_clients = selected
+        session.round_started_at = datetime.now()
+        db.commit()
+        return selected
 
 
-async def send_training_signal_and_wait_for_clients_training(federated_manager: FederatedLearning, session_id: str):
+def sampling_summary(session_id: int):
+    """Participation counts and Jain's fairness index of the client selection so far"""
+    with Session(engine) as db:
+        clients = db.query(FederatedSessionClient.user_id, FederatedSessionClient.round_history).filter_by(session_id = session_id, status = 4).all()
+    counts = participation_counts({client.user_id: client.round_history for client in clients})
+    return {
+        "participation": {str(user_id): count for user_id, count in counts.items()},
+        "jain_fairness_index": jain_fairness_index(counts.values()),
+    }
+
+
+def send_training_signal(federated_manager: FederatedLearning, session_id: str, user_ids = None):
+    """Tells the clients (all trained clients by default) to pull the global model and train"""
     session_data = federated_manager.get_session(session_id)
     interested_clients = [client.user_id for client in session_data.clients if client.status == 4]
+    if user_ids is not None:
+        interested_clients = [user_id for user_id in interested_clients if user_id in user_ids]
     
     model_config = session_data.federated_info
     with Session(engine) as db:
@@ -275,50 +560,117 @@ async def send_training_signal_and_wait_for_clients_training(federated_manager:
                     "session_id": session_data.id,
                 }
                 add_notifications_for_user(db, client.user_id, message)
-        
-    # Run the wait_for_all_clients_to_local_training task in the background
-    await wait_for_all_clients_to_local_training(session_data)
+    return session_data
     
 
-async def wait_for_all_clients_to_local_training(session_data: FederatedSession):
-    # Implement the logic to wait for all clients to confirm that they have started background process
-    # session_data = federated_manager.federated_sessions[session_id]
-    # interested_clients = [client for client in session_data.clients if client.status == 2]
+async def wait_for_all_clients_to_local_training(session_data: FederatedSession, round_config: RoundSettings):
+    """
+    Waits until every training client has uploaded this round, or the round deadline has
+    passed and the quorum is met (see utility/round_completion.py).
+    """
     with Session(engine) as db:
         session = db.query(FederatedSession).filter(FederatedSession.id == session_data.id).first()
         
         if not session:
-            raise ValueError(f"FederatedSession with ID {session.id} not found.")
+            raise ValueError(f"FederatedSession with ID {session_data.id} not found.")
         
-        num_interested_clients = len(session.clients)
+        # Only the clients selected for the round are sent the training signal
+        selected = session.round_clients
+        if selected is None:
+            selected = [client.user_id for client in session.clients if client.status == 4]
+        num_interested_clients = len(selected)
+        curr_round = session.curr_round
+        round_started_at = session.round_started_at or datetime.now()
         print("Error Check: Total Interested Clients:", num_interested_clients)
-        
-        while True:
-            # Expire all objects in the session to force reloading
-            db.expire_all()
-            session = db.query(FederatedSession).filter(FederatedSession.id == session_data.id).first()
-            if not session:
-                raise ValueError(f"FederatedSession with ID {session_data.id} not found (possibly deleted).")
-
-            
-            # Deserialize client_parameters from JSON to Python dict
-            client_parameters = json.loads(session.client_parameters) if session.client_parameters else {}
-
-
-            # Count clients with local model parameters submitted
-            num_clients_with_local_models = len([
-                client_id for client_id, params in client_parameters.items()
-            ])
-            
-            
-            print("Client Parameters:", num_clients_with_local_models)  # Debugging
-            
+
+    quorum = round_config.quorum(num_interested_clients)
+    last_received = None
+
+    def received_updates():
+        nonlocal last_received
+        with Session(engine) as db:
+            # Count clients with local model parameters submitted for this round
+            num_clients_with_local_models = count_client_updates(db, session_data.id, curr_round, selected)
+
+        if num_clients_with_local_models != last_received:
             print(f"Progress: {num_clients_with_local_models}/{num_interested_clients} clients ready.")
-            # Check if all interested clients have submitted their parameters
-            if num_clients_with_local_models >= num_interested_clients:
-                print("All Local Models Trained and Received.")
-                break
-            else:
-                await asyncio.sleep(5)
-                print(f"Waiting for {num_interested_clients - num_clients_with_local_models} more clients.")
+            last_received = num_clients_with_local_models
+        return num_clients_with_local_models
+
+    def all_local_models_received():
+        # Check if all interested clients have submitted their parameters, an empty round is never aggregated
+        return received_updates() >= max(num_interested_clients, 1)
+
+    if round_config.deadline is None:
+        await session_coordinator.wait_until(session_data.id, all_local_models_received)
+        print("All Local Models Trained and Received.")
+        return
+
+    remaining = round_config.deadline - (datetime.now() - round_started_at).total_seconds()
+    if remaining > 0 and await session_coordinator.wait_until(session_data.id, all_local_models_received, remaining):
+        print("All Local Models Trained and Received.")
+        return
+
+    print(f"Round {curr_round} deadline passed, waiting for a quorum of {quorum} clients.")
+    await session_coordinator.wait_until(session_data.id, lambda: received_updates() >= quorum)
+    print("Quorum of Local Models Received.")
+
+
+def close_round(session_id: int, round: int):
+    """Closes the round to uploads and records the selected clients that missed it"""
+    with Session(engine) as db:
+        session = db.query(FederatedSession).filter(FederatedSession.id == session_id).first()
+        session.phase = SessionPhase.AGGREGATING
+        uploaded = set(db.execute(
+            select(ClientUpdate.user_id).where(ClientUpdate.session_id == session_id, ClientUpdate.round == round)
+        ).scalars())
+        clients = db.query(FederatedSessionClient).filter_by(session_id = session_id, status = 4).all()
+        for client in clients:
+            if session.round_clients is not None and client.user_id not in session.round_clients:
+                continue
+            if client.user_id not in uploaded:
+                record_round_missed(client, round)
+        db.commit()
+
+
+def reopen_round(session_id: int, round: int):
+    """
+    Re-opens a closed round that had no usable update: global_parameters stay as they are, the
+    round's updates are dropped and its deadline starts again. The round keeps its selected
+    clients, they are sent the training signal again when the round restarts.
+    """
+    print(f"Round {round} had no usable client updates, keeping the global model and re-opening the round.")
+    with Session(engine) as db:
+        clear_client_updates(db, session_id, round)
+    set_session_phase(session_id, SessionPhase.TRAINING, round_started_at = datetime.now())
+
+
+def place_round_update(db: Session, session_data, upload, user_id: int):
+    """
+    Round a synchronous session stores an upload against, see utility/round_completion.py.
+    Uploads may name their round (ClientUpload.round), by default they are for curr_round.
+    The upload is recorded in the client's round_history.
+
+    Raises:
+        HTTPException: 409 for an upload of a future round, or a late one when late updates are discarded.
+    """
+    round_config = round_settings(session_data.federated_info)
+    curr_round = session_data.curr_round
+    upload_round = upload.round if upload.round is not None else curr_round
+    if upload_round > curr_round:
+        raise HTTPException(status_code=409, detail=f"Round {upload_round} has not started, current round is {curr_round}.")
+
+    closed = session_data.phase == SessionPhase.AGGREGATING
+    late = closed or upload_round < curr_round
+    target_round = curr_round + 1 if closed else curr_round
+
+    client = db.query(FederatedSessionClient).filter_by(session_id = session_data.id, user_id = user_id).first()
+    if client is not None:
+        # the round start is only known for the round in progress
+        round_started_at = session_data.round_started_at if upload_round == curr_round else None
+        record_round_arrival(client, upload_round, round_started_at, late)
+        db.commit()
 
+    if late and (round_config.late_updates == LATE_UPDATES_DISCARD or target_round > session_data.max_round):
+        raise HTTPException(status_code=409, detail=f"Round {upload_round} is closed, the update was discarded.")
+    return target_round
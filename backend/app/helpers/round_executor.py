@@ -0,0 +1,54 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Number of processes running aggregation and global testing, 0 runs them in the default threadpool
+ROUND_WORKERS = int(os.getenv("ROUND_WORKERS", 1))
+
+_executor = None
+
+
+def get_round_executor():
+    global _executor
+    if _executor is None and ROUND_WORKERS > 0:
+        # spawn: forking a process that may hold TensorFlow / DB connections is not safe
+        _executor = ProcessPoolExecutor(max_workers=ROUND_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+async def run_round_task(fn, *args):
+    """
+    Runs fn(*args) in the round worker pool without blocking the event loop.
+
+    A pool whose worker died (crash, OOM kill) is broken for good, it is replaced and the
+    task retried once. The round's client updates stay stored until the round is committed,
+    so the retry aggregates the same updates.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_round_executor()
+    try:
+        return await loop.run_in_executor(executor, fn, *args)
+    except BrokenProcessPool:
+        print(f"Round worker pool broke while running {fn.__name__}, restarting it and retrying.")
+        _reset_round_executor(executor)
+        return await loop.run_in_executor(get_round_executor(), fn, *args)
+
+
+def _reset_round_executor(broken):
+    global _executor
+    # another task may already have replaced the broken pool
+    if _executor is broken:
+        _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_round_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,132 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from db import engine
+from helpers.federated_learning import start_federated_learning, set_session_phase
+from models.FederatedSession import FederatedSession, SessionPhase
+
+load_dotenv()
+
+
+class SessionScheduler:
+    """
+    Runs the round loop of unfinished federated sessions on whichever API worker claims them.
+
+    A worker owns a session while it holds its lease (lease_owner / lease_expires_at on the
+    session row) and renews it with a heartbeat. If the worker stops, the lease expires and
+    any worker claims the session again, resuming from the phase and round committed in the DB.
+    """
+
+    def __init__(self, federated_manager, lease_seconds: int = None, poll_interval: int = None):
+        self.federated_manager = federated_manager
+        self.lease_seconds = lease_seconds or int(os.getenv("SESSION_LEASE_SECONDS", 60))
+        self.poll_interval = poll_interval or int(os.getenv("SCHEDULER_POLL_SECONDS", 15))
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.tasks: dict[int, asyncio.Task] = {}
+        self._wake_event = None
+        self._loop = None
+        self._runner = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake_event = asyncio.Event()
+        self._runner = asyncio.create_task(self.run())
+
+    def wake(self):
+        """Look for claimable sessions now (e.g. right after a session was created)"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake_event.set)
+
+    async def run(self):
+        while True:
+            self._wake_event.clear()
+            try:
+                self.claim_available_sessions()
+            except Exception as e:
+                print(f"Session scheduler error: {e}")
+            try:
+                await asyncio.wait_for(self._wake_event.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def claim_available_sessions(self):
+        now = datetime.now()
+        with Session(engine) as db:
+            session_ids = db.execute(
+                select(FederatedSession.id).where(and_(
+                    FederatedSession.phase.not_in(SessionPhase.FINISHED),
+                    or_(FederatedSession.lease_owner.is_(None), FederatedSession.lease_expires_at < now)
+                ))
+            ).scalars().all()
+
+        for session_id in session_ids:
+            if session_id not in self.tasks and self.claim(session_id):
+                print(f"Worker {self.worker_id} claimed federated session {session_id}")
+                self.tasks[session_id] = asyncio.create_task(self.run_session(session_id))
+
+    def claim(self, session_id: int) -> bool:
+        """Atomically take (or renew) the lease, only one worker's update can match the row"""
+        now = datetime.now()
+        with Session(engine) as db:
+            result = db.execute(
+                update(FederatedSession)
+                .where(and_(
+                    FederatedSession.id == session_id,
+                    FederatedSession.phase.not_in(SessionPhase.FINISHED),
+                    or_(
+                        FederatedSession.lease_owner.is_(None),
+                        FederatedSession.lease_expires_at < now,
+                        FederatedSession.lease_owner == self.worker_id
+                    )
+                ))
+                .values(lease_owner = self.worker_id, lease_expires_at = now + timedelta(seconds = self.lease_seconds))
+            )
+            db.commit()
+            return result.rowcount == 1
+
+    def release(self, session_id: int):
+        with Session(engine) as db:
+            db.execute(
+                update(FederatedSession)
+                .where(and_(FederatedSession.id == session_id, FederatedSession.lease_owner == self.worker_id))
+                .values(lease_owner = None, lease_expires_at = None)
+            )
+            db.commit()
+
+    async def heartbeat(self, session_id: int, task: asyncio.Task):
+        while not task.done():
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not self.claim(session_id):
+                print(f"Worker {self.worker_id} lost the lease of federated session {session_id}")
+                task.cancel()
+                return
+
+    async def run_session(self, session_id: int):
+        task = asyncio.create_task(start_federated_learning(self.federated_manager, session_id))
+        heartbeat = asyncio.create_task(self.heartbeat(session_id, task))
+        try:
+            await task
+        except asyncio.CancelledError:
+            # lease lost or worker shutting down, the next owner resumes the session
+            pass
+        except Exception as e:
+            print(f"Federated session {session_id} failed: {e}")
+            set_session_phase(session_id, SessionPhase.ABORTED)
+        finally:
+            heartbeat.cancel()
+            self.tasks.pop(session_id, None)
+            self.release(session_id)
+
+    async def stop(self):
+        if self._runner is not None:
+            self._runner.cancel()
+        for task in list(self.tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+
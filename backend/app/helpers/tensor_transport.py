@@ -0,0 +1,66 @@
+from fastapi import HTTPException, Request, Response
+from pydantic import ValidationError
+
+from schema import ClientReceiveParameters
+from utility.tensor_codec import MEDIA_TYPE, decode_header, encode_parameters, is_sparse_header, is_tensor_media_type
+
+
+class ClientUpload:
+    """A client update as stored in the update store: session id plus the encoded tensor payload"""
+
+    def __init__(self, session_id: int, payload: bytes, metadata: dict, sparse: bool = False):
+        self.session_id = session_id
+        self.payload = payload
+        self.metadata = metadata
+        # a sparse delta, only valid together with the global model of metadata['base_version']
+        self.sparse = sparse
+
+    @property
+    def base_version(self):
+        return self.metadata.get("base_version")
+
+    @property
+    def round(self):
+        """Round the client trained for, optional"""
+        return self.metadata.get("round")
+
+
+async def read_client_parameters(request: Request) -> ClientUpload:
+    """
+    Dependency that parses a client upload sent either as JSON (ClientReceiveParameters)
+    or in the binary tensor format, where session_id travels in the header metadata.
+    Binary payloads are only validated, never expanded into nested lists.
+    """
+    body = await request.body()
+
+    if is_tensor_media_type(request.headers.get("content-type")):
+        try:
+            header = decode_header(body)
+            metadata = header.get("metadata", {})
+            return ClientUpload(int(metadata["session_id"]), body, metadata, is_sparse_header(header))
+        except (ValueError, KeyError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid tensor payload: {e}")
+
+    try:
+        client_parameters = ClientReceiveParameters.model_validate_json(body)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    metadata = {"session_id": client_parameters.session_id}
+    if client_parameters.base_version is not None:
+        metadata["base_version"] = client_parameters.base_version
+    if client_parameters.round is not None:
+        metadata["round"] = client_parameters.round
+    try:
+        payload = encode_parameters(client_parameters.client_parameter, metadata)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid client parameters: {e}")
+    return ClientUpload(client_parameters.session_id, payload, metadata)
+
+
+def wants_tensor_response(request: Request) -> bool:
+    return is_tensor_media_type(request.headers.get("accept"))
+
+
+def tensor_response(parameters, metadata=None) -> Response:
+    return Response(content=encode_parameters(parameters, metadata), media_type=MEDIA_TYPE)
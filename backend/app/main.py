@@ -4,7 +4,7 @@ import json
 from typing import Dict
 from fastapi import BackgroundTasks, FastAPI, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy import Null, and_, null, update
 from sqlalchemy.orm import Session
 # from models import User, Base
@@ -12,10 +12,13 @@ from schema import CreateFederatedLearning, ClientFederatedResponse, ClientModle
 from sse_starlette import EventSourceResponse
 
 from models.FederatedSession import FederatedSession, FederatedSessionClient
-from helpers.federated_learning import start_federated_learning
+from helpers.scheduler import SessionScheduler
 from helpers.websocket import ConnectionManager
+from helpers.coordinator import session_coordinator
+from helpers.round_executor import shutdown_round_executor
+from helpers.tensor_transport import ClientUpload, read_client_parameters, tensor_response, wants_tensor_response
 from utility.FederatedLearning import FederatedLearning
-from db import get_db,engine
+from db import get_db,engine,SessionLocal
 from models.User import User, Base
 from schemas.UserSchema import RefreshToken, UserCreate, UserLogin, ClientSessionStatusSchema
 from helpers.auth import create_refresh_token, decode_refresh_token, get_password_hash, verify_password, create_access_token, get_current_user
@@ -23,7 +26,17 @@ from dotenv import load_dotenv
 from api.dataset_api import dataset_router
 import os
 
-from utility.user import get_unnotified_notifications
+from utility.user import get_unnotified_notifications, mark_notifications_notified
+from utility.notification_hub import notification_hub
+from utility.client_updates import save_client_update
+from utility.ModelBuilder import session_aggregation
+from utility.update_compression import session_update_codec, session_update_mode
+from utility.fedbuff import fedbuff_settings
+from helpers.federated_learning import check_update_version, place_round_update, send_training_signal
+from utility.round_completion import round_settings
+from utility.client_sampling import sampling_settings
+from utility.server_optimizers import server_optimizer_from_config
+from utility.early_stopping import early_stopping_settings
 # from db import SessionLocal
 
 
@@ -33,6 +46,7 @@ load_dotenv()
 app = FastAPI()
 
 client1_url = os.getenv("CLIENT1_URL", "http://default-url.com")
+NOTIFICATION_CATCHUP_SECONDS = int(os.getenv("NOTIFICATION_CATCHUP_SECONDS", 5))
 origins = [ 
     "http://localhost:5173",
     "http://localhost:5174",
@@ -51,6 +65,15 @@ app.add_middleware(
 # Create all tables
 # Base.metadata.create_all(bind=engine)
 
+@app.on_event("startup")
+async def start_session_scheduler():
+    session_scheduler.start()
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    await session_scheduler.stop()
+    shutdown_round_executor()
+
 websocket_manager = ConnectionManager()
         
 # Signup route
@@ -188,52 +211,99 @@ def get_participated_sessions(current_user: User = Depends(get_current_user), db
 @app.get("/notifications/stream")
 async def notifications_stream(
     request: Request,
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    async def event_generator():
-        while True:
-            # Check if client has disconnected
-            if await request.is_disconnected():
-                break
-            
-            # # Expire all cached objects to force fresh queries
-            # db.expire_all()
-        
-            # Fetch notifications for the current user
-            user_notifications = get_unnotified_notifications(user = current_user, db = db)
-            
-            if(len(user_notifications) > 0):
-                data = [n.message for n in user_notifications]
-
-                # Send the data as an SSE event
-                yield {
-                    "event": "new_notifications",   
-                    "data": json.dumps(data),
-                }
-                
-
-                for notification in user_notifications:
-                    notification.notified_at = datetime.now()
-                db.commit()
+    """
+        Notifications are pushed through the in-process notification hub. The DB is only read
+        on (re)connect, continuing after the Last-Event-ID, and every NOTIFICATION_CATCHUP_SECONDS
+        of silence for notifications added by another worker. The hub does not reach across
+        workers, so that is their delivery latency: 5 seconds by default like the former poll,
+        a single worker deployment can raise it.
+    """
+    user_id = current_user.id
+    last_event_id = request.headers.get("last-event-id")
+    after_id = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+
+    def catch_up():
+        with SessionLocal() as db:
+            notifications = get_unnotified_notifications(user = current_user, db = db, after_id = after_id)
+            return [(n.id, n.message) for n in notifications]
+
+    def mark_notified(notification_ids):
+        with SessionLocal() as db:
+            mark_notifications_notified(user_id, notification_ids, db)
 
-            # Wait for 5 seconds before sending the next update
-            await asyncio.sleep(5)
+    async def event_generator():
+        nonlocal after_id
+        queue = notification_hub.subscribe(user_id)
+        delivered = set()
+        try:
+            pending = catch_up()
+            while True:
+                # Check if client has disconnected
+                if await request.is_disconnected():
+                    break
+
+                pending = [(notification_id, message) for notification_id, message in pending if notification_id not in delivered]
+                if len(pending) > 0:
+                    data = [message for _, message in pending]
+                    notification_ids = [notification_id for notification_id, _ in pending]
+                    after_id = max(notification_ids + [after_id or 0])
+
+                    # Send the data as an SSE event
+                    yield {
+                        "event": "new_notifications",
+                        "id": str(after_id),
+                        "data": json.dumps(data),
+                    }
+
+                    delivered.update(notification_ids)
+                    mark_notified(notification_ids)
+
+                # Wait for the next pushed notification
+                try:
+                    notification = await asyncio.wait_for(queue.get(), NOTIFICATION_CATCHUP_SECONDS)
+                except asyncio.TimeoutError:
+                    pending = catch_up()
+                    continue
+
+                pending = [notification]
+                while not queue.empty():
+                    pending.append(queue.get_nowait())
+                now = datetime.now()
+                pending = [
+                    (n["id"], n["message"]) for n in pending
+                    if n["valid_until"] is None or n["valid_until"] > now
+                ]
+        finally:
+            notification_hub.unsubscribe(user_id, queue)
 
     return EventSourceResponse(event_generator())
 
 
 federated_manager = FederatedLearning()
+session_scheduler = SessionScheduler(federated_manager)
 
 @app.post("/create-federated-session")
 async def create_federated_session(
     federated_details: CreateFederatedLearning,
     request: Request,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):  
     print(federated_details.fed_info)
+    try:
+        session_aggregation(federated_details.fed_info.model_dump())
+        session_update_codec(federated_details.fed_info.model_dump())
+        session_update_mode(federated_details.fed_info.model_dump())
+        fedbuff_settings(federated_details.fed_info.model_dump())
+        round_settings(federated_details.fed_info.model_dump())
+        sampling_settings(federated_details.fed_info.model_dump())
+        server_optimizer_from_config(federated_details.fed_info.model_dump())
+        early_stopping_settings(federated_details.fed_info.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     session: FederatedSession = federated_manager.create_federated_session(current_user, federated_details.fed_info, request.client.host)
     
     # await websocket_manager.broadcast({
@@ -249,12 +319,8 @@ async def create_federated_session(
     
     # add_notifications_for_recently_active_users(db=db, message=message, valid_until=session.wait_till, excluded_users=[current_user])
     
-    try:
-        background_tasks.add_task(start_federated_learning, federated_manager, current_user, session, db)
-        print("Background Task Added")
-    except Exception as e:
-        print(f"An error occurred while adding background process {Exception}")
-        return {"message": "An error occurred while starting federated learning."}
+    # Any worker's scheduler can claim the session, wake ours to pick it up right away
+    session_scheduler.wake()
     
     return {
         "message": "Federated Session has been created!",
@@ -320,6 +386,7 @@ def submit_client_price_response(client_response: ClientFederatedResponse, reque
                 )
             # Commit changes to the database
             db.commit()
+            session_coordinator.notify(session_id)
             
 
             return {'success': True, 'message': 'Training status updated successfully'}
@@ -356,6 +423,7 @@ def submit_client_federated_response(client_response: ClientFederatedResponse, r
         else:
             client.status = client_status
         db.commit()
+        session_coordinator.notify(session_id)
     
     return { 'success': True, 'message': 'Client Decision has been saved'}
 
@@ -381,51 +449,94 @@ def update_client_status_four(request: ClientModleIdResponse, current_user: User
     )
     
     db.commit()
+    session_coordinator.notify(session_id)
 
     return {'message': 'Client Status Updated to 4'}
 
 @app.get('/get-model-parameters/{session_id}')
-def get_model_parameters(session_id: str):
+def get_model_parameters(session_id: str, request: Request):
     '''
         Client have received the model parameters and waiting for server to start training
+
+        Answers in the binary tensor format when the client sends it in the Accept header, JSON otherwise.
     '''
-    global_parameters = json.loads(federated_manager.get_session(session_id).global_parameters)
-    
-    response_data = {
-        "global_parameters": global_parameters,
-        "is_first": 0
-    }
+    # global_parameters is stored as JSON text
+    federated_session = federated_manager.get_session(session_id)
+    if federated_session is None:
+        raise HTTPException(status_code=404, detail=f"Federated Session with ID {session_id} not found!")
+    global_parameters = federated_session.global_parameters
+    global_version = federated_session.global_version
+    if global_parameters is None:
+        raise HTTPException(status_code=409, detail=f"Federated Session with ID {session_id} has no global parameters yet.")
+
+    if wants_tensor_response(request):
+        return tensor_response(json.loads(global_parameters), {"is_first": 0, "global_version": global_version})
 
     # Save global_parameters string into a file
     file_path = "global_parameters.txt"  # Specify the desired file path and name
     with open(file_path, "a") as file:
         file.write("\n---\n")  # Add a separator before each new entry
-        file.write(json.dumps(global_parameters))  # Append the JSON string
+        file.write(global_parameters)  # Append the JSON string
         file.write("\n")  # Add a newline after the entry for readability
     print(f"Global parameters have been saved to {file_path}.")
-    return response_data
+
+    # Embed the stored JSON text as is instead of parsing and re-serializing it
+    return Response(
+        content=f'{{"global_parameters": {global_parameters}, "is_first": 0, "global_version": {json.dumps(global_version)}}}',
+        media_type="application/json"
+    )
 
 @app.post('/receive-client-parameters')
-def receive_client_parameters(request: ClientReceiveParameters,  current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def receive_client_parameters(request: ClientUpload = Depends(read_client_parameters),  current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     session_id = request.session_id
-    client_parameter = request.client_parameter
     
-    session_data = db.query(FederatedSession).filter(FederatedSession.id == session_id).first()
+    session_data = db.query(
+        FederatedSession.id, FederatedSession.curr_round, FederatedSession.max_round, FederatedSession.phase,
+        FederatedSession.round_started_at, FederatedSession.global_version, FederatedSession.federated_info
+    ).filter(FederatedSession.id == session_id).first()
     
     if not session_data:
         raise HTTPException(status_code=404, detail=f"Federated Session with ID {session_id} not found!")
     
-    # Deserialize client_parameters from JSON to a Python dictionary
-    existing_parameters = json.loads(session_data.client_parameters) if session_data.client_parameters else {}
+    # Sparse deltas and asynchronous updates are only valid against a recent enough global model
+    settings = fedbuff_settings(session_data.federated_info)
+    check_update_version(request, session_data.global_version, settings)
+
+    if settings is None:
+        # Append this client's update for the current round (the next one for an update carried
+        # over from a closed round), other clients' updates are not touched
+        round = place_round_update(db, session_data, request, current_user.id)
+        save_client_update(db, session_id, round, current_user.id, request.payload)
+    else:
+        # Asynchronous sessions buffer updates by the version they were trained from
+        save_client_update(db, session_id, request.base_version, current_user.id, request.payload)
+        if request.base_version < session_data.global_version:
+            # A newer global model is out already, the client can continue training on it right away
+            send_training_signal(federated_manager, session_id, [current_user.id])
+    session_coordinator.notify(session_id)
     
-    existing_parameters[str(current_user.id)] = client_parameter
-    session_data.client_parameters = json.dumps(existing_parameters)
-    
-    db.commit()
-    
-    # federated_manager.federated_sessions[session_id]['client_parameters'][client_id] = request.client_parameter
     return {"message": "Client Parameters Received"}
 
+@app.get('/session-round-history/{session_id}')
+def get_session_round_history(session_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    '''
+        Per client arrival times and lateness of every round, to tune round_deadline / min_quorum.
+        Only the session admin and the session's clients can read it.
+    '''
+    session_data = db.query(FederatedSession.admin_id, FederatedSession.federated_info).filter(FederatedSession.id == session_id).first()
+    if not session_data:
+        raise HTTPException(status_code=404, detail=f"Federated Session with ID {session_id} not found!")
+
+    clients = db.query(FederatedSessionClient.user_id, FederatedSessionClient.round_history).filter(
+        FederatedSessionClient.session_id == session_id
+    ).all()
+    if current_user.id != session_data.admin_id and all(client.user_id != current_user.id for client in clients):
+        raise HTTPException(status_code=403, detail="Not a member of this Federated Session")
+    return {
+        "round_deadline": round_settings(session_data.federated_info).deadline,
+        "clients": [{"user_id": client.user_id, "round_history": client.round_history or []} for client in clients]
+    }
+
 @app.get('/get-all-completed-trainings')
 def get_training_results():
     # iterate ove Global_test_results folder and return the completed sessions' results
@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
-from sqlalchemy import JSON, Column, DateTime, ForeignKey, Integer, Float, String, event
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Integer, Float, LargeBinary, String, UniqueConstraint, event
 from sqlalchemy.orm import declared_attr, relationship, Session, with_loader_criteria
 from .Base import Base
 import os
@@ -32,6 +32,19 @@ def filter_soft_deleted(execute_state):
                 )
             )
 
+class SessionPhase:
+    """Committed progress of a session's round loop, used to resume it on any worker"""
+    PRICING = "pricing"
+    RECRUITING = "recruiting"
+    CONFIGURING = "configuring"
+    TRAINING = "training"
+    # the round is closed to uploads and being aggregated, see utility/round_completion.py
+    AGGREGATING = "aggregating"
+    COMPLETED = "completed"
+    ABORTED = "aborted"
+
+    FINISHED = (COMPLETED, ABORTED)
+
 class FederatedSession(TimestampMixin, Base):
     __tablename__ = 'federated_sessions'
     
@@ -41,10 +54,24 @@ class FederatedSession(TimestampMixin, Base):
     curr_round = Column(Integer, default=1, nullable=False)
     max_round = Column(Integer, default=3, nullable=False)
     global_parameters = Column(JSON, default='[]', nullable=False)
+    # incremented on every write of global_parameters, sparse deltas name the version they are based on
+    global_version = Column(Integer, default=0, nullable=False)
+    # moments of the server optimizer in the binary tensor format, see utility/server_optimizers.py
+    optimizer_state = Column(LargeBinary, nullable=True)
+    # global_parameters of the best round so far, see utility/early_stopping.py
+    best_parameters = Column(JSON, nullable=True)
     session_price = Column(Float, default= 0, nullable=True)
     # 1 for server waiting for admin to price, 2 for server waiting for all clients and 3 for training starts, 4 for completed
     training_status = Column(Integer, default=1, nullable=False) 
     client_parameters = Column(JSON, default='{}', nullable=False)
+    # Round loop state, see SessionPhase and helpers/scheduler.py
+    phase = Column(String, default=SessionPhase.PRICING, nullable=False)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    # when the training signal of curr_round went out, round deadlines count from here
+    round_started_at = Column(DateTime, nullable=True)
+    # user ids selected for curr_round (see utility/client_sampling.py), None until the round starts
+    round_clients = Column(JSON, nullable=True)
     # Wait Time
     wait_till = Column(DateTime, default=lambda: datetime.now() + timedelta(minutes=int(os.getenv('SESSION_WAIT_MINUTES'))))
     
@@ -59,6 +86,7 @@ class FederatedSession(TimestampMixin, Base):
             "curr_round": self.curr_round,
             "max_round": self.max_round,
             "global_parameters": self.global_parameters,
+            "global_version": self.global_version,
             "training_status": self.training_status,
             "client_parameters": self.client_parameters,
             "wait_till": self.wait_till.isoformat() if self.wait_till else None,  # Convert DateTime to ISO format
@@ -75,6 +103,27 @@ class FederatedSessionClient(TimestampMixin, Base):
     status = Column(Integer, default=1, nullable=False) # Status values: 1 (not responded), 2 (accepted), 3 (rejected)
     ip = Column(String, nullable=False)
     local_model_id = Column(String, nullable=True)
+    # [{"round", "seconds", "late", "missed"}] of every round, see utility/round_completion.py
+    round_history = Column(JSON, nullable=True)
     
     user = relationship('User', back_populates="federated_session_clients")
     session = relationship('FederatedSession', back_populates='clients')
+
+
+class ClientUpdate(TimestampMixin, Base):
+    """
+    One client's local model update for one round, stored as an encoded tensor payload
+    (see utility/tensor_codec.py). Uploads are single-row appends keyed by
+    (session_id, round, user_id) instead of rewrites of a shared JSON column.
+    Asynchronous (fedbuff) sessions store the base_version of the update in round.
+    """
+    __tablename__ = 'client_updates'
+    __table_args__ = (
+        UniqueConstraint('session_id', 'round', 'user_id', name='uq_client_updates_session_round_user'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey('federated_sessions.id'), nullable=False, index=True)
+    round = Column(Integer, nullable=False)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    payload = Column(LargeBinary, nullable=False)
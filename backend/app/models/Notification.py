@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index, JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .Base import Base
@@ -25,3 +25,32 @@ class Notification(Base):
             "notified_at": self.notified_at.isoformat() if self.notified_at else None,
             "valid_until": self.valid_until.isoformat() if self.valid_until else None,
         }
+
+
+class NotificationMessage(Base):
+    """
+    A notification payload stored once, however many users receive it.
+    Recipients are rows of NotificationRecipient.
+    """
+    __tablename__ = "notification_messages"
+
+    id = Column(Integer, primary_key=True, index=True)
+    message = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now())
+    valid_until = Column(DateTime, nullable=True)
+
+    recipients = relationship("NotificationRecipient", back_populates="notification_message")
+
+
+class NotificationRecipient(Base):
+    __tablename__ = "notification_recipients"
+    __table_args__ = (
+        Index("ix_notification_recipients_user_message", "user_id", "message_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    message_id = Column(Integer, ForeignKey("notification_messages.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    notified_at = Column(DateTime, nullable=True)
+
+    notification_message = relationship("NotificationMessage", back_populates="recipients")
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel
 
 
@@ -19,6 +20,8 @@ class FederatedLearningInfo(BaseModel):
     dataset_info: dict
     std_mean: float
     std_deviation: float
+    # session level training options, e.g. {"aggregation": "sufficient_statistics", "ridge": 0.1, "update_codec": "int8"}
+    training_config: dict = {}
     
 
     # to resolve warning of protected namespace model_ for model_name and model_info
@@ -41,5 +44,9 @@ class ClientModleIdResponse(BaseModel):
 class ClientReceiveParameters(BaseModel):
     session_id: int
     client_parameter: dict
+    # global_version the client trained from, needed by asynchronous (fedbuff) sessions
+    base_version: Optional[int] = None
+    # round the update was trained for, late updates are discarded or carried, see utility/round_completion.py
+    round: Optional[int] = None
 
     
\ No newline at end of file
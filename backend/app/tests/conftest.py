@@ -0,0 +1,66 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# the modules import each other from the backend/app directory (uvicorn / alembic run there)
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+# settings read at import time by db.py, helpers/auth.py and the session model
+TEST_ENV = {
+    "DATABASE_URL": "sqlite:///" + os.path.join(tempfile.gettempdir(), "federated_tests.db"),
+    "SECRET_KEY": "test_secret_key",
+    "REFRESH_SECRET_KEY": "test_refresh_secret_key",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "REFRESH_TOKEN_EXPIRE_DAYS": "7",
+    "SESSION_WAIT_MINUTES": "0",
+    "ROUND_WORKERS": "0",
+}
+for key, value in TEST_ENV.items():
+    os.environ.setdefault(key, value)
+
+
+@pytest.fixture
+def database():
+    """Empty tables in the test database, for tests of the code that opens its own Session(engine)"""
+    from db import engine
+    from models.Base import Base
+    import models  # noqa: F401, registers every table on Base.metadata
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    yield engine
+    Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def make_session(database):
+    """
+    Creates a FederatedSession with an admin and one FederatedSessionClient per status.
+
+    Returns:
+        function(federated_info, client_statuses=(4,), **columns) -> (session id, client user ids)
+    """
+    from sqlalchemy.orm import Session
+    from models import FederatedSession, FederatedSessionClient, User
+
+    def create(federated_info, client_statuses=(4,), **columns):
+        with Session(database) as db:
+            start = db.query(User).count()
+            users = [User(username=f"user{start + i}") for i in range(len(client_statuses) + 1)]
+            db.add_all(users)
+            db.flush()
+            session = FederatedSession(federated_info=federated_info, admin_id=users[0].id, **columns)
+            db.add(session)
+            db.flush()
+            db.add_all(
+                FederatedSessionClient(user_id=user.id, session_id=session.id, status=status, ip="127.0.0.1")
+                for user, status in zip(users[1:], client_statuses)
+            )
+            db.commit()
+            return session.id, [user.id for user in users[1:]]
+
+    return create
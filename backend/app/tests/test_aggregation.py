@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from utility.aggregation import FedAvgAggregator
+from utility.parameters import flatten_parameters
+from utility.tensor_codec import SparseDelta
+
+
+def reference_fedavg(client_parameters, weights):
+    """The former per-layer aggregation: walk every layer list and average it with numpy"""
+    def weighted_sum(params):
+        if isinstance(params[0], list) and not _is_tensor(params[0]):
+            return [weighted_sum([param[i] for param in params]) for i in range(len(params[0]))]
+        return sum(weight * np.array(param, dtype=np.float64) for weight, param in zip(weights, params))
+
+    total = sum(weights)
+    return {
+        key: _average(weighted_sum([client[key] for client in client_parameters]), total)
+        for key in client_parameters[0]
+    }
+
+
+def _is_tensor(node):
+    try:
+        np.array(node, dtype=np.float64)
+        return True
+    except ValueError:
+        return False
+
+
+def _average(aggregated, total):
+    if isinstance(aggregated, list):
+        return [_average(sub_aggregated, total) for sub_aggregated in aggregated]
+    return (aggregated / total).tolist()
+
+
+def cnn_like_parameters(rng):
+    """Mixed-shape layers: [kernel, bias] pairs of a conv and a dense layer, plus a flat key"""
+    return {
+        "weights": [
+            [rng.normal(size=(3, 3, 1, 4)).tolist(), rng.normal(size=(4,)).tolist()],
+            [rng.normal(size=(36, 10)).tolist(), rng.normal(size=(10,)).tolist()],
+        ],
+        "c": rng.normal(size=(1,)).tolist(),
+    }
+
+
+@pytest.mark.parametrize("weights", [[1.0, 1.0, 1.0], [10.0, 3.0, 0.5]])
+def test_fedavg_matches_per_layer_weighted_mean(weights):
+    rng = np.random.default_rng(0)
+    clients = [cnn_like_parameters(rng) for _ in weights]
+
+    aggregator = FedAvgAggregator()
+    for client, weight in zip(clients, weights):
+        aggregator.add(client, weight)
+    result = aggregator.result()
+    expected = reference_fedavg(clients, weights)
+
+    assert result.keys() == expected.keys()
+    for (kernel, bias), (expected_kernel, expected_bias) in zip(result["weights"], expected["weights"]):
+        np.testing.assert_allclose(kernel, expected_kernel, rtol=1e-12)
+        np.testing.assert_allclose(bias, expected_bias, rtol=1e-12)
+        assert np.shape(kernel) == np.shape(expected_kernel)
+    np.testing.assert_allclose(result["c"], expected["c"], rtol=1e-12)
+
+
+def test_fedavg_rejects_mismatched_layers():
+    rng = np.random.default_rng(1)
+    aggregator = FedAvgAggregator()
+    aggregator.add(cnn_like_parameters(rng))
+    other = cnn_like_parameters(rng)
+    other["weights"][1][0] = rng.normal(size=(36, 9)).tolist()
+    with pytest.raises(ValueError):
+        aggregator.add(other)
+
+
+def test_sparse_delta_is_added_to_its_base():
+    rng = np.random.default_rng(2)
+    base, manifest = flatten_parameters(cnn_like_parameters(rng))
+    dense, _ = flatten_parameters(cnn_like_parameters(rng))
+    indices = np.array([0, 7, manifest.size - 1])
+    values = rng.normal(size=indices.size)
+
+    aggregator = FedAvgAggregator()
+    aggregator.add_sparse_delta(SparseDelta(indices, values), manifest, base)
+    aggregator.add_flat(dense, manifest, 3.0)
+
+    sparse_client = base.copy()
+    sparse_client[indices] += values
+    np.testing.assert_allclose(aggregator.average_buffer(), (sparse_client + 3.0 * dense) / 4.0, rtol=1e-12)
+    with pytest.raises(ValueError):
+        aggregator.add_sparse_delta(SparseDelta(indices, values), manifest, base.copy())
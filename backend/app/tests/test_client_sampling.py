@@ -0,0 +1,79 @@
+import pytest
+
+from utility.client_sampling import (
+    SAMPLING_ALL, SAMPLING_LATENCY, SAMPLING_RANDOM, SamplingSettings, jain_fairness_index, participation_counts,
+    sampling_settings, select_clients,
+)
+
+
+def histories_of(user_ids, history=()):
+    return {user_id: list(history) for user_id in user_ids}
+
+
+def test_jain_fairness_index():
+    assert jain_fairness_index([3, 3, 3, 3]) == pytest.approx(1.0)
+    # one client took part in every round, the others never: 1/n
+    assert jain_fairness_index([5, 0, 0, 0]) == pytest.approx(0.25)
+    assert jain_fairness_index([1, 2, 3]) == pytest.approx(36 / (3 * 14))
+    assert jain_fairness_index([]) == 1.0
+    assert jain_fairness_index([0, 0]) == 1.0
+
+
+def test_participation_counts_leave_out_skipped_rounds():
+    histories = {
+        1: [{"round": 1, "seconds": 2.0}, {"round": 2, "skipped": True}, {"round": 3, "missed": True}],
+        2: [{"round": 1, "skipped": True}, {"round": 2, "skipped": True}],
+        3: None,
+    }
+    assert participation_counts(histories) == {1: 2, 2: 0, 3: 0}
+
+
+def test_sampling_settings_defaults_and_errors():
+    assert sampling_settings({}) == (SAMPLING_ALL, 1.0, 3)
+    assert sampling_settings({"training_config": {"client_sampling": "random", "sample_fraction": "0.3"}}).fraction == 0.3
+    for training_config in ({"client_sampling": "round_robin"}, {"sample_fraction": 0}, {"sample_fraction": 1.5}, {"max_skip_rounds": -1}):
+        with pytest.raises(ValueError):
+            sampling_settings({"training_config": training_config})
+
+
+def test_random_selection_is_deterministic_per_session_and_round():
+    settings = SamplingSettings(SAMPLING_RANDOM, 0.3, 3)
+    histories = histories_of(range(10, 30))
+
+    selected = select_clients(settings, histories, session_id=7, round=4)
+    assert len(selected) == 6 and selected == sorted(selected) and set(selected) <= set(histories)
+    # a resumed round, or another worker, selects the same clients
+    assert select_clients(settings, dict(reversed(histories.items())), 7, 4) == selected
+    # other rounds and sessions draw again
+    draws = {tuple(select_clients(settings, histories, 7, round)) for round in range(1, 11)}
+    draws |= {tuple(select_clients(settings, histories, session_id, 4)) for session_id in range(1, 11)}
+    assert len(draws) > 10
+
+
+def test_all_clients_when_nothing_is_left_out():
+    histories = histories_of([3, 1, 2])
+    assert select_clients(SamplingSettings(SAMPLING_ALL, 0.1, 3), histories, 1, 1) == [1, 2, 3]
+    assert select_clients(SamplingSettings(SAMPLING_RANDOM, 1.0, 3), histories, 1, 1) == [1, 2, 3]
+    # at least one client is selected
+    assert len(select_clients(SamplingSettings(SAMPLING_RANDOM, 0.01, 3), histories, 1, 1)) == 1
+    assert select_clients(SamplingSettings(SAMPLING_RANDOM, 0.5, 3), {}, 1, 1) == []
+
+
+def test_latency_selection_prefers_fast_clients_and_bounds_skips():
+    settings = SamplingSettings(SAMPLING_LATENCY, 0.5, 2)
+    histories = {
+        1: [{"round": 1, "seconds": 10.0}, {"round": 2, "seconds": 12.0}],
+        2: [{"round": 1, "seconds": 1.0}, {"round": 2, "seconds": 2.0}],
+        3: [{"round": 1, "missed": True}, {"round": 2, "seconds": 3.0}],
+        4: [{"round": 1, "seconds": 2.0}, {"round": 2, "seconds": 1.0}],
+    }
+    # a missed round costs twice the deadline, so client 3 ranks behind client 1
+    assert select_clients(settings, histories, 1, 3, deadline=30.0) == [2, 4]
+
+    # client 1 was skipped max_skip_rounds in a row, it takes a place
+    histories[1] += [{"round": 3, "skipped": True}, {"round": 4, "skipped": True}]
+    assert select_clients(settings, histories, 1, 5, deadline=30.0) == [1, 2]
+
+    # clients without history go first so their latency gets measured
+    histories[5] = []
+    assert 5 in select_clients(settings, histories, 1, 5, deadline=30.0)
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+
+from helpers.coordinator import SessionCoordinator
+
+
+def counting(results):
+    """Condition returning the next value of results on every check, and the number of checks"""
+    calls = []
+
+    def condition():
+        calls.append(time.monotonic())
+        return results[min(len(calls), len(results)) - 1]
+
+    return condition, calls
+
+
+def test_notify_wakes_the_wait_before_the_fallback():
+    coordinator = SessionCoordinator(fallback_interval=30)
+    condition, calls = counting([False, "ready"])
+
+    async def run():
+        wait = asyncio.create_task(coordinator.wait_until(7, condition))
+        await asyncio.sleep(0.05)
+        coordinator.notify("7")  # request handlers pass the id as they got it
+        return await asyncio.wait_for(wait, 2)
+
+    assert asyncio.run(run()) == "ready"
+    assert len(calls) == 2
+
+
+def test_notify_from_the_threadpool():
+    coordinator = SessionCoordinator(fallback_interval=30)
+    condition, calls = counting([False, True])
+
+    async def run():
+        wait = asyncio.create_task(coordinator.wait_until(3, condition))
+        await asyncio.sleep(0.05)
+        thread = threading.Thread(target=coordinator.notify, args=(3,))
+        thread.start()
+        result = await asyncio.wait_for(wait, 2)
+        thread.join()
+        return result
+
+    assert asyncio.run(run()) is True
+
+
+def test_fallback_catches_changes_without_notify():
+    # a change committed by another worker or before a restart is never notified here
+    coordinator = SessionCoordinator(fallback_interval=0.02)
+    condition, calls = counting([False, False, False, 5])
+
+    assert asyncio.run(asyncio.wait_for(coordinator.wait_until(1, condition), 2)) == 5
+    assert len(calls) == 4
+
+
+def test_timeout_returns_none():
+    coordinator = SessionCoordinator(fallback_interval=30)
+    condition, calls = counting([False])
+
+    start = time.monotonic()
+    assert asyncio.run(coordinator.wait_until(1, condition, timeout=0.05)) is None
+    assert time.monotonic() - start < 1
+    assert len(calls) >= 1
+
+
+def test_notify_before_the_check_is_not_lost():
+    coordinator = SessionCoordinator(fallback_interval=30)
+
+    async def run():
+        state = {"ready": False}
+
+        def condition():
+            # the change is committed and notified while the condition is being checked
+            ready = state["ready"]
+            if not ready:
+                state["ready"] = True
+                coordinator.notify(2)
+            return ready
+
+        return await asyncio.wait_for(coordinator.wait_until(2, condition), 2)
+
+    assert asyncio.run(run()) is True
+
+
+def test_notify_without_a_wait_and_release():
+    coordinator = SessionCoordinator(fallback_interval=30)
+    coordinator.notify(9)  # nothing waits yet, nothing to wake
+
+    async def run():
+        await coordinator.wait_until(9, lambda: True)
+        coordinator.notify(9)  # the event exists, the wait already returned
+
+    asyncio.run(run())
+    coordinator.release(9)
+    assert 9 not in coordinator._events
+    coordinator.notify(9)
@@ -0,0 +1,35 @@
+import numpy as np
+
+from utility.CustomModels.DataSource import ArraySource, as_data_source
+
+
+def test_in_memory_data_is_converted_once():
+    X = np.arange(40, dtype=np.float32).reshape(20, 2)
+    y = np.arange(20, dtype=np.int64)
+    source = as_data_source(X, y)
+
+    assert source.X.dtype == np.float64
+    for _ in range(3):
+        (X_chunk, y_chunk), = list(source.batches())
+        # every pass serves the converted arrays, nothing is copied per epoch
+        assert np.shares_memory(X_chunk, source.X) and np.shares_memory(y_chunk, source.y)
+    np.testing.assert_array_equal(X_chunk, X)
+
+
+def test_memory_mapped_data_is_converted_per_chunk(tmp_path):
+    np.save(tmp_path / "X.npy", np.arange(40, dtype=np.float32).reshape(20, 2))
+    np.save(tmp_path / "y.npy", np.arange(20, dtype=np.int64))
+    source = as_data_source(str(tmp_path / "X.npy"), str(tmp_path / "y.npy"), chunk_rows=8)
+
+    assert isinstance(source.X, np.memmap) and source.X.dtype == np.float32
+    chunks = list(source.batches())
+    assert [len(X) for X, _ in chunks] == [8, 8, 4]
+    assert all(X.dtype == np.float64 and y.dtype == np.float64 for X, y in chunks)
+    np.testing.assert_array_equal(np.concatenate([X for X, _ in chunks]), np.arange(40).reshape(20, 2))
+
+
+def test_float64_arrays_are_used_as_they_are():
+    X = np.ones((5, 3))
+    y = np.zeros(5)
+    source = ArraySource(X, y)
+    assert np.shares_memory(source.X, X) and np.shares_memory(source.y, y)
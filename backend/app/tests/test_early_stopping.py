@@ -0,0 +1,106 @@
+import json
+
+import pytest
+from sqlalchemy.orm import Session
+
+from helpers.federated_learning import check_early_stopping, finish_session
+from models.FederatedSession import FederatedSession, SessionPhase
+from models.Notification import NotificationRecipient
+from utility.early_stopping import MODE_MAX, MODE_MIN, STOP_EARLY, EarlyStopping, early_stopping_settings
+from utility.test import Test
+
+# the loss improves for three rounds, then plateaus within min_delta
+PLATEAU = [1.0, 0.6, 0.5, 0.495, 0.52, 0.499, 0.51]
+
+
+def stopping_info(**options):
+    return {
+        "model_name": "LinearRegression",
+        "model_info": {"test_metrics": ["mse", "r2_score"]},
+        "training_config": {"early_stopping": {"metric": "mse", **options}},
+    }
+
+
+def test_settings_defaults_and_errors():
+    settings = early_stopping_settings(stopping_info())
+    assert settings == ("mse", 3, 0.0, MODE_MIN, True)
+    assert early_stopping_settings(stopping_info(metric="r2_score")).mode == MODE_MAX
+    assert early_stopping_settings({"training_config": {}}) is None
+    for options in ({"metric": "accuracy"}, {"patience": 0}, {"min_delta": -1}, {"mode": "median"}):
+        with pytest.raises(ValueError):
+            early_stopping_settings(stopping_info(**options))
+
+
+def test_plateau_stops_after_patience_rounds_at_the_best_round():
+    early_stopping = EarlyStopping(early_stopping_settings(stopping_info(patience=3, min_delta=0.01)))
+
+    checkpoints = [early_stopping.update(round, {"mse": mse}) for round, mse in enumerate(PLATEAU, start=1)]
+
+    # 0.495 is not 0.01 better than 0.5, so round 3 stays the best one
+    assert checkpoints == [True, True, True, False, False, False, False]
+    assert early_stopping.best_round == 3 and early_stopping.best_value == 0.5
+    assert early_stopping.rounds_without_improvement == 4
+    assert early_stopping.should_stop
+
+
+def test_rounds_without_results_or_counted_before_are_ignored():
+    early_stopping = EarlyStopping(early_stopping_settings(stopping_info(patience=2)))
+    early_stopping.update(1, {"mse": 1.0})
+    early_stopping.update(2, {"mse": 2.0})
+
+    # a resumed worker tests round 2 again, a round without results says nothing
+    assert not early_stopping.update(2, {"mse": 2.0})
+    assert not early_stopping.update(3, None)
+    assert early_stopping.rounds_without_improvement == 1 and not early_stopping.should_stop
+
+    resumed = EarlyStopping(early_stopping.settings, early_stopping.state())
+    resumed.update(3, {"mse": 3.0})
+    assert resumed.should_stop and resumed.best_round == 1
+
+
+def test_max_mode_watches_increases():
+    early_stopping = EarlyStopping(early_stopping_settings(stopping_info(metric="r2_score", patience=1)))
+    assert early_stopping.update(1, {"r2_score": 0.5})
+    assert early_stopping.update(2, {"r2_score": 0.7})
+    assert not early_stopping.update(3, {"r2_score": 0.6})
+    assert early_stopping.should_stop and early_stopping.best_round == 2
+
+
+def test_session_ends_with_the_best_round_restored(make_session, database, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Test writes Global_test_results/
+    info = stopping_info(patience=3, min_delta=0.01)
+    session_id, clients = make_session(info, client_statuses=(4, 4), global_parameters=json.dumps({"round": 0}))
+    test = Test(session_id, None)
+    early_stopping = EarlyStopping(early_stopping_settings(info), test.early_stopping)
+
+    stopped_at = None
+    for round, mse in enumerate(PLATEAU, start=1):
+        with Session(database) as db:
+            session = db.query(FederatedSession).filter_by(id=session_id).one()
+            session.global_parameters = json.dumps({"round": round})
+            session.global_version = round
+            session.curr_round = round
+            db.commit()
+        test.record_results({"mse": mse})
+        stop = check_early_stopping(session_id, test, early_stopping, round, {"mse": mse})
+        test.save_test_results()
+        if stop:
+            stopped_at = round
+            break
+
+    assert stopped_at == 6
+    finish_session(session_id, test, early_stopping, STOP_EARLY)
+
+    with Session(database) as db:
+        session = db.query(FederatedSession).filter_by(id=session_id).one()
+        assert json.loads(session.global_parameters) == {"round": 3}
+        assert session.global_version == 7
+        assert session.phase == SessionPhase.COMPLETED
+        notified = {recipient.user_id for recipient in db.query(NotificationRecipient)}
+        assert notified == {*clients, session.admin_id}
+
+    with open(test.results_path()) as f:
+        results = json.load(f)
+    assert results["stop_reason"] == STOP_EARLY
+    assert results["early_stopping"]["best_round"] == 3
+    assert results["early_stopping"]["best_results"] == {"mse": 0.5}
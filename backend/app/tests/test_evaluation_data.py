@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from utility.evaluation_data import EvaluationDataCache
+
+
+def save_test_set(data_dir, X, Y):
+    data_dir.mkdir(parents=True, exist_ok=True)
+    np.save(data_dir / "X_test.npy", X, allow_pickle=True)
+    np.save(data_dir / "Y_test.npy", Y, allow_pickle=True)
+
+
+def test_test_sets_are_memory_mapped_per_dataset_code(tmp_path):
+    save_test_set(tmp_path, np.zeros((4, 2)), np.zeros(4))
+    save_test_set(tmp_path / "mnist", np.ones((6, 3), dtype=np.float32), np.ones(6))
+    cache = EvaluationDataCache(max_bytes=1024 ** 2, data_dir=str(tmp_path))
+
+    dataset = cache.get("mnist")
+    assert isinstance(dataset.X, np.memmap) and len(dataset) == 6
+    assert cache.get("mnist") is dataset
+    assert len(cache.get("unknown code")) == 4
+    assert [len(X) for X, _ in dataset.batches(4)] == [4, 2]
+
+
+def test_object_arrays_are_not_unpickled(tmp_path):
+    ragged = np.empty(2, dtype=object)
+    ragged[:] = [[1.0, 2.0], [3.0]]
+    save_test_set(tmp_path, ragged, np.zeros(2))
+    cache = EvaluationDataCache(max_bytes=1024 ** 2, data_dir=str(tmp_path))
+
+    with pytest.raises(ValueError, match="pickled objects"):
+        cache.get()
+
+
+@pytest.mark.parametrize("dataset_code", ["../secret", "mnist/../../secret", "/tmp", ".", "mnist/.."])
+def test_dataset_codes_can_not_leave_the_test_data(tmp_path, dataset_code):
+    save_test_set(tmp_path / "global", np.zeros((4, 2)), np.zeros(4))
+    save_test_set(tmp_path / "global" / "mnist", np.ones((6, 3)), np.ones(6))
+    save_test_set(tmp_path / "secret", np.ones((8, 2)), np.ones(8))
+    cache = EvaluationDataCache(max_bytes=1024 ** 2, data_dir=str(tmp_path / "global"))
+
+    with pytest.raises(ValueError, match="Invalid dataset code"):
+        cache.get(dataset_code)
+    # codes inside the test data still resolve, nested folders included
+    assert len(cache.get("mnist/../mnist")) == 6
@@ -0,0 +1,108 @@
+import json
+
+import numpy as np
+import pytest
+from sqlalchemy.orm import Session
+
+from models.FederatedSession import ClientUpdate, FederatedSession
+from utility.FederatedLearning import FederatedLearning
+from utility.client_updates import save_client_update
+from utility.fedbuff import FedBuffSettings, fedbuff_settings, is_too_stale, staleness_weight
+from utility.parameters import flatten_parameters
+from utility.tensor_codec import encode_parameters, encode_sparse_delta
+
+
+def fedbuff_info(**training_config):
+    return {"model_name": "CNN", "training_config": {"aggregation": "fedbuff", **training_config}}
+
+
+GLOBAL_PARAMETERS = {"weights": [[1.0, 2.0, 3.0], [4.0, 5.0]], "bias": [0.5]}
+
+
+def client_parameters(offset):
+    return {"weights": [[1.0 + offset, 2.0, 3.0 - offset], [4.0, 5.0 + 2 * offset]], "bias": [0.5 + offset]}
+
+
+def test_staleness_down_weights_old_updates():
+    assert staleness_weight(0) == 1.0
+    assert staleness_weight(3) == pytest.approx(0.5)
+    weights = [staleness_weight(staleness) for staleness in range(6)]
+    assert weights == sorted(weights, reverse=True)
+
+
+def test_is_too_stale():
+    assert not is_too_stale(100, FedBuffSettings(10, 1.0, None))
+    settings = FedBuffSettings(10, 1.0, 2)
+    assert not is_too_stale(2, settings)
+    assert is_too_stale(3, settings)
+
+
+def test_buffer_is_capped_at_the_clients():
+    assert fedbuff_settings(fedbuff_info(buffer_size=8), 3).buffer_size == 3
+    assert fedbuff_settings(fedbuff_info(buffer_size=2), 3).buffer_size == 2
+    assert fedbuff_settings(fedbuff_info(buffer_size=8)).buffer_size == 8
+    assert fedbuff_settings({"training_config": {}}) is None
+    with pytest.raises(ValueError):
+        fedbuff_settings(fedbuff_info(buffer_size=0))
+
+
+def test_buffer_only_counts_training_clients(make_session):
+    from helpers.federated_learning import count_training_clients
+
+    # rejected (3), accepted but never trained (2) and undecided (1) clients can not fill the buffer
+    session_id, _ = make_session(fedbuff_info(buffer_size=10), client_statuses=(4, 4, 3, 2, 1))
+
+    assert count_training_clients(session_id) == 2
+    assert fedbuff_settings(fedbuff_info(buffer_size=10), count_training_clients(session_id)).buffer_size == 2
+
+
+def test_buffer_fold_weights_by_staleness_and_drops_stale_updates(make_session, database):
+    session_id, (fresh, old, sparse, stale) = make_session(
+        fedbuff_info(server_lr=0.5, max_staleness=2), client_statuses=(4, 4, 4, 4),
+        global_parameters=json.dumps(GLOBAL_PARAMETERS), global_version=3,
+    )
+    base, manifest = flatten_parameters(GLOBAL_PARAMETERS)
+    with Session(database) as db:
+        # the round column of a buffered update holds its base version
+        save_client_update(db, session_id, 3, fresh, encode_parameters(client_parameters(1.0)))
+        save_client_update(db, session_id, 2, old, encode_parameters(client_parameters(-2.0)))
+        save_client_update(db, session_id, 3, sparse, encode_sparse_delta([0, 5], [0.25, -1.0], manifest, 3, dtype="<f8"))
+        save_client_update(db, session_id, 0, stale, encode_parameters(client_parameters(9.0)))
+
+    global_parameters, contributors = FederatedLearning().aggregate_buffered_updates(session_id)
+
+    sparse_delta = np.zeros_like(base)
+    sparse_delta[[0, 5]] = [0.25, -1.0]
+    weighted_deltas = (
+        staleness_weight(0) * (flatten_parameters(client_parameters(1.0))[0] - base)
+        + staleness_weight(1) * (flatten_parameters(client_parameters(-2.0))[0] - base)
+        + staleness_weight(0) * sparse_delta
+    )
+    expected = base + 0.5 * weighted_deltas / 3
+    np.testing.assert_allclose(flatten_parameters(global_parameters)[0], expected, rtol=1e-12)
+    assert sorted(contributors) == sorted([fresh, old, sparse, stale])
+
+    with Session(database) as db:
+        session = db.query(FederatedSession).filter_by(id=session_id).one()
+        assert session.global_version == 4
+        assert json.loads(session.global_parameters) == global_parameters
+        # folded and dropped updates are consumed
+        assert db.query(ClientUpdate).filter_by(session_id=session_id).count() == 0
+
+
+def test_buffer_of_only_stale_updates_keeps_the_global_model(make_session, database):
+    session_id, (client,) = make_session(
+        fedbuff_info(max_staleness=1), global_parameters=json.dumps(GLOBAL_PARAMETERS), global_version=5,
+    )
+    with Session(database) as db:
+        save_client_update(db, session_id, 1, client, encode_parameters(client_parameters(1.0)))
+
+    global_parameters, contributors = FederatedLearning().aggregate_buffered_updates(session_id)
+
+    assert global_parameters is None
+    assert contributors == [client]
+    with Session(database) as db:
+        session = db.query(FederatedSession).filter_by(id=session_id).one()
+        assert session.global_version == 5
+        assert json.loads(session.global_parameters) == GLOBAL_PARAMETERS
+        assert db.query(ClientUpdate).filter_by(session_id=session_id).count() == 0
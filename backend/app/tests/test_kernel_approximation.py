@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from utility.CustomModels.KernelApproximation import NystroemFeatures, RandomFourierFeatures, make_feature_map, transform_by_landmarks
+from utility.CustomModels.LandMarkSVM import LandMarkSVM
+
+
+def sample_data(seed=0, rows=50, features=6):
+    return np.random.default_rng(seed).normal(size=(rows, features))
+
+
+@pytest.mark.parametrize("feature_map", [
+    lambda seed: RandomFourierFeatures(n_components=32, gamma=0.2, seed=seed),
+    lambda seed: NystroemFeatures(kernel="rbf", gamma=0.2, n_components=16, seed=seed),
+    lambda seed: NystroemFeatures(kernel="polynomial", gamma=0.2, degree=2, coef0=1.0, n_components=16, seed=seed),
+])
+def test_feature_maps_are_deterministic_for_a_seed(feature_map):
+    X = sample_data()
+    # separate instances, like a client and the server's Test building the map from model_info
+    np.testing.assert_array_equal(feature_map(7).transform(X), feature_map(7).transform(X))
+    assert not np.allclose(feature_map(7).transform(X), feature_map(8).transform(X))
+
+
+@pytest.mark.parametrize("kernel", ["rbf", "linear", "polynomial", "sigmoid"])
+def test_landmark_transform_in_blocks_matches_unblocked(kernel):
+    X = sample_data(1, rows=103)
+    options = dict(gamma=0.3, degree=3, coef0=0.5, num_landmarks=9, seed=4)
+
+    unblocked = transform_by_landmarks(X, kernel, block_rows=len(X), **options)
+    np.testing.assert_allclose(transform_by_landmarks(X, kernel, block_rows=10, **options), unblocked, rtol=1e-12, atol=1e-14)
+    np.testing.assert_allclose(transform_by_landmarks(X, kernel, block_rows=1, **options), unblocked, rtol=1e-12, atol=1e-14)
+
+
+def test_rbf_landmark_transform_matches_the_kernel():
+    X = sample_data(2, rows=20)
+    landmarks = sample_data(3, rows=5)
+    expected = np.exp(-0.3 * np.sum((X[:, np.newaxis, :] - landmarks[np.newaxis, :, :]) ** 2, axis=2))
+    np.testing.assert_allclose(transform_by_landmarks(X, "rbf", gamma=0.3, landmarks=landmarks, block_rows=3), expected, rtol=1e-10)
+
+
+@pytest.mark.parametrize("kernel_approximation", ["rff", "nystroem"])
+def test_approximate_feature_maps_in_blocks_match_unblocked(kernel_approximation):
+    X = sample_data(5, rows=77)
+    unblocked = make_feature_map(kernel_approximation, "rbf", 0.2, 3, 0.0, 24, 1, block_rows=len(X)).transform(X)
+    blocked = make_feature_map(kernel_approximation, "rbf", 0.2, 3, 0.0, 24, 1, block_rows=8).transform(X)
+    np.testing.assert_allclose(blocked, unblocked, rtol=1e-12, atol=1e-14)
+
+
+def test_unknown_kernel_approximation_is_rejected():
+    with pytest.raises(ValueError):
+        make_feature_map("fastfood", "rbf", 0.2, 3, 0.0, 24, 1)
+    with pytest.raises(ValueError):
+        make_feature_map("rff", "linear", 0.2, 3, 0.0, 24, 1)
+
+
+@pytest.mark.parametrize("options", [{"kernel_approximation": "fastfood"}, {"kernel_approximation": "rff", "kernel": "polynomial"}])
+def test_landmark_svm_rejects_an_invalid_kernel_approximation(options):
+    # not swallowed by the config parsing, the model would silently train on the exact landmarks
+    with pytest.raises(ValueError):
+        LandMarkSVM({"gamma": 0.2, **options})
+
+
+def test_landmark_svm_builds_the_configured_feature_map():
+    assert isinstance(LandMarkSVM({"gamma": 0.2, "kernel_approximation": "rff", "n_components": 16}).feature_map, RandomFourierFeatures)
+    assert LandMarkSVM({"gamma": 0.2}).feature_map is None
@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import APP_DIR
+
+# heavy modules an API worker must not import before a model is actually built
+HEAVY_MODULES = ("tensorflow", "keras", "sklearn", "utility.CustomModels")
+
+IMPORT_MAIN = f"""
+import json, sys, time
+start = time.perf_counter()
+try:
+    import main
+except ModuleNotFoundError as e:
+    print(json.dumps({{"missing": e.name}}))
+    sys.exit(0)
+seconds = time.perf_counter() - start
+loaded = sorted(name for name in sys.modules if name.startswith({HEAVY_MODULES!r}))
+print(json.dumps({{"loaded": loaded, "seconds": seconds}}))
+"""
+
+
+def test_importing_main_does_not_import_model_frameworks():
+    # a fresh interpreter, other tests may have imported the models already
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_MAIN], cwd=APP_DIR, env=os.environ.copy(),
+        capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+
+    missing = result.get("missing")
+    if missing is not None:
+        assert not missing.startswith(HEAVY_MODULES), f"importing main needs {missing}"
+        pytest.skip(f"API dependency {missing} is not installed")
+
+    assert result["loaded"] == []
+    print(f"import main: {result['seconds']:.2f} s")
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+import utility.test as test_module
+from utility.evaluation_data import EvaluationDataCache
+from utility.metrics import MetricsAccumulator, calculate_metrics
+
+
+def accumulate(metrics, y_true, y_pred, batch_size):
+    accumulator = MetricsAccumulator(metrics)
+    for start in range(0, len(y_true), batch_size):
+        accumulator.update(y_true[start:start + batch_size], y_pred[start:start + batch_size])
+    return accumulator.result()
+
+
+def test_streaming_metrics_match_calculate_metrics():
+    rng = np.random.default_rng(0)
+    y_true = rng.normal(size=1000) + 5
+    y_pred = y_true + rng.normal(scale=0.3, size=1000)
+    metrics = ["mse", "mae", "rmse", "r2_score"]
+    assert accumulate(metrics, y_true, y_pred, 64) == calculate_metrics(y_true, y_pred, metrics)
+
+    labels = rng.integers(0, 2, size=1000).astype(np.float64)
+    predicted = np.where(rng.random(1000) < 0.8, labels, 1 - labels)
+    metrics = ["accuracy", "precision", "recall", "f1_score", "auc"]
+    assert accumulate(metrics, labels, predicted, 64) == calculate_metrics(labels, predicted, metrics)
+
+
+def test_multi_class_probabilities_are_scored_by_their_argmax():
+    rng = np.random.default_rng(1)
+    labels = rng.integers(0, 3, size=200)
+    probabilities = rng.dirichlet(np.ones(3), size=200)
+    # make 150 predictions right
+    probabilities[:150] = np.eye(3)[labels[:150]] * 0.9 + 0.05
+
+    expected = np.mean(probabilities.argmax(axis=1) == labels)
+    assert accumulate(["accuracy"], labels, probabilities, 32)["accuracy"] == round(expected, 3)
+    # one-hot labels are the same labels
+    assert accumulate(["accuracy"], np.eye(3)[labels], probabilities, 32)["accuracy"] == round(expected, 3)
+
+
+def test_two_class_probabilities_give_auc_and_log_loss_of_class_one():
+    labels = np.array([0, 0, 1, 1], dtype=np.float64)
+    probabilities = np.array([[0.9, 0.1], [0.6, 0.4], [0.35, 0.65], [0.2, 0.8]])
+    results = accumulate(["auc", "log_loss", "accuracy"], labels, probabilities, 2)
+    assert results == calculate_metrics(labels, probabilities[:, 1], ["auc", "log_loss"]) | {"accuracy": 1.0}
+
+
+class ProbabilityModel:
+    def __init__(self, num_classes):
+        self.num_classes = num_classes
+
+    def update_parameters(self, parameters):
+        pass
+
+    def predict(self, X):
+        return np.tile(np.eye(self.num_classes)[0], (len(X), 1))
+
+
+@pytest.fixture
+def test_data(tmp_path, monkeypatch):
+    np.save(tmp_path / "X_test.npy", np.zeros((10, 4), dtype=np.float32))
+    np.save(tmp_path / "Y_test.npy", np.array([0] * 6 + [1] * 4, dtype=np.float64))
+    monkeypatch.setattr(test_module, "evaluation_data_cache", EvaluationDataCache(1024 ** 2, str(tmp_path)))
+    monkeypatch.setattr(test_module, "EVAL_BATCH_SIZE", 4)
+
+
+def test_evaluate_model_scores_cnn_probabilities(test_data):
+    results = test_module.evaluate_model(ProbabilityModel(3), {}, ["accuracy", "mse"])
+    assert results["accuracy"] == 0.6
+
+
+def test_evaluate_model_returns_none_for_predictions_that_do_not_fit(test_data):
+    model = ProbabilityModel(3)
+    model.predict = lambda X: np.zeros((len(X) + 1,))
+    assert test_module.evaluate_model(model, {}, ["accuracy"]) is None
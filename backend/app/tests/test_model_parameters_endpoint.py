@@ -0,0 +1,55 @@
+import json
+
+import pytest
+from fastapi import HTTPException
+
+import main
+from utility.tensor_codec import MEDIA_TYPE, decode_parameters
+
+
+class ParametersRequest:
+    """The parts of a Request the endpoint reads"""
+
+    def __init__(self, accept=None):
+        self.headers = {"accept": accept} if accept else {}
+
+
+@pytest.fixture(autouse=True)
+def working_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # the endpoint appends to global_parameters.txt
+
+
+def test_json_response_embeds_the_stored_parameters(make_session):
+    parameters = {"weights": [[0.5, -1.0], [2.0, 0.25]], "bias": [0.0]}
+    session_id, _ = make_session({}, global_parameters=json.dumps(parameters), global_version=3)
+
+    response = main.get_model_parameters(str(session_id), ParametersRequest())
+
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == {"global_parameters": parameters, "is_first": 0, "global_version": 3}
+
+
+def test_tensor_response(make_session):
+    parameters = {"weights": [[0.5, -1.0], [2.0, 0.25]], "bias": [0.0]}
+    session_id, _ = make_session({}, global_parameters=json.dumps(parameters), global_version=3)
+
+    response = main.get_model_parameters(str(session_id), ParametersRequest(accept=MEDIA_TYPE))
+
+    decoded, metadata = decode_parameters(response.body)
+    assert decoded == parameters
+    assert metadata == {"is_first": 0, "global_version": 3}
+
+
+@pytest.mark.parametrize("accept", [None, MEDIA_TYPE])
+def test_session_without_global_parameters(make_session, accept):
+    session_id, _ = make_session({}, global_parameters=None)
+
+    with pytest.raises(HTTPException) as error:
+        main.get_model_parameters(str(session_id), ParametersRequest(accept=accept))
+    assert error.value.status_code == 409
+
+
+def test_unknown_session(database):
+    with pytest.raises(HTTPException) as error:
+        main.get_model_parameters("12345", ParametersRequest())
+    assert error.value.status_code == 404
@@ -0,0 +1,75 @@
+import importlib.util
+import os
+from datetime import datetime
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy.orm import Session
+
+from models.Notification import Notification, NotificationMessage, NotificationRecipient
+from models.User import User
+from utility.user import get_unnotified_notifications
+
+MIGRATION = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic", "versions", "b93d4e2f7a15_move_legacy_notifications.py")
+
+
+@pytest.fixture
+def migration(database):
+    spec = importlib.util.spec_from_file_location("move_legacy_notifications", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    def run(step):
+        with database.begin() as connection:
+            with Operations.context(MigrationContext.configure(connection)):
+                getattr(module, step)()
+
+    return module, run
+
+
+def test_legacy_notifications_are_moved(database, migration, monkeypatch):
+    module, run = migration
+    monkeypatch.setattr(module, "BATCH_ROWS", 2)
+    created_at, notified_at = datetime(2026, 10, 1, 12), datetime(2026, 10, 1, 13)
+    broadcast = {"type": "new-session", "session_id": 4}
+    with Session(database) as db:
+        users = [User(username=f"legacy{i}") for i in range(3)]
+        db.add_all(users)
+        db.flush()
+        db.add_all([
+            Notification(user_id=users[0].id, message=broadcast, created_at=created_at),
+            Notification(user_id=users[1].id, message=broadcast, created_at=created_at, notified_at=notified_at),
+            Notification(user_id=users[2].id, message=broadcast, created_at=created_at),
+            Notification(user_id=users[0].id, message={"type": "price"}, created_at=datetime(2026, 10, 2), valid_until=datetime(2100, 1, 1)),
+        ])
+        db.commit()
+        user_ids = [user.id for user in users]
+
+    run("upgrade")
+
+    with Session(database) as db:
+        assert db.query(Notification).count() == 0
+        messages = db.query(NotificationMessage).order_by(NotificationMessage.id).all()
+        # the broadcast split by the batch size is still delivered once to every user
+        assert [message.message for message in messages] == [broadcast, broadcast, {"type": "price"}]
+        assert messages[-1].valid_until == datetime(2100, 1, 1)
+        recipients = {(recipient.user_id, recipient.message_id): recipient for recipient in db.query(NotificationRecipient)}
+        assert len(recipients) == 4
+        assert recipients[(user_ids[1], messages[0].id)].notified_at == notified_at
+        assert len(messages[0].recipients) == 2
+
+        # the stream reads the moved rows, notified ones are not sent again
+        user = db.get(User, user_ids[0])
+        assert [n.message for n in get_unnotified_notifications(user, db)] == [broadcast, {"type": "price"}]
+        assert get_unnotified_notifications(db.get(User, user_ids[1]), db) == []
+
+    run("downgrade")
+
+    with Session(database) as db:
+        assert db.query(NotificationMessage).count() == 0 and db.query(NotificationRecipient).count() == 0
+        legacy = db.query(Notification).order_by(Notification.id).all()
+        assert [(n.user_id, n.message, n.notified_at) for n in legacy] == [
+            (user_ids[0], broadcast, None), (user_ids[1], broadcast, notified_at), (user_ids[2], broadcast, None),
+            (user_ids[0], {"type": "price"}, None),
+        ]
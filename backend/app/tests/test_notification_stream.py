@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+import main
+from models.Notification import NotificationRecipient
+from models.User import User
+from utility.notification import add_notifications_for_user, create_notification_message
+
+
+class StreamRequest:
+    """The parts of a Request the stream reads"""
+
+    def __init__(self, last_event_id=None):
+        self.headers = {"last-event-id": last_event_id} if last_event_id else {}
+        self.disconnected = False
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+
+@pytest.fixture
+def user(database, monkeypatch):
+    monkeypatch.setattr(main, "NOTIFICATION_CATCHUP_SECONDS", 0.05)
+    with Session(database) as db:
+        user = User(username="listener")
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        db.expunge(user)
+        return user
+
+
+def add_from_another_worker(database, user_id, message):
+    """Committed to the DB without reaching this process' notification hub"""
+    with Session(database) as db:
+        notification_message = create_notification_message(db, message)
+        db.execute(insert(NotificationRecipient).values(message_id=notification_message.id, user_id=user_id))
+        db.commit()
+        return notification_message.id
+
+
+def messages_of(event):
+    return json.loads(event["data"])
+
+
+def test_stream_catches_up_on_connect_push_and_other_workers(database, user):
+    add_from_another_worker(database, user.id, {"n": 1})
+    add_from_another_worker(database, user.id, {"n": 2})
+
+    async def run():
+        request = StreamRequest()
+        response = await main.notifications_stream(request, user)
+        stream = response.body_iterator
+
+        # notifications added before the connection are read from the DB
+        connected = await asyncio.wait_for(anext(stream), 2)
+
+        # pushed through the hub, no DB read needed
+        pending = asyncio.create_task(asyncio.wait_for(anext(stream), 2))
+        await asyncio.sleep(0)
+        with Session(database) as db:
+            add_notifications_for_user(db, user.id, {"n": 3})
+        pushed = await pending
+
+        # another worker's notification arrives with the next catch-up
+        add_from_another_worker(database, user.id, {"n": 4})
+        caught_up = await asyncio.wait_for(anext(stream), 2)
+
+        # nothing is delivered twice before the stream ends
+        await asyncio.sleep(0.15)
+        request.disconnected = True
+        rest = [event async for event in stream]
+        return connected, pushed, caught_up, rest
+
+    connected, pushed, caught_up, rest = asyncio.run(run())
+    assert messages_of(connected) == [{"n": 1}, {"n": 2}]
+    assert messages_of(pushed) == [{"n": 3}]
+    assert messages_of(caught_up) == [{"n": 4}]
+    assert rest == []
+    assert int(connected["id"]) < int(pushed["id"]) < int(caught_up["id"])
+
+    # every delivered notification is marked, a new connection has nothing to catch up
+    with Session(database) as db:
+        assert db.query(NotificationRecipient).filter(NotificationRecipient.notified_at.is_(None)).count() == 0
+
+
+def test_reconnect_replays_after_the_last_event_id(database, user):
+    first = add_from_another_worker(database, user.id, {"n": 1})
+    add_from_another_worker(database, user.id, {"n": 2})
+
+    async def run():
+        request = StreamRequest()
+        stream = (await main.notifications_stream(request, user)).body_iterator
+        await asyncio.wait_for(anext(stream), 2)
+        request.disconnected = True
+        [event async for event in stream]
+
+        # the connection dropped before the client got the second one, it was marked notified anyway
+        request = StreamRequest(last_event_id=str(first))
+        stream = (await main.notifications_stream(request, user)).body_iterator
+        replayed = await asyncio.wait_for(anext(stream), 2)
+        request.disconnected = True
+        [event async for event in stream]
+        return replayed
+
+    replayed = asyncio.run(run())
+    assert messages_of(replayed) == [{"n": 2}]
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+import utility.ModelBuilder as ModelBuilder
+from utility.CustomModels.NumpyCNN import NumpyCNN, conv2d, pool2d
+
+
+def cnn_config(activation="relu"):
+    return {
+        "input_shape": "(12, 12, 1)",
+        "layers": [
+            {"layer_type": "convolution", "filters": "4", "kernel_size": "(3, 3)", "stride": "(1, 1)", "activation_function": activation},
+            {"layer_type": "pooling", "pooling_type": "max", "pool_size": "(2, 2)", "stride": "(2, 2)"},
+            {"layer_type": "convolution", "filters": "6", "kernel_size": "(2, 2)", "stride": "(2, 2)", "activation_function": "tanh"},
+            {"layer_type": "pooling", "pooling_type": "average", "pool_size": "(2, 2)", "stride": "None"},
+            {"layer_type": "flatten"},
+            {"layer_type": "dense", "num_nodes": "8", "activation_function": "sigmoid"},
+        ],
+        "output_layer": {"num_nodes": "3", "activation_function": "softmax"},
+        "loss": "categorical_crossentropy",
+        "optimizer": "adam",
+    }
+
+
+def test_conv2d_matches_direct_convolution():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2, 7, 6, 3))
+    kernel = rng.normal(size=(3, 2, 3, 4))
+    bias = rng.normal(size=4)
+
+    result = conv2d(X, kernel, bias, (2, 1))
+    expected = np.empty((2, 3, 5, 4))
+    for i in range(3):
+        for j in range(5):
+            patch = X[:, 2 * i:2 * i + 3, j:j + 2, :]
+            expected[:, i, j] = np.einsum("nhwc,hwco->no", patch, kernel) + bias
+    np.testing.assert_allclose(result, expected, rtol=1e-12)
+
+    pooled = pool2d(np.arange(16.0).reshape(1, 4, 4, 1), (2, 2), (2, 2), np.max)
+    np.testing.assert_array_equal(pooled[0, :, :, 0], [[5, 7], [13, 15]])
+
+
+def test_matches_keras_predictions():
+    pytest.importorskip("tensorflow")
+    from utility.CustomModels.CustomCNN import CustomCNN
+
+    keras_model = CustomCNN(cnn_config())
+    parameters = keras_model.get_parameters()
+    X = np.random.default_rng(1).normal(size=(50, 12, 12, 1)).astype(np.float32)
+
+    numpy_model = NumpyCNN(cnn_config())
+    numpy_model.update_parameters(parameters)
+    np.testing.assert_allclose(numpy_model.predict(X), keras_model.predict(X), rtol=1e-4, atol=1e-5)
+
+
+def test_unsupported_configs_fall_back_to_the_model_class(monkeypatch):
+    class KerasStandIn:
+        def __init__(self, config):
+            self.config = config
+
+    monkeypatch.setattr(ModelBuilder, "get_model_class", lambda model_name: KerasStandIn)
+    monkeypatch.setattr(ModelBuilder, "USE_INFERENCE_CLASSES", True)
+    model_config = {"model_name": "CNN", "model_info": cnn_config("gelu")}
+
+    assert isinstance(ModelBuilder.model_instance_from_config(model_config, inference=True), KerasStandIn)
+    model_config["model_info"] = cnn_config()
+    assert isinstance(ModelBuilder.model_instance_from_config(model_config, inference=True), NumpyCNN)
@@ -0,0 +1,73 @@
+import json
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models.FederatedSession import ClientUpdate, FederatedSession, SessionPhase
+from utility.FederatedLearning import FederatedLearning
+from utility.client_updates import save_client_update
+from utility.parameters import flatten_parameters
+from utility.round_worker import aggregate_and_test_round
+from utility.tensor_codec import encode_parameters, encode_sparse_delta
+
+MODEL_INFO = {"model_name": "CNN", "training_config": {}}
+GLOBAL_PARAMETERS = {"weights": [[1.0, 2.0, 3.0], [4.0, 5.0]], "bias": [0.5]}
+
+
+def start_aggregation(make_session, **columns):
+    return make_session(
+        MODEL_INFO, client_statuses=(4, 4, 4), global_parameters=json.dumps(GLOBAL_PARAMETERS),
+        global_version=2, curr_round=3, phase=SessionPhase.AGGREGATING, **columns
+    )
+
+
+def test_stale_sparse_deltas_are_skipped(make_session, database, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # the aggregation appends to aggregated_sums.txt
+    session_id, (fresh, stale, dense_client) = start_aggregation(make_session)
+    base, manifest = flatten_parameters(GLOBAL_PARAMETERS)
+    dense = {"weights": [[0.0, 1.0, 2.0], [3.0, 4.0]], "bias": [1.5]}
+    with Session(database) as db:
+        save_client_update(db, session_id, 3, fresh, encode_sparse_delta([1, 4], [0.5, -0.5], manifest, 2, dtype="<f8"))
+        # trained from the previous global model, it raced the aggregation of version 2
+        save_client_update(db, session_id, 3, stale, encode_sparse_delta([0], [100.0], manifest, 1, dtype="<f8"))
+        save_client_update(db, session_id, 3, dense_client, encode_parameters(dense))
+
+    global_parameters = FederatedLearning().aggregate_weights_fedAvg_Neural(session_id)
+
+    sparse_client = base.copy()
+    sparse_client[[1, 4]] += [0.5, -0.5]
+    expected = (sparse_client + flatten_parameters(dense)[0]) / 2
+    np.testing.assert_allclose(flatten_parameters(global_parameters)[0], expected, rtol=1e-12)
+    with Session(database) as db:
+        assert db.query(FederatedSession.global_version).filter_by(id=session_id).scalar() == 3
+
+
+def test_round_without_usable_updates_is_reopened(make_session, database):
+    from helpers.federated_learning import reopen_round
+
+    session_id, (first, second, _) = start_aggregation(make_session)
+    with Session(database) as db:
+        db.query(FederatedSession).filter_by(id=session_id).update({"round_clients": [first, second]})
+        db.commit()
+    _, manifest = flatten_parameters(GLOBAL_PARAMETERS)
+    with Session(database) as db:
+        for user_id in (first, second):
+            save_client_update(db, session_id, 3, user_id, encode_sparse_delta([0], [1.0], manifest, 1, dtype="<f8"))
+
+    # nothing is aggregated or tested, the session is not aborted
+    assert aggregate_and_test_round(session_id, MODEL_INFO, ["accuracy"]) == (False, None)
+    with Session(database) as db:
+        session = db.query(FederatedSession).filter_by(id=session_id).one()
+        assert session.global_version == 2
+        assert json.loads(session.global_parameters) == GLOBAL_PARAMETERS
+
+    reopen_round(session_id, 3)
+
+    with Session(database) as db:
+        session = db.query(FederatedSession).filter_by(id=session_id).one()
+        assert session.phase == SessionPhase.TRAINING
+        assert session.curr_round == 3
+        # the same clients are signalled again, against a new deadline
+        assert session.round_clients == [first, second]
+        assert session.round_started_at is not None
+        assert db.query(ClientUpdate).filter_by(session_id=session_id).count() == 0
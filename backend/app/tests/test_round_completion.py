@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from models.FederatedSession import FederatedSession, FederatedSessionClient, SessionPhase
+from utility.round_completion import LATE_UPDATES_CARRY, LATE_UPDATES_DISCARD, RoundSettings, record_round_arrival, record_round_missed, round_settings
+
+
+def round_info(**training_config):
+    return {"model_name": "CNN", "training_config": training_config}
+
+
+def test_round_settings_defaults():
+    assert round_settings({}) == RoundSettings(None, 1.0, LATE_UPDATES_DISCARD)
+    assert round_settings(round_info(round_deadline="")).deadline is None
+
+
+def test_round_settings_parsing():
+    settings = round_settings(round_info(round_deadline="30", min_quorum="0.5", late_updates=LATE_UPDATES_CARRY))
+    assert settings == RoundSettings(30.0, 0.5, LATE_UPDATES_CARRY)
+
+
+@pytest.mark.parametrize("training_config", [
+    {"round_deadline": 0},
+    {"round_deadline": -5},
+    {"min_quorum": 0},
+    {"min_quorum": 1.5},
+    {"late_updates": "keep"},
+])
+def test_round_settings_reject_invalid_options(training_config):
+    with pytest.raises(ValueError):
+        round_settings(round_info(**training_config))
+
+
+def test_quorum_needs_at_least_one_update():
+    assert RoundSettings(10.0, 0.5, LATE_UPDATES_DISCARD).quorum(5) == 3
+    assert RoundSettings(10.0, 0.1, LATE_UPDATES_DISCARD).quorum(3) == 1
+    assert RoundSettings(10.0, 1.0, LATE_UPDATES_DISCARD).quorum(4) == 4
+    # nobody selected or every client dropped, the round still waits for an update
+    assert RoundSettings(10.0, 0.5, LATE_UPDATES_DISCARD).quorum(0) == 1
+
+
+def test_arrival_replaces_a_missed_entry():
+    client = SimpleNamespace(round_history=None)
+    record_round_missed(client, 1)
+    started = datetime(2024, 1, 1, 12, 0, 0)
+    record_round_arrival(client, 1, started, late=True, now=started + timedelta(seconds=42))
+    record_round_missed(client, 1)
+
+    assert client.round_history == [{"round": 1, "seconds": 42.0, "late": True, "missed": False}]
+
+
+@pytest.fixture
+def place_update(make_session, database):
+    """place_round_update of one client's upload, with the session in a given round / phase"""
+    from helpers.federated_learning import place_round_update
+
+    def place(upload_round=None, curr_round=2, max_round=3, phase=SessionPhase.TRAINING, **training_config):
+        session_id, (user_id,) = make_session(
+            round_info(**training_config), curr_round=curr_round, max_round=max_round, phase=phase,
+            round_started_at=datetime.now() - timedelta(seconds=5),
+        )
+        with Session(database) as db:
+            session_data = db.query(FederatedSession).filter_by(id=session_id).one()
+            upload = SimpleNamespace(round=upload_round)
+            try:
+                return place_round_update(db, session_data, upload, user_id)
+            finally:
+                place.history = db.query(FederatedSessionClient.round_history).filter_by(user_id=user_id).scalar()
+
+    return place
+
+
+def test_upload_is_stored_for_the_current_round(place_update):
+    assert place_update() == 2
+    (entry,) = place_update.history
+    assert entry["round"] == 2 and not entry["late"] and entry["seconds"] >= 5
+
+
+def test_upload_for_a_future_round_is_rejected(place_update):
+    with pytest.raises(HTTPException) as error:
+        place_update(upload_round=3)
+    assert error.value.status_code == 409
+    assert place_update.history is None
+
+
+def test_late_upload_is_discarded_but_recorded(place_update):
+    with pytest.raises(HTTPException) as error:
+        place_update(phase=SessionPhase.AGGREGATING)
+    assert error.value.status_code == 409
+    (entry,) = place_update.history
+    assert entry["round"] == 2 and entry["late"] and not entry["missed"]
+
+
+def test_late_upload_is_carried_to_the_next_round(place_update):
+    # the round closed while the client was uploading
+    assert place_update(phase=SessionPhase.AGGREGATING, late_updates=LATE_UPDATES_CARRY) == 3
+    # an upload naming an earlier round goes to the round in progress
+    assert place_update(upload_round=1, late_updates=LATE_UPDATES_CARRY) == 2
+    (entry,) = place_update.history
+    assert entry == {"round": 1, "seconds": None, "late": True, "missed": False}
+
+
+def test_late_upload_after_the_last_round_is_discarded(place_update):
+    with pytest.raises(HTTPException) as error:
+        place_update(curr_round=3, phase=SessionPhase.AGGREGATING, late_updates=LATE_UPDATES_CARRY)
+    assert error.value.status_code == 409
@@ -0,0 +1,27 @@
+import asyncio
+import os
+
+from helpers import round_executor
+
+
+def crash_once(marker):
+    """Kills its worker process the first time, like an OOM kill during a round"""
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return os.getpid()
+
+
+def test_broken_pool_is_replaced_and_task_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(round_executor, "ROUND_WORKERS", 1)
+    monkeypatch.setattr(round_executor, "_executor", None)
+    try:
+        marker = str(tmp_path / "crashed")
+        first_pool = round_executor.get_round_executor()
+
+        assert asyncio.run(round_executor.run_round_task(crash_once, marker)) != os.getpid()
+        assert round_executor.get_round_executor() is not first_pool
+        # the new pool keeps serving later rounds
+        assert asyncio.run(round_executor.run_round_task(crash_once, marker)) != os.getpid()
+    finally:
+        round_executor.shutdown_round_executor()
@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+import helpers.federated_learning as federated_learning
+from helpers.scheduler import SessionScheduler
+from models.FederatedSession import FederatedSession, SessionPhase
+
+SESSION_INFO = {"model_name": "LinearRegression", "model_info": {"test_metrics": ["mse"]}, "training_config": {}}
+
+
+@pytest.fixture
+def phases(database, tmp_path, monkeypatch):
+    """Replaces the waits on the clients and the aggregation, records what the round loop runs"""
+    monkeypatch.chdir(tmp_path)  # Test writes Global_test_results/
+    calls = []
+
+    def waiting(name):
+        async def wait(federated_manager, session_id, *args):
+            calls.append((name, current(database, session_id).curr_round))
+        return wait
+
+    async def run_round_task(fn, session_id, *args):
+        session = current(database, session_id)
+        calls.append(("aggregate", session.curr_round, session.phase))
+        return True, {"mse": 1.0}
+
+    for name in ("wait_for_price_confirmation", "wait_for_client_confirmation", "send_model_configs_and_wait_for_confirmation"):
+        monkeypatch.setattr(federated_learning, name, waiting(name))
+    monkeypatch.setattr(federated_learning, "send_training_signal_and_wait_for_clients_training", waiting("train"))
+    monkeypatch.setattr(federated_learning, "run_round_task", run_round_task)
+    return calls
+
+
+def current(database, session_id):
+    with Session(database) as db:
+        return db.query(FederatedSession).filter_by(id=session_id).one()
+
+
+def orphaned_session(make_session, **columns):
+    """A session whose worker died: its lease expired a minute ago"""
+    return make_session(
+        SESSION_INFO, client_statuses=(4, 4),
+        lease_owner="dead-worker", lease_expires_at=datetime.now() - timedelta(minutes=1), **columns,
+    )[0]
+
+
+async def claim_and_run(scheduler):
+    scheduler.claim_available_sessions()
+    tasks = list(scheduler.tasks.values())
+    await asyncio.wait_for(asyncio.gather(*tasks), 5)
+    return tasks
+
+
+def test_expired_lease_resumes_a_closed_round_by_aggregating_it(make_session, database, phases):
+    session_id = orphaned_session(make_session, phase=SessionPhase.AGGREGATING, curr_round=2, max_round=3)
+    scheduler = SessionScheduler(None, lease_seconds=60)
+
+    tasks = asyncio.run(claim_and_run(scheduler))
+
+    assert len(tasks) == 1
+    # round 2 was closed before the worker died: no new training signal, only its aggregation
+    assert phases == [
+        ("aggregate", 2, SessionPhase.AGGREGATING),
+        ("train", 3), ("aggregate", 3, SessionPhase.AGGREGATING),
+    ]
+    session = current(database, session_id)
+    assert session.phase == SessionPhase.COMPLETED and session.curr_round == 3
+    assert session.lease_owner is None
+
+
+def test_expired_lease_resumes_at_the_committed_setup_phase(make_session, database, phases):
+    session_id = orphaned_session(make_session, phase=SessionPhase.CONFIGURING, curr_round=1, max_round=1)
+
+    asyncio.run(claim_and_run(SessionScheduler(None, lease_seconds=60)))
+
+    # pricing and recruiting were committed before, they are not run again
+    assert phases == [("send_model_configs_and_wait_for_confirmation", 1), ("train", 1), ("aggregate", 1, SessionPhase.AGGREGATING)]
+    assert current(database, session_id).phase == SessionPhase.COMPLETED
+
+
+def test_live_lease_is_not_claimed_and_a_lost_lease_stops_the_loop(make_session, database):
+    session_id, _ = make_session(SESSION_INFO, phase=SessionPhase.TRAINING)
+    first = SessionScheduler(None, lease_seconds=0.3)
+    second = SessionScheduler(None, lease_seconds=60)
+
+    assert first.claim(session_id)
+    assert not second.claim(session_id)
+    # the heartbeat renews the lease of its owner
+    assert first.claim(session_id)
+
+    async def run():
+        round_loop = asyncio.create_task(asyncio.sleep(10))
+        # first stops heartbeating long enough for its lease to expire, second takes over
+        await asyncio.sleep(0.35)
+        assert second.claim(session_id)
+        await asyncio.wait_for(first.heartbeat(session_id, round_loop), 2)
+        await asyncio.sleep(0)
+        return round_loop.cancelled()
+
+    assert asyncio.run(run())
+    assert current(database, session_id).lease_owner == second.worker_id
+
+    # only the owner can release
+    first.release(session_id)
+    assert current(database, session_id).lease_owner == second.worker_id
+    second.release(session_id)
+    assert current(database, session_id).lease_owner is None
+
+
+def test_finished_sessions_are_not_claimed(make_session, database):
+    session_id, _ = make_session(SESSION_INFO, phase=SessionPhase.COMPLETED)
+    assert not SessionScheduler(None).claim(session_id)
@@ -0,0 +1,135 @@
+import json
+
+import numpy as np
+import pytest
+from sqlalchemy.orm import Session
+
+from models.FederatedSession import FederatedSession
+from utility.FederatedLearning import FederatedLearning
+from utility.client_updates import save_client_update
+from utility.server_optimizers import FedAdam, FedAvgM, FedYogi, server_optimizer_from_config, step_committed
+from utility.tensor_codec import encode_parameters
+
+
+def optimizer_info(**training_config):
+    return {"model_name": "CNN", "training_config": training_config}
+
+
+def test_fedavgm_accumulates_momentum():
+    optimizer = FedAvgM(lr=0.5, momentum=0.9)
+    global_buffer = np.array([1.0, -2.0, 0.0])
+    first, second = np.array([0.2, 0.0, -1.0]), np.array([-0.4, 1.0, 0.5])
+
+    after_first = optimizer.step(global_buffer, global_buffer + first)
+    np.testing.assert_allclose(after_first, global_buffer + 0.5 * first)
+    after_second = optimizer.step(after_first, after_first + second)
+    np.testing.assert_allclose(after_second, after_first + 0.5 * (0.9 * first + second))
+
+
+def test_fedavgm_without_momentum_is_fedavg():
+    optimizer = FedAvgM(lr=1.0, momentum=0.0)
+    average = np.array([3.0, 4.0])
+    np.testing.assert_allclose(optimizer.step(np.array([1.0, 1.0]), average), average)
+    np.testing.assert_allclose(optimizer.step(average, np.array([0.0, 2.0])), [0.0, 2.0])
+
+
+def reference_adam(global_buffer, pseudo_gradients, lr, beta1, beta2, tau, yogi=False):
+    m = np.zeros_like(global_buffer)
+    v = np.zeros_like(global_buffer)
+    for delta in pseudo_gradients:
+        m = beta1 * m + (1 - beta1) * delta
+        if yogi:
+            v = v - (1 - beta2) * delta ** 2 * np.sign(v - delta ** 2)
+        else:
+            v = beta2 * v + (1 - beta2) * delta ** 2
+        global_buffer = global_buffer + lr * m / (np.sqrt(v) + tau)
+    return global_buffer
+
+
+@pytest.mark.parametrize("optimizer_class, yogi", [(FedAdam, False), (FedYogi, True)])
+def test_adaptive_optimizers_match_the_update_rule(optimizer_class, yogi):
+    rng = np.random.default_rng(0)
+    start = rng.normal(size=6)
+    pseudo_gradients = [rng.normal(scale=0.1, size=6) for _ in range(4)]
+
+    optimizer = optimizer_class(lr=0.05, beta1=0.9, beta2=0.99, tau=1e-3)
+    global_buffer = start
+    for delta in pseudo_gradients:
+        global_buffer = optimizer.step(global_buffer, global_buffer + delta)
+
+    expected = reference_adam(start, pseudo_gradients, 0.05, 0.9, 0.99, 1e-3, yogi)
+    np.testing.assert_allclose(global_buffer, expected, rtol=1e-12)
+    assert optimizer.step_count == 4
+
+
+@pytest.mark.parametrize("optimizer_class", [FedAvgM, FedAdam, FedYogi])
+def test_saved_state_continues_the_optimization(optimizer_class):
+    rng = np.random.default_rng(1)
+    steps = [rng.normal(scale=0.1, size=5) for _ in range(4)]
+
+    uninterrupted = optimizer_class()
+    global_buffer = np.zeros(5)
+    for delta in steps:
+        global_buffer = uninterrupted.step(global_buffer, global_buffer + delta)
+
+    # every round loads the state the previous round stored
+    state, resumed_buffer = None, np.zeros(5)
+    for round, delta in enumerate(steps, start=1):
+        optimizer = optimizer_class()
+        optimizer.load_state(state)
+        resumed_buffer = optimizer.step(resumed_buffer, resumed_buffer + delta)
+        state = optimizer.encode_state(round, round + 1)
+
+    np.testing.assert_array_equal(resumed_buffer, global_buffer)
+    assert step_committed(state, 4, 5)
+    assert not step_committed(state, 5, 5)
+    assert not step_committed(state, 4, 6)
+    assert not step_committed(None, 4, 5)
+
+
+def test_server_optimizer_from_config():
+    assert server_optimizer_from_config(optimizer_info()) is None
+    optimizer = server_optimizer_from_config(optimizer_info(server_optimizer="fedavgm", server_momentum="0.5"))
+    assert isinstance(optimizer, FedAvgM) and optimizer.lr == 1.0 and optimizer.momentum == 0.5
+    optimizer = server_optimizer_from_config(optimizer_info(server_optimizer="fedyogi", server_tau="0.01"))
+    assert isinstance(optimizer, FedYogi) and optimizer.lr == 0.01 and optimizer.tau == 0.01
+
+
+@pytest.mark.parametrize("training_config", [
+    {"server_optimizer": "sgd"},
+    {"server_optimizer": "fedadam", "server_lr": 0},
+    {"server_optimizer": "fedavgm", "server_momentum": 1},
+    {"server_optimizer": "fedadam", "server_beta2": 1.5},
+    {"server_optimizer": "fedyogi", "server_tau": 0},
+    {"server_optimizer": "fedavgm", "aggregation": "fedbuff"},
+])
+def test_invalid_server_optimizer_options_are_rejected(training_config):
+    with pytest.raises(ValueError):
+        server_optimizer_from_config(optimizer_info(**training_config))
+
+
+def test_round_aggregated_twice_is_stepped_once(make_session, database, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # the aggregation appends to aggregated_sums.txt
+    global_parameters = {"w": [1.0, 2.0, 3.0], "b": [0.0]}
+    session_id, clients = make_session(
+        optimizer_info(server_optimizer="fedavgm", server_lr=1.0, server_momentum=0.9), client_statuses=(4, 4),
+        global_parameters=json.dumps(global_parameters), global_version=4, curr_round=2,
+    )
+    with Session(database) as db:
+        save_client_update(db, session_id, 2, clients[0], encode_parameters({"w": [2.0, 2.0, 3.0], "b": [1.0]}))
+        save_client_update(db, session_id, 2, clients[1], encode_parameters({"w": [2.0, 4.0, 3.0], "b": [-1.0]}))
+
+    first = FederatedLearning().aggregate_weights_fedAvg_Neural(session_id)
+    assert first == {"w": [2.0, 3.0, 3.0], "b": [0.0]}
+    with Session(database) as db:
+        state = db.query(FederatedSession.optimizer_state).filter_by(id=session_id).scalar()
+
+    # the worker lost its lease after the commit, another one aggregates the round again
+    second = FederatedLearning().aggregate_weights_fedAvg_Neural(session_id)
+
+    assert second == first
+    with Session(database) as db:
+        session = db.query(FederatedSession).filter_by(id=session_id).one()
+        assert session.global_version == 5
+        assert session.optimizer_state == state
+        assert json.loads(session.global_parameters) == first
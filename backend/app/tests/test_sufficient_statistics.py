@@ -0,0 +1,105 @@
+import json
+
+import numpy as np
+import pytest
+from sqlalchemy.orm import Session
+
+from models.FederatedSession import FederatedSession
+from utility.CustomModels.LinearRegression import LinearRegression
+from utility.FederatedLearning import FederatedLearning
+from utility.client_updates import save_client_update
+from utility.tensor_codec import encode_parameters
+
+
+def regression_data(seed=0, rows=300, features=4):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, features))
+    Y = X @ rng.normal(size=features) + 1.5 + rng.normal(scale=0.1, size=rows)
+    return X, Y
+
+
+def client_statistics(X, Y, clients=3, chunk_rows=4096):
+    model = LinearRegression({"chunk_rows": chunk_rows})
+    return [model.sufficient_statistics(X_part, Y_part) for X_part, Y_part in zip(np.array_split(X, clients), np.array_split(Y, clients))]
+
+
+def summed(statistics):
+    return {key: np.sum([np.asarray(entry[key], dtype=np.float64) for entry in statistics], axis=0) for key in ("xtx", "xty", "n")}
+
+
+def least_squares(X, Y):
+    A = np.hstack([X, np.ones((len(X), 1))])
+    theta = np.linalg.lstsq(A, Y, rcond=None)[0]
+    return theta[:-1], theta[-1]
+
+
+def ridge_fit(X, Y, ridge):
+    # min mean((Y - X m - c)^2) + ridge ||m||^2, the intercept is not penalized
+    X_mean, Y_mean = X.mean(axis=0), Y.mean()
+    Xc = X - X_mean
+    m = np.linalg.solve(Xc.T @ Xc + len(X) * ridge * np.eye(X.shape[1]), Xc.T @ (Y - Y_mean))
+    return m, Y_mean - X_mean @ m
+
+
+def test_summed_statistics_match_the_centralized_fit():
+    X, Y = regression_data()
+    # clients stream their data in chunks, the statistics do not depend on it
+    parameters = LinearRegression.solve_sufficient_statistics(summed(client_statistics(X, Y, chunk_rows=7)))
+
+    m, c = least_squares(X, Y)
+    np.testing.assert_allclose(parameters["m"], m, rtol=1e-10)
+    assert parameters["c"][0] == pytest.approx(c, rel=1e-10)
+
+
+def test_ridge_leaves_the_intercept_unpenalized():
+    X, Y = regression_data(1)
+    parameters = LinearRegression.solve_sufficient_statistics(summed(client_statistics(X, Y, clients=4)), ridge=0.5)
+
+    m, c = ridge_fit(X, Y, 0.5)
+    np.testing.assert_allclose(parameters["m"], m, rtol=1e-10)
+    assert parameters["c"][0] == pytest.approx(c, rel=1e-10)
+    assert np.linalg.norm(parameters["m"]) < np.linalg.norm(least_squares(X, Y)[0])
+
+
+def test_collinear_features():
+    X, Y = regression_data(2, features=3)
+    X = np.hstack([X, X[:, :1]])  # the last feature duplicates the first one
+    statistics = summed(client_statistics(X, Y))
+
+    # singular without ridge: the least norm solution, like lstsq on the centralized data
+    parameters = LinearRegression.solve_sufficient_statistics(statistics)
+    m, c = least_squares(X, Y)
+    np.testing.assert_allclose(parameters["m"], m, rtol=1e-8, atol=1e-10)
+    assert parameters["c"][0] == pytest.approx(c, rel=1e-8)
+    assert parameters["m"][0] == pytest.approx(parameters["m"][3], rel=1e-8)
+
+    # ridge makes the system regular
+    parameters = LinearRegression.solve_sufficient_statistics(statistics, ridge=0.1)
+    m, c = ridge_fit(X, Y, 0.1)
+    np.testing.assert_allclose(parameters["m"], m, rtol=1e-8)
+    assert parameters["c"][0] == pytest.approx(c, rel=1e-8)
+
+
+@pytest.mark.parametrize("ridge", [0.0, 0.2])
+def test_session_aggregation_solves_the_uploaded_statistics(make_session, database, ridge):
+    X, Y = regression_data(3)
+    info = {"model_name": "LinearRegression", "training_config": {"aggregation": "sufficient_statistics", "ridge": ridge}}
+    session_id, clients = make_session(info, client_statuses=(4, 4, 4), global_version=0, curr_round=1)
+    with Session(database) as db:
+        for user_id, statistics in zip(clients, client_statistics(X, Y)):
+            save_client_update(db, session_id, 1, user_id, encode_parameters(statistics, dtype=np.float64))
+
+    parameters = FederatedLearning().aggregate_sufficient_statistics(session_id)
+
+    m, c = ridge_fit(X, Y, ridge) if ridge else least_squares(X, Y)
+    np.testing.assert_allclose(parameters["m"], m, rtol=1e-8)
+    assert parameters["c"][0] == pytest.approx(c, rel=1e-8)
+    with Session(database) as db:
+        session = db.query(FederatedSession).filter_by(id=session_id).one()
+        assert json.loads(session.global_parameters) == parameters
+        assert session.global_version == 1
+
+
+def test_session_aggregation_without_statistics(make_session):
+    session_id, _ = make_session({"model_name": "LinearRegression"}, global_version=0, curr_round=1)
+    assert FederatedLearning().aggregate_sufficient_statistics(session_id) is None
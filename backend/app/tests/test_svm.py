@@ -0,0 +1,46 @@
+import numpy as np
+
+from utility.CustomModels.CustomSVM import CustomSVM
+
+
+def per_sample_fit_binary(X, y, C, lr, n_iters):
+    """The former CustomSVM.fit_binary loop"""
+    weights = np.zeros(X.shape[1])
+    bias = 0
+    binary_y = np.where(y == 1, 1, -1)
+    for _ in range(n_iters):
+        for idx, x in enumerate(X):
+            if binary_y[idx] * (np.dot(x, weights) + bias) < 1:
+                weights += lr * (binary_y[idx] * x - 2 * C * weights)
+                bias += lr * binary_y[idx]
+            else:
+                weights += lr * (-2 * C * weights)
+    return weights, bias
+
+
+def binary_data(seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(60, 4))
+    y = (X @ np.array([1.0, -2.0, 0.5, 0.0]) > 0).astype(np.float64)
+    return X, y
+
+
+def test_default_config_trains_like_the_per_sample_loop():
+    X, y = binary_data()
+    model = CustomSVM({"C": 0.1, "lr": 0.01, "n_iters": 5, "weights_shape": "None", "is_binary": "true"})
+    model.fit(X, y)
+
+    weights, bias = per_sample_fit_binary(X, y, C=0.1, lr=0.01, n_iters=5)
+    np.testing.assert_allclose(np.ravel(model.weights), weights, rtol=1e-10, atol=1e-12)
+    np.testing.assert_allclose(np.ravel(model.biases), bias, rtol=1e-10, atol=1e-12)
+
+
+def test_larger_batches_are_opt_in():
+    X, y = binary_data(1)
+    config = {"C": 0.1, "lr": 0.05, "n_iters": 20, "weights_shape": "None", "is_binary": "true"}
+    assert CustomSVM(config).batch_size == 1
+
+    model = CustomSVM({**config, "batch_size": "16"})
+    assert model.batch_size == 16
+    model.fit(X, y)
+    assert np.mean(model.predict(X) == y) > 0.9
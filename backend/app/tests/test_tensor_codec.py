@@ -0,0 +1,73 @@
+import json
+import numpy as np
+import pytest
+
+from utility.parameters import flatten_parameters
+from utility.tensor_codec import (
+    decode_flat, decode_parameters, decode_update, encode_flat, encode_parameters, encode_sparse_delta
+)
+
+
+def mixed_parameters(rng, dtype):
+    return {
+        "weights": [
+            [rng.normal(size=(3, 3, 1, 4)).astype(dtype), rng.normal(size=(4,)).astype(dtype)],
+            [rng.normal(size=(36, 10)).astype(dtype), rng.normal(size=(10,)).astype(dtype)],
+        ],
+        "c": np.array([1e-310, -0.0, np.finfo(dtype).max], dtype=dtype),
+    }
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_binary_round_trip_is_bit_exact(dtype):
+    parameters = mixed_parameters(np.random.default_rng(0), dtype)
+    expected, expected_manifest = flatten_parameters(parameters, dtype)
+
+    payload = encode_parameters(parameters, {"session_id": 7, "is_first": 0}, dtype=None)
+    buffer, manifest, metadata = decode_flat(payload)
+
+    assert manifest == expected_manifest
+    assert buffer.dtype == np.dtype(dtype)
+    assert buffer.tobytes() == expected.tobytes()
+    assert metadata == {"session_id": 7, "is_first": 0}
+
+
+def test_binary_matches_json_parameters():
+    """The nested lists of the binary transport equal those the JSON transport carries"""
+    parameters = mixed_parameters(np.random.default_rng(1), np.float64)
+    as_json = json.loads(json.dumps({
+        "weights": [[kernel.tolist(), bias.tolist()] for kernel, bias in parameters["weights"]],
+        "c": parameters["c"].tolist(),
+    }))
+
+    decoded, _ = decode_parameters(encode_parameters(as_json))
+    assert decoded == as_json
+
+
+@pytest.mark.parametrize("codec, tolerance", [("float16", 1e-3), ("int8", 1e-2)])
+def test_compressed_codecs_stay_close(codec, tolerance):
+    buffer, manifest = flatten_parameters(mixed_parameters(np.random.default_rng(2), np.float64)["weights"])
+    decoded, decoded_manifest, _ = decode_flat(encode_flat(buffer, manifest, codec=codec))
+
+    assert decoded_manifest == manifest
+    np.testing.assert_allclose(decoded, buffer, atol=tolerance * np.abs(buffer).max())
+
+
+def test_sparse_delta_round_trip():
+    buffer, manifest = flatten_parameters(mixed_parameters(np.random.default_rng(3), np.float32)["weights"])
+    indices = np.array([5, 1, 300])
+    values = np.array([0.5, -1.25, 3.0], dtype=np.float32)
+
+    delta, decoded_manifest, metadata = decode_update(encode_sparse_delta(indices, values, manifest, base_version=4))
+    assert decoded_manifest == manifest
+    assert metadata["base_version"] == 4
+    assert delta.indices.tolist() == [1, 5, 300]
+    assert delta.values.tolist() == [-1.25, 0.5, 3.0]
+    with pytest.raises(ValueError):
+        decode_flat(encode_sparse_delta(indices, values, manifest, base_version=4))
+
+
+def test_truncated_payload_is_rejected():
+    payload = encode_parameters({"w": [1.0, 2.0, 3.0]})
+    with pytest.raises(ValueError):
+        decode_flat(payload[:-1])
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from utility.parameters import flatten_parameters, unflatten_parameters
+from utility.tensor_codec import decode_flat, decode_update, encode_flat
+from utility.update_compression import ErrorFeedbackCompressor, TopKDeltaCompressor
+
+
+def client_parameters(rng):
+    return {"weights": [rng.normal(size=(8, 5)), rng.normal(size=(5,))], "bias": rng.normal(size=(3,))}
+
+
+@pytest.mark.parametrize("codec", ["float16", "int8"])
+def test_residual_is_carried_to_the_next_upload(codec):
+    rng = np.random.default_rng(0)
+    compressor = ErrorFeedbackCompressor(codec)
+    first, second = client_parameters(rng), client_parameters(rng)
+    first_buffer, manifest = flatten_parameters(first)
+    second_buffer, _ = flatten_parameters(second)
+
+    first_decoded, _, _ = decode_flat(compressor.encode(first))
+    np.testing.assert_allclose(compressor.residual, first_buffer - first_decoded, rtol=0, atol=1e-15)
+    assert np.abs(compressor.residual).max() > 0
+    residual = compressor.residual.copy()
+
+    # the second upload quantizes the parameters plus what the first one left out
+    second_decoded, _, _ = decode_flat(compressor.encode(second))
+    expected, _, _ = decode_flat(encode_flat(second_buffer + residual, manifest, codec=codec))
+    np.testing.assert_array_equal(second_decoded, expected)
+    np.testing.assert_allclose(second_decoded + compressor.residual, second_buffer + residual, rtol=0, atol=1e-14)
+
+
+@pytest.mark.parametrize("codec", ["float16", "int8"])
+def test_error_feedback_sum_converges_to_the_uncompressed_sum(codec):
+    rng = np.random.default_rng(1)
+    compressor = ErrorFeedbackCompressor(codec)
+    uploads = [client_parameters(rng) for _ in range(40)]
+
+    exact_sum, feedback_sum, plain_sum = 0.0, 0.0, 0.0
+    errors = []
+    for rounds, parameters in enumerate(uploads, start=1):
+        buffer, manifest = flatten_parameters(parameters)
+        exact_sum = exact_sum + buffer
+        # float16 uploads decode to float32, the server aggregates in float64
+        feedback_sum = feedback_sum + decode_flat(compressor.encode(parameters))[0].astype(np.float64)
+        plain_sum = plain_sum + decode_flat(encode_flat(buffer, manifest, codec=codec))[0].astype(np.float64)
+        errors.append(np.abs(feedback_sum - exact_sum).max() / rounds)
+
+    # the error of the summed uploads is only the last residual, it does not grow with the rounds
+    np.testing.assert_allclose(feedback_sum + compressor.residual, exact_sum, rtol=0, atol=1e-12)
+    assert np.abs(feedback_sum - exact_sum).max() < np.abs(plain_sum - exact_sum).max()
+    # so the error of the mean upload goes to zero
+    assert errors[-1] < errors[0] / 10
+
+
+def test_residual_is_reset_for_another_model():
+    rng = np.random.default_rng(2)
+    compressor = ErrorFeedbackCompressor("int8")
+    compressor.encode(client_parameters(rng))
+
+    other = {"w": rng.normal(size=(4,))}
+    decoded, _, _ = decode_flat(compressor.encode(other))
+    expected, _, _ = decode_flat(encode_flat(other["w"], flatten_parameters(other)[1], codec="int8"))
+    np.testing.assert_array_equal(decoded, expected)
+
+    compressor.reset()
+    assert compressor.residual is None
+
+
+def test_top_k_deltas_send_the_left_out_changes_later():
+    rng = np.random.default_rng(3)
+    base = client_parameters(rng)
+    base_buffer, manifest = flatten_parameters(base)
+    change = rng.choice([-1.0, 1.0], size=base_buffer.size) * rng.uniform(0.05, 0.1, size=base_buffer.size)
+    compressor = TopKDeltaCompressor(top_k=0.1)
+
+    # every round the client moves the model by the same change, only 10% of it is uploaded
+    sent = np.zeros_like(base_buffer)
+    ever_sent = np.zeros(base_buffer.size, dtype=bool)
+    for rounds in range(1, 31):
+        payload = compressor.encode(unflatten_parameters(base_buffer + change, manifest), base, base_version=5)
+        delta, _, metadata = decode_update(payload)
+        assert delta.indices.size == round(0.1 * base_buffer.size)
+        sent[delta.indices] += delta.values
+        ever_sent[delta.indices] = True
+        # what was sent so far plus the residual is always the total change
+        np.testing.assert_allclose(sent + compressor.residual, rounds * change, rtol=0, atol=1e-5)
+
+    assert metadata["base_version"] == 5
+    # the small changes grow in the residual until they are sent as well
+    assert ever_sent.all()
@@ -1,6 +1,8 @@
 import numpy as np
 import warnings
 import ast
+from .DataSource import as_data_source
+from .SVMTrainer import SVMTrainer, fit_binary_svm, fit_one_vs_rest_svm
 
 """
 (i) This implementation of the Support Vector Machine (SVM) algorithm implements Linear SVM (both binary and Multi-class)
@@ -30,67 +32,47 @@ class CustomSVM:
             self.biases = None
             self.lr = float(config.get('lr', 0.01))
             self.n_iters = int(config.get('n_iters', 100))
+            # mini-batch SGD options, the default batch_size 1 without shuffling is the plain per-sample SGD
+            self.batch_size = int(config.get('batch_size', 1))
+            self.shuffle = str(config.get('shuffle', 'false')).lower() == 'true'
+            self.seed = int(config['seed']) if config.get('seed') not in (None, '') else None
+            # rows per chunk when streaming memory-mapped / file training data
+            self.chunk_rows = int(config.get('chunk_rows', 4096))
             self.weights_shape = ast.literal_eval(config['weights_shape'])
             #required as each client may have different number of classes (possibly 1)
             self.is_binary = config['is_binary'].lower() == "true"
             # weight shape is required initially for the same reason as above
             if self.weights_shape is not None:
                 self.weights = np.zeros(self.weights_shape)
-                self.biases = np.zeros(self.weights_shape)
+                self.biases = np.zeros(self.weights_shape[0])
         except Exception as e:
             print(f"Error creating model instance: {e}")
             return None
 
-    def fit_binary(self, X, y):
+    def fit_binary(self, X, y=None):
         self.is_binary = True
-        n_samples, n_features = X.shape
-        weights = np.zeros(n_features)
-        bias = 0
-        lr = self.lr
-        n_iters = self.n_iters
-        binary_y = np.where(y == 1, 1, -1)
-        for epoch in range(n_iters):
-            for idx, x in enumerate(X):
-                decision = np.dot(x, weights) + bias
-                if binary_y[idx] * decision < 1:
-                    weights += lr * (binary_y[idx] * x - 2 * self.C * weights)
-                    bias += lr * binary_y[idx]
-                else:
-                    weights += lr * (-2 * self.C * weights)
-        self.weights = weights
-        self.biases = bias
-
-    def fit(self, X, y):
-        n_samples, n_features = X.shape
-        classes = np.unique(y)
-        n_classes = len(np.unique(y))
+        source = as_data_source(X, y, self.chunk_rows)
+        self.weights, self.biases = fit_binary_svm(self.trainer(), source, source.n_features, None)
+
+    def fit(self, X, y=None):
+        """X, y are arrays or any training data source, see DataSource.py"""
+        source = as_data_source(X, y, self.chunk_rows)
+        n_features = source.n_features
+        classes = source.unique_labels()
+        n_classes = len(classes)
         if self.weights is None and (n_classes == 2 or self.is_binary):
-            self.fit_binary(X, y)
+            self.fit_binary(source)
             return
 
         if self.weights is None and self.biases is None:
             self.weights = np.zeros((n_classes, n_features))
             self.biases = np.zeros(n_classes)
-        # print("weights shape", self.weights.shape)
-        for i in classes: #*** 'i' can be float due to numpy
-            i = int(i)
-            binary_y = np.where(y == i, 1, -1)
-            weights = self.weights[i]
-            bias = self.biases[i]
-            lr = self.lr  # Learning rate
-            n_iters = self.n_iters  # Number of n_iters
-            for _ in range(n_iters):
-                for idx, x in enumerate(X):
-                    decision = np.dot(x, weights) + bias
-                    if binary_y[idx] * decision < 1:
-                        weights += lr * (binary_y[idx] * x - 2 * self.C * weights)
-                        bias += lr * binary_y[idx]
-                    else:
-                        weights += lr * (-2 * self.C * weights)
-            self.weights[i] = weights
-            self.biases[i] = bias
+        fit_one_vs_rest_svm(self.trainer(), source, classes, self.weights, self.biases, None)
         # print("weight after fit:", self.get_weights().tolist())
 
+    def trainer(self):
+        return SVMTrainer(self.C, self.lr, self.n_iters, self.batch_size, self.shuffle, self.seed)
+
     def predict(self, X):
         if self.weights is None or self.biases is None:
             warnings.warn("Model has not been trained yet...NONE weights and biases.")
@@ -0,0 +1,172 @@
+import zipfile
+import numpy as np
+
+"""
+Training data sources for the NumPy models (LinearRegression, CustomSVM, LandMarkSVM).
+
+fit() accepts, besides in-memory X / y arrays:
+    - memory-mapped arrays (np.load(..., mmap_mode='r')) or paths to .npy files, fit(X_path, y_path)
+    - a path to an .npz archive holding the arrays 'X' and 'y', fit('data.npz')
+      (the members are streamed out of the zip, compressed or not, without loading them)
+    - a callable returning an iterable of (X, y) batches, called again for every pass
+    - a re-iterable of (X, y) batches, e.g. a list, fit(batches)
+
+Every pass over the data yields (X, y) chunks of at most `chunk_rows` rows as float arrays,
+so peak memory is bounded by the chunk size and not by the dataset size. In-memory arrays
+are one chunk, which keeps training on them exactly as before.
+"""
+
+
+class DataSource:
+    def batches(self, shuffle=False, rng=None):
+        """Yields (X, y) chunks for one pass over the data"""
+        raise NotImplementedError
+
+    def label_chunks(self):
+        for _, y in self.batches():
+            yield y
+
+    def unique_labels(self):
+        labels = np.empty(0)
+        for y in self.label_chunks():
+            labels = np.union1d(labels, y)
+        return labels
+
+    @property
+    def n_features(self):
+        for X, _ in self.batches():
+            return X.shape[1]
+        raise ValueError("Training data is empty.")
+
+
+def _as_chunk(X, y):
+    """Float64 X / flat y, arrays that already are float64 are not copied"""
+    return np.asarray(X, dtype=np.float64), np.asarray(y, dtype=np.float64).reshape(-1)
+
+
+class ArraySource(DataSource):
+    """Arrays already in memory or memory-mapped, chunk_rows None serves them as a single chunk"""
+
+    def __init__(self, X, y, chunk_rows=None):
+        if len(X) != len(y):
+            raise ValueError(f"X has {len(X)} rows but y has {len(y)}.")
+        if not isinstance(X, np.memmap) and not isinstance(y, np.memmap):
+            # converted once, the chunks of every pass are views on it instead of fresh float64 copies
+            X, y = _as_chunk(X, y)
+        self.X = X
+        self.y = y
+        self.chunk_rows = chunk_rows or max(len(X), 1)
+        # the whole data is one chunk held in memory
+        self.in_memory = self.chunk_rows >= len(X) and not isinstance(X, np.memmap)
+
+    def batches(self, shuffle=False, rng=None):
+        starts = np.arange(0, len(self.X), self.chunk_rows)
+        if shuffle and len(starts) > 1:
+            # chunk order is shuffled, rows within a chunk are shuffled by the trainer
+            starts = (rng or np.random.default_rng()).permutation(starts)
+        for start in starts:
+            yield _as_chunk(self.X[start:start + self.chunk_rows], self.y[start:start + self.chunk_rows])
+
+    def label_chunks(self):
+        for start in range(0, len(self.y), self.chunk_rows):
+            yield np.asarray(self.y[start:start + self.chunk_rows]).reshape(-1)
+
+    @property
+    def n_features(self):
+        return self.X.shape[1]
+
+
+def _read_npy_header(file):
+    version = np.lib.format.read_magic(file)
+    if version == (1, 0):
+        return np.lib.format.read_array_header_1_0(file)
+    if version == (2, 0):
+        return np.lib.format.read_array_header_2_0(file)
+    raise ValueError(f"Unsupported .npy format version {version}.")
+
+
+class NpzSource(DataSource):
+    """
+    Streams two members of an .npz archive chunk by chunk straight out of the zip file.
+    Chunks are read sequentially, with shuffle only the rows within a chunk are shuffled.
+    """
+
+    def __init__(self, path, chunk_rows=4096, x_key="X", y_key="y"):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.x_key = x_key
+        self.y_key = y_key
+        self._x_shape = self._header(x_key)[0]
+        y_rows = self._header(y_key)[0][0]
+        if self._x_shape[0] != y_rows:
+            raise ValueError(f"{x_key} has {self._x_shape[0]} rows but {y_key} has {y_rows}.")
+
+    def _header(self, key):
+        with zipfile.ZipFile(self.path) as archive, archive.open(f"{key}.npy") as file:
+            return _read_npy_header(file)
+
+    def _member_chunks(self, key):
+        with zipfile.ZipFile(self.path) as archive, archive.open(f"{key}.npy") as file:
+            shape, fortran_order, dtype = _read_npy_header(file)
+            if fortran_order or dtype.hasobject:
+                raise ValueError(f"Member {key} of {self.path} can not be streamed (Fortran order or object dtype).")
+            row_shape = shape[1:]
+            row_bytes = int(np.prod(row_shape, dtype=np.int64)) * dtype.itemsize
+            for start in range(0, shape[0], self.chunk_rows):
+                rows = min(self.chunk_rows, shape[0] - start)
+                data = file.read(rows * row_bytes)
+                yield np.frombuffer(data, dtype=dtype).reshape((rows,) + row_shape)
+
+    def batches(self, shuffle=False, rng=None):
+        for X, y in zip(self._member_chunks(self.x_key), self._member_chunks(self.y_key)):
+            yield _as_chunk(X, y)
+
+    def label_chunks(self):
+        for y in self._member_chunks(self.y_key):
+            yield y.reshape(-1)
+
+    @property
+    def n_features(self):
+        return self._x_shape[1]
+
+
+class IterableSource(DataSource):
+    def __init__(self, batches):
+        if not callable(batches) and iter(batches) is batches:
+            # a generator is used up after one pass, training needs several
+            raise ValueError("Batches must be a callable or a re-iterable collection, not a one-time iterator.")
+        self._batches = batches
+
+    def batches(self, shuffle=False, rng=None):
+        batches = self._batches() if callable(self._batches) else self._batches
+        for X, y in batches:
+            yield _as_chunk(X, y)
+
+
+def as_data_source(X, y=None, chunk_rows=4096):
+    """
+    Wraps the X / y arguments of fit() into a DataSource.
+
+    Args:
+        X: training data, or any of the sources listed in the module documentation.
+        y: labels, or a path to a .npy file with the labels when X is a .npy path.
+        chunk_rows (int): rows per chunk for memory-mapped and file sources.
+    """
+    if isinstance(X, DataSource):
+        return X
+
+    if isinstance(X, str):
+        if X.endswith(".npz"):
+            return NpzSource(X, chunk_rows)
+        X = np.load(X, mmap_mode="r")
+        if isinstance(y, str):
+            y = np.load(y, mmap_mode="r")
+        return ArraySource(X, y, chunk_rows)
+
+    if isinstance(X, np.memmap) or isinstance(y, np.memmap):
+        return ArraySource(X, y, chunk_rows)
+
+    if y is None:
+        return IterableSource(X)
+
+    return ArraySource(np.asarray(X), np.asarray(y))
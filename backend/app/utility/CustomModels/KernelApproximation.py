@@ -0,0 +1,143 @@
+import numpy as np
+
+"""
+Feature maps of LandMarkSVM.
+
+(i) transform_by_landmarks is the exact landmark path: kernel values of every point against the
+ landmarks, computed over row blocks. With RBF the distances use ||x||^2 - 2 x.l + ||l||^2.
+
+(ii) the kernel_approximation modes replace it with a fixed-size explicit feature map whose inner
+ products approximate the kernel:
+    'rff'       random Fourier features (RBF only), z(x) = sqrt(2/D) cos(x W + b), W ~ N(0, 2 gamma)
+    'nystroem'  z(x) = k(x, L) K_LL^(-1/2) with seeded landmarks L
+ Both are generated from a seed in model_info, so every client and the server's Test build the
+ identical map without exchanging data points. n_components sets the output dimension.
+"""
+
+def make_landmarks(num_landmarks, n_features, seed=0):
+    """Data independent landmarks, the same for every caller using the same seed"""
+    return np.random.default_rng(seed).standard_normal((num_landmarks, n_features))
+
+
+def _kernel_block(X, kernel, gamma, degree, coef0, landmarks, landmark_sq_norms):
+    if kernel == 'rbf':
+        sq_dists = np.sum(X ** 2, axis=1)[:, np.newaxis] - 2 * (X @ landmarks.T) + landmark_sq_norms
+        # rounding can make the distance of a point to itself slightly negative
+        np.maximum(sq_dists, 0, out=sq_dists)
+        return np.exp(-gamma * sq_dists)
+
+    elif kernel == 'linear':
+        return X @ landmarks.T
+
+    elif kernel == 'polynomial':
+        return (X @ landmarks.T + coef0) ** degree
+
+    elif kernel == 'sigmoid':
+        return np.tanh(gamma * (X @ landmarks.T) + coef0)
+
+    raise ValueError("Invalid kernel function.")
+
+
+def transform_by_landmarks(X, kernel, gamma=None, degree=None, coef0=None, landmarks=None, num_landmarks=15, seed=0, block_rows=4096):
+    """
+    Maps X (n_samples, n_features) to its kernel values against the landmarks, (n_samples, num_landmarks).
+    The rows are processed in blocks of block_rows.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    if landmarks is None:
+        landmarks = make_landmarks(num_landmarks, X.shape[1], seed)
+    landmarks = np.asarray(landmarks, dtype=np.float64)
+    if kernel not in ('rbf', 'linear', 'polynomial', 'sigmoid'):
+        raise ValueError("Invalid kernel function.")
+    gamma = _resolve_gamma(gamma, X.shape[1])
+
+    landmark_sq_norms = np.sum(landmarks ** 2, axis=1)
+    transformed_X = np.empty((X.shape[0], landmarks.shape[0]), dtype=np.float64)
+    for start in range(0, X.shape[0], block_rows):
+        end = start + block_rows
+        transformed_X[start:end] = _kernel_block(X[start:end], kernel, gamma, degree, coef0, landmarks, landmark_sq_norms)
+
+    return transformed_X
+
+
+def _resolve_gamma(gamma, n_features):
+    if gamma is None or gamma == 'auto':
+        return 1.0 / n_features
+    return float(gamma)
+
+
+class RandomFourierFeatures:
+    def __init__(self, n_components=100, gamma='auto', seed=0, block_rows=4096):
+        self.n_components = n_components
+        self.gamma = gamma
+        self.seed = seed
+        self.block_rows = block_rows
+        self.weights = None
+        self.offsets = None
+
+    def _build(self, n_features):
+        rng = np.random.default_rng(self.seed)
+        gamma = _resolve_gamma(self.gamma, n_features)
+        self.weights = rng.normal(scale=np.sqrt(2 * gamma), size=(n_features, self.n_components))
+        self.offsets = rng.uniform(0, 2 * np.pi, size=self.n_components)
+
+    def transform(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if self.weights is None or self.weights.shape[0] != X.shape[1]:
+            self._build(X.shape[1])
+        scale = np.sqrt(2.0 / self.n_components)
+        transformed_X = np.empty((X.shape[0], self.n_components), dtype=np.float64)
+        for start in range(0, X.shape[0], self.block_rows):
+            end = start + self.block_rows
+            np.cos(X[start:end] @ self.weights + self.offsets, out=transformed_X[start:end])
+        transformed_X *= scale
+        return transformed_X
+
+
+class NystroemFeatures:
+    def __init__(self, kernel='rbf', gamma='auto', degree=3, coef0=0.0, n_components=100, seed=0, block_rows=4096):
+        self.kernel = kernel
+        self.gamma = gamma
+        self.degree = degree
+        self.coef0 = coef0
+        self.n_components = n_components
+        self.seed = seed
+        self.block_rows = block_rows
+        self.landmarks = None
+        self.normalization = None
+
+    def _kernel(self, X):
+        return transform_by_landmarks(
+            X, self.kernel, self.gamma, self.degree, self.coef0,
+            landmarks=self.landmarks, block_rows=self.block_rows
+        )
+
+    def _build(self, n_features):
+        self.landmarks = make_landmarks(self.n_components, n_features, self.seed)
+        # K_LL^(-1/2), eigenvalues are clipped as the sigmoid kernel is not positive definite
+        eigenvalues, eigenvectors = np.linalg.eigh(self._kernel(self.landmarks))
+        eigenvalues = np.maximum(eigenvalues, 1e-12)
+        self.normalization = (eigenvectors / np.sqrt(eigenvalues)) @ eigenvectors.T
+
+    def transform(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if self.landmarks is None or self.landmarks.shape[1] != X.shape[1]:
+            self._build(X.shape[1])
+        transformed_X = np.empty((X.shape[0], self.n_components), dtype=np.float64)
+        for start in range(0, X.shape[0], self.block_rows):
+            end = start + self.block_rows
+            transformed_X[start:end] = self._kernel(X[start:end]) @ self.normalization
+        return transformed_X
+
+
+def make_feature_map(kernel_approximation, kernel, gamma, degree, coef0, n_components, seed, block_rows=4096):
+    """Feature map of a kernel_approximation mode, None for the exact landmark path"""
+    if kernel_approximation in (None, '', 'none'):
+        return None
+    if kernel_approximation == 'rff':
+        if kernel != 'rbf':
+            raise ValueError("Random Fourier features approximate the 'rbf' kernel only.")
+        return RandomFourierFeatures(n_components, gamma, seed, block_rows)
+    if kernel_approximation == 'nystroem':
+        return NystroemFeatures(kernel, gamma, degree, coef0, n_components, seed, block_rows)
+    raise ValueError(f"Invalid kernel approximation: {kernel_approximation}")
@@ -1,58 +1,58 @@
 import numpy as np
 import warnings
 import ast
+from .DataSource import ArraySource, as_data_source
+from .SVMTrainer import SVMTrainer, fit_binary_svm, fit_one_vs_rest_svm
+from .KernelApproximation import make_landmarks, transform_by_landmarks, make_feature_map
 
 """
 (i) read CustomSVM documentation then go through this 
 
-(iii) landmarks arg in the constructor is only used when is_landmark_based is set to True,
- if given it should be any iterable with the points having the same dimension as the input data.
- if not given random 'num_landmarks' number of points will be selected from the input data.
+(iii) landmarks in the config are optional, if given they should be a list of points
+ (or its string form) with the same dimension as the input data.
 
-(iv) if landmarks are given, num_landmarks will not be used (these are used to select random points from the input data)
+(iv) if landmarks are not given, 'num_landmarks' points are drawn once from a standard normal
+ with 'landmark_seed' (default 0) and cached on the model. The seed is part of model_info in
+ federated_info, so every client and the server's global evaluation use the same landmarks,
+ and they do not depend on any client's data. This suits standardized inputs (std_mean / std_deviation).
 
 (v) The dimension of weights on the server must be same as the weights of the model to be updated/send to the server.
 
-(vi) landmarks should be num_landmarks datapoints from the input data, if not given random points will be selected from the input data.
-"""
-
-def transform_by_landmarks(X, kernel, gamma=None, degree=None, coef0=None, landmarks=None, num_landmarks=15):
-    if landmarks is None:
-        landmarks = X[np.random.choice(X.shape[0], num_landmarks, replace=True)]
-
-    if kernel == 'rbf':
-        dist_matrix = np.linalg.norm(X[:, np.newaxis] - landmarks, axis=2)
-        transformed_X = np.exp(-gamma * (dist_matrix ** 2))
-
-    elif kernel == 'linear':
-        transformed_X = X @ landmarks.T
-
-    elif kernel == 'polynomial':
-        transformed_X = (X @ landmarks.T + coef0) ** degree
-
-    elif kernel == 'sigmoid':
-        transformed_X = np.tanh(gamma * (X @ landmarks.T) + coef0)
-
-    else:
-        raise ValueError("Invalid kernel function.")
-
-    return transformed_X
+(vi) the feature map is computed over blocks of 'block_rows' rows, the RBF distances use
+ ||x||^2 - 2 x.l + ||l||^2 so memory stays O(block_rows * num_landmarks) instead of O(n * num_landmarks * d).
 
+(vii) 'kernel_approximation' = 'rff' (rbf only) or 'nystroem' replaces the landmark kernel values by an
+ explicit feature map of 'n_components' dimensions built from 'landmark_seed', see KernelApproximation.py.
+ The weights then have n_components columns.
+"""
 
 class LandMarkSVM:
     def __init__(self, config):
         try:
             # Extract and convert parameters from the config dictionary
             self.C = float(config.get('C', 1.0))
-            self.gamma = config.get('gamma', 'auto')
+            gamma = config.get('gamma', 'auto')
+            self.gamma = gamma if gamma == 'auto' else float(gamma)
             self.degree = int(config.get('degree', 3))
             self.coef0 = float(config.get('coef0', 0.0))
             self.lr = float(config.get('lr', 0.01))
             self.n_iters = int(config.get('n_iters', 100))
+            # mini-batch SGD options, the default batch_size 1 without shuffling is the plain per-sample SGD
+            self.batch_size = int(config.get('batch_size', 1))
+            self.shuffle = str(config.get('shuffle', 'false')).lower() == 'true'
+            self.seed = int(config['seed']) if config.get('seed') not in (None, '') else None
+            # rows per chunk when streaming memory-mapped / file training data
+            self.chunk_rows = int(config.get('chunk_rows', 4096))
             self.is_binary = config.get('is_binary', 'false').lower() == 'true'
             self.kernel = config.get('kernel', 'rbf')
-            self.landmarks = config.get('landmarks', None)
+            landmarks = config.get('landmarks', None)
+            if isinstance(landmarks, str):
+                landmarks = ast.literal_eval(landmarks)
+            self.landmarks = np.array(landmarks, dtype=np.float64) if landmarks is not None else None
             self.num_landmarks = int(config.get('num_landmarks', 15))
+            self.landmark_seed = int(config.get('landmark_seed', 0))
+            self.block_rows = int(config.get('block_rows', 4096))
+            self.n_components = int(config.get('n_components', 100))
             
             # Handle weights_shape safely
             weights_shape_str = config.get('weights_shape', None)
@@ -69,68 +69,78 @@ class LandMarkSVM:
             print(f"Error creating model instance: {e}")
             self.weights = None
             self.biases = None
+            self.feature_map = None
+            return
+
+        # outside the try: an invalid kernel_approximation must fail loudly instead of silently
+        # training on the exact landmark features
+        self.feature_map = make_feature_map(
+            config.get('kernel_approximation', 'none'), self.kernel, self.gamma, self.degree, self.coef0,
+            self.n_components, self.landmark_seed, self.block_rows
+        )
 
-    def fit_binary(self, X, y):
+    def fit_binary(self, X, y=None):
         self.is_binary = True
-        n_samples, n_features = X.shape
-        weights = np.zeros(n_features)
-        bias = 0
-        lr = self.lr
-        n_iters = self.n_iters
-        binary_y = np.where(y == 1, 1, -1)
-        for epoch in range(n_iters):
-            for idx, x in enumerate(X):
-                decision = np.dot(x, weights) + bias
-                if binary_y[idx] * decision < 1:
-                    weights += lr * (binary_y[idx] * x - 2 * self.C * weights)
-                    bias += lr * binary_y[idx]
-                else:
-                    weights += lr * (-2 * self.C * weights)
-        self.weights = weights
-        self.biases = bias
-
-    def fit(self, X, y):
-        # if self.weights is not None or self.biases is not None:
-        #     print("weight before fit:", self.get_weights().tolist())
-        # else:
-        #     print("weight before fit: None")
-        X = transform_by_landmarks(X, self.kernel, self.gamma, self.degree, self.coef0, self.landmarks, self.num_landmarks)
-
-        n_samples, n_features = X.shape
-        classes = np.unique(y)
-        n_classes = len(np.unique(y))
+        source = as_data_source(X, y, self.chunk_rows)
+        n_features = self.transformed_features(source.n_features)
+        source, transform = self.training_source(source)
+        self.weights, self.biases = fit_binary_svm(self.trainer(), source, n_features, transform)
+
+    def fit(self, X, y=None):
+        """X, y are arrays or any training data source, see DataSource.py"""
+        source = as_data_source(X, y, self.chunk_rows)
+        n_features = self.transformed_features(source.n_features)
+        classes = source.unique_labels()
+        n_classes = len(classes)
         if self.weights is None and (n_classes == 2 or self.is_binary):
-            self.fit_binary(X, y)
+            self.fit_binary(source)
             return
 
         if self.weights is None and self.biases is None:
             self.weights = np.zeros((n_classes, n_features))
             self.biases = np.zeros(n_classes)
-        # print("weights shape", self.weights.shape)
-        for i in classes:
-            i = int(i)
-            binary_y = np.where(y == i, 1, -1)
-            weights = self.weights[i]
-            bias = self.biases[i]
-            lr = self.lr  # Learning rate
-            n_iters = self.n_iters  # Number of n_iters
-            for epoch in range(n_iters):
-                for idx, x in enumerate(X):
-                    decision = np.dot(x, weights) + bias
-                    if binary_y[idx] * decision < 1:
-                        weights += lr * (binary_y[idx] * x - 2 * self.C * weights)
-                        bias += lr * binary_y[idx]
-                    else:
-                        weights += lr * (-2 * self.C * weights)
-            self.weights[i] = weights
-            self.biases[i] = bias
+        source, transform = self.training_source(source)
+        fit_one_vs_rest_svm(self.trainer(), source, classes, self.weights, self.biases, transform)
         # print("weight after fit:", self.get_weights().tolist())
 
+    def get_landmarks(self, n_features):
+        """Configured landmarks, or the seeded ones generated on first use"""
+        if self.landmarks is None:
+            self.landmarks = make_landmarks(self.num_landmarks, n_features, self.landmark_seed)
+        return self.landmarks
+
+    def transform(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if self.feature_map is not None:
+            return self.feature_map.transform(X)
+        return transform_by_landmarks(
+            X, self.kernel, self.gamma, self.degree, self.coef0,
+            landmarks=self.get_landmarks(X.shape[1]), block_rows=self.block_rows
+        )
+
+    def training_source(self, source):
+        """
+        In-memory data is transformed once up front, streamed data chunk by chunk every epoch.
+
+        Returns:
+            (DataSource, callable): the source to train on and the transform still to apply to its chunks.
+        """
+        if getattr(source, 'in_memory', False):
+            return ArraySource(self.transform(source.X), source.y), None
+        return source, self.transform
+
+    def transformed_features(self, n_features):
+        """Width of the feature map for inputs with n_features columns"""
+        return self.transform(np.zeros((1, n_features))).shape[1]
+
+    def trainer(self):
+        return SVMTrainer(self.C, self.lr, self.n_iters, self.batch_size, self.shuffle, self.seed)
+
     def predict(self, X):
         if self.weights is None or self.biases is None:
             warnings.warn("Model has not been trained yet...NONE weights and biases.")
             return np.array([0])
-        X = transform_by_landmarks(X, self.kernel, self.gamma, self.degree, self.coef0, self.landmarks, self.num_landmarks)
+        X = self.transform(X)
         decision_values = np.dot(X, self.weights.T) + self.biases
 
         if self.is_binary:
@@ -1,5 +1,6 @@
 import numpy as np
 from sklearn.preprocessing import StandardScaler
+from .DataSource import as_data_source
 
 
 '''
@@ -12,38 +13,38 @@ class LinearRegression:
     def __init__(self , config):
         self.lr = float(config.get('lr', 0.01))
         self.n_iters = int(config.get('n_iters', 100))
+        # rows per chunk when streaming memory-mapped / file training data
+        self.chunk_rows = int(config.get('chunk_rows', 4096))
         self.m = None
         self.c = None
 
-    def fit(self, X_train, Y_train):
-        # Ensure X_train and Y_train are numpy arrays
-        X_train = np.array(X_train)
-        Y_train = np.array(Y_train)
+    def fit(self, X_train, Y_train=None):
+        """
+        Full-batch gradient descent. X_train, Y_train are arrays or any training data source
+        (see DataSource.py): every iteration accumulates the exact full-batch gradient chunk by chunk.
+        """
+        source = as_data_source(X_train, Y_train, self.chunk_rows)
 
-
-        # Get the number of samples
-        num_samples, num_features = X_train.shape
-        
          # Initialize parameters
         if self.m is None:
-            self.m = np.zeros(num_features)  # Initialize m with zeros
+            self.m = np.zeros(source.n_features)  # Initialize m with zeros
         if self.c is None:
             self.c = 0  # Initialize c with zero
         
         # Gradient Descent
         for i in range(self.n_iters):
-            Y_pred = np.dot(X_train, self.m) + self.c
-            # print("Check kar : ",Y_pred[:3],Y_train[:3])
-            residuals = Y_train - Y_pred
-            # print("m :",self.m[:5])
-            # print(X_train.shape,residuals.shape)
-            # print(np.dot(X_train.T,residuals))
-            #print("c" , self.c[:5])
-            #print("Check kar : ",X_train[:5])
-            D_m = (-2 / num_samples) * np.dot(X_train.T, residuals)
-            D_c = (-2 / num_samples) * np.sum(residuals)
+            grad_m = np.zeros_like(self.m, dtype=np.float64)
+            grad_c = 0.0
+            num_samples = 0
+            for X_chunk, Y_chunk in source.batches():
+                residuals = Y_chunk - (np.dot(X_chunk, self.m) + self.c)
+                grad_m += np.dot(X_chunk.T, residuals)
+                grad_c += np.sum(residuals)
+                num_samples += len(Y_chunk)
+
+            D_m = (-2 / num_samples) * grad_m
+            D_c = (-2 / num_samples) * grad_c
             
-            # print("Check kar L ",D_m,D_c)
             self.m = self.m - self.lr * D_m
             self.c = self.c - self.lr * D_c
 
@@ -65,5 +66,45 @@ class LinearRegression:
                        'c': [self.c] if self.c is not None else None}
         return local_parameter
     
+    def sufficient_statistics(self, X_train, Y_train):
+        """
+        Local statistics for the one-shot 'sufficient_statistics' aggregation, sent instead of m and c.
+        With A = [X, 1] (intercept column last): xtx = A^T A, xty = A^T y and n = number of samples.
+        Summed over the clients they give the normal equations of the whole federation.
+        """
+        source = as_data_source(X_train, Y_train, self.chunk_rows)
+        xtx, xty, n = None, None, 0
+        for X_chunk, Y_chunk in source.batches():
+            A = np.hstack([X_chunk, np.ones((X_chunk.shape[0], 1))])
+            if xtx is None:
+                xtx, xty = A.T @ A, A.T @ Y_chunk
+            else:
+                xtx += A.T @ A
+                xty += A.T @ Y_chunk
+            n += X_chunk.shape[0]
+        return {'xtx': xtx.tolist(), 'xty': xty.tolist(), 'n': [n]}
+
+    @staticmethod
+    def solve_sufficient_statistics(statistics, ridge=0.0):
+        """
+        Solves (A^T A + n * ridge * I') theta = A^T y on the summed client statistics, I' leaves the
+        intercept unregularized. ridge penalizes ||m||^2 against the mean squared error, so its
+        effect does not depend on the number of samples in the federation.
+
+        Returns:
+            dict: parameters in the get_parameters format.
+        """
+        xtx = np.asarray(statistics['xtx'], dtype=np.float64)
+        xty = np.asarray(statistics['xty'], dtype=np.float64).reshape(-1)
+        n = float(np.sum(statistics['n']))
+
+        penalty = np.eye(len(xty)) * (n * ridge)
+        penalty[-1, -1] = 0
+        # least norm solution, also when the system is singular without ridge (e.g. collinear
+        # features): rounding keeps such a matrix from being exactly singular, so solve() would
+        # return an arbitrary point of the null space instead of raising
+        theta = np.linalg.pinv(xtx + penalty, rtol=1e-12, hermitian=True) @ xty
+        return {'m': theta[:-1].tolist(), 'c': [float(theta[-1])]}
+
     def change_n_iters(self,client_iter):
         self.n_iters = client_iter
@@ -0,0 +1,159 @@
+import ast
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+"""
+Inference only counterpart of CustomCNN written in NumPy, used by the server for the global
+evaluation so CNN sessions are tested without importing TensorFlow.
+
+(i) It reads the same config as CustomCNN (input_shape, layers, output_layer) and builds the
+ same stack as the Keras Sequential model: dense, flatten, convolution, reshape and max / average
+ pooling, all with 'valid' padding and channels last (NHWC) like the Keras defaults.
+
+(ii) Parameters are the {'weights': [...]} tree of CustomCNN.get_parameters, one entry per Keras
+ layer: [kernel, bias] for dense and convolution layers, [] for the others.
+
+(iii) Convolutions use im2col: sliding_window_view exposes every receptive field, they are
+ copied once into (kh, kw, channels) rows and a single matmul with the kernel computes all outputs. predict works in batches of
+ 'predict_batch_size' rows (default 256) so the im2col buffer stays bounded.
+
+(iv) predict returns the output layer activations like Keras' model.predict.
+"""
+
+
+def _pair(value):
+    value = ast.literal_eval(value) if isinstance(value, str) else value
+    if isinstance(value, (tuple, list)):
+        return tuple(int(v) for v in value)
+    return (int(value), int(value))
+
+
+def _softmax(x):
+    e = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return e / np.sum(e, axis=-1, keepdims=True)
+
+
+_ACTIVATIONS = {
+    None: lambda x: x,
+    "": lambda x: x,
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "sigmoid": lambda x: 1 / (1 + np.exp(-x)),
+    "tanh": np.tanh,
+    "softmax": _softmax,
+    "softplus": lambda x: np.logaddexp(x, 0),
+    "softsign": lambda x: x / (1 + np.abs(x)),
+    "elu": lambda x: np.where(x > 0, x, np.expm1(np.minimum(x, 0))),
+    "selu": lambda x: 1.0507009873554805 * np.where(x > 0, x, 1.6732632423543772 * np.expm1(np.minimum(x, 0))),
+    "swish": lambda x: x / (1 + np.exp(-x)),
+}
+
+
+def _activation(name):
+    if name not in _ACTIVATIONS:
+        raise ValueError(f"Unsupported activation function: {name}")
+    return _ACTIVATIONS[name]
+
+
+def conv2d(X, kernel, bias, strides):
+    """Valid 2D convolution of NHWC input with a (kh, kw, in, out) kernel via im2col"""
+    kh, kw, channels, filters = kernel.shape
+    sh, sw = strides
+    # (n, out_h, out_w, channels, kh, kw) view of every receptive field
+    windows = sliding_window_view(X, (kh, kw), axis=(1, 2))[:, ::sh, ::sw]
+    n, out_h, out_w = windows.shape[:3]
+    # im2col rows in the (kh, kw, channels) order of the kernel, one matmul for all outputs
+    columns = windows.transpose(0, 1, 2, 4, 5, 3).reshape(n * out_h * out_w, kh * kw * channels)
+    return (columns @ kernel.reshape(kh * kw * channels, filters)).reshape(n, out_h, out_w, filters) + bias
+
+
+def pool2d(X, pool_size, strides, reduce):
+    windows = sliding_window_view(X, pool_size, axis=(1, 2))[:, ::strides[0], ::strides[1]]
+    return reduce(windows, axis=(-2, -1))
+
+
+class NumpyCNN:
+    def __init__(self, config):
+        self.config = config
+        self.input_shape = tuple(ast.literal_eval(config['input_shape']))
+        self.predict_batch_size = int(config.get('predict_batch_size', 256))
+        self.layers = [self._layer_spec(layer) for layer in config['layers']]
+        output_layer = config['output_layer']
+        self.layers.append({
+            "type": "dense",
+            "activation": _activation(output_layer['activation_function']),
+        })
+        self.weights = None
+
+    @staticmethod
+    def _layer_spec(layer):
+        layer_type = layer['layer_type']
+        if layer_type == 'dense':
+            return {"type": "dense", "activation": _activation(layer['activation_function'])}
+        if layer_type == 'flatten':
+            return {"type": "flatten"}
+        if layer_type == 'convolution':
+            return {
+                "type": "convolution",
+                "strides": _pair(layer['stride']),
+                "activation": _activation(layer['activation_function']),
+            }
+        if layer_type == 'reshape':
+            return {"type": "reshape", "target_shape": tuple(ast.literal_eval(layer['target_shape']))}
+        if layer_type == 'pooling':
+            pool_size = _pair(layer['pool_size'])
+            stride = layer.get('stride')
+            strides = pool_size if stride in (None, '', 'None') else _pair(stride)
+            reduce = {"max": np.max, "average": np.mean}.get(layer['pooling_type'])
+            if reduce is None:
+                raise ValueError(f"Unsupported pooling type: {layer['pooling_type']}")
+            return {"type": "pooling", "pool_size": pool_size, "strides": strides, "reduce": reduce}
+        raise ValueError(f"Unsupported layer type: {layer_type}")
+
+    def update_parameters(self, new_params):
+        layer_weights = new_params['weights']
+        if len(layer_weights) != len(self.layers):
+            raise ValueError(f"Expected weights for {len(self.layers)} layers, got {len(layer_weights)}.")
+        weights = []
+        for spec, params in zip(self.layers, layer_weights):
+            if spec["type"] in ("dense", "convolution"):
+                kernel, bias = (np.asarray(w, dtype=np.float32) for w in params)
+                weights.append((kernel, bias))
+            else:
+                weights.append(None)
+        self.weights = weights
+
+    def get_parameters(self):
+        if self.weights is None:
+            raise ValueError("Parameters are None")
+        params = {'weights': []}
+        for layer_params in self.weights:
+            params['weights'].append([w.tolist() for w in layer_params] if layer_params is not None else [])
+        return params
+
+    def _forward(self, X):
+        for spec, params in zip(self.layers, self.weights):
+            layer_type = spec["type"]
+            if layer_type == "dense":
+                kernel, bias = params
+                X = spec["activation"](X @ kernel + bias)
+            elif layer_type == "convolution":
+                kernel, bias = params
+                X = spec["activation"](conv2d(X, kernel, bias, spec["strides"]))
+            elif layer_type == "flatten":
+                X = X.reshape(X.shape[0], -1)
+            elif layer_type == "reshape":
+                X = X.reshape((X.shape[0],) + spec["target_shape"])
+            elif layer_type == "pooling":
+                X = pool2d(X, spec["pool_size"], spec["strides"], spec["reduce"])
+        return X
+
+    def predict(self, X):
+        if self.weights is None:
+            raise ValueError("Model parameters have not been set.")
+        X = np.asarray(X, dtype=np.float32).reshape((-1,) + self.input_shape)
+        outputs = [
+            self._forward(X[start:start + self.predict_batch_size])
+            for start in range(0, X.shape[0], self.predict_batch_size)
+        ]
+        return np.concatenate(outputs) if outputs else np.empty((0,), dtype=np.float32)
@@ -0,0 +1,91 @@
+import numpy as np
+
+"""
+Shared training engine of CustomSVM and LandMarkSVM.
+
+Hinge-loss SGD with L2 penalty, run for all one-vs-rest classes at once:
+the weights are a (classes x features) matrix and every step processes a mini-batch,
+the hinge gradient only counts the samples whose margin is below 1 for that class.
+
+    W <- W + lr * ((active * t)^T X_batch / |batch| - 2C W)
+    b <- b + lr * sum(active * t) / |batch|
+
+With batch_size=1 and no shuffling (the defaults) this is exactly the former per-sample loop,
+sessions opt in to larger batches with 'batch_size' in their model config.
+The data comes from a DataSource (see DataSource.py), so it is streamed chunk by chunk.
+"""
+
+
+class SVMTrainer:
+    def __init__(self, C=1.0, lr=0.01, n_iters=100, batch_size=1, shuffle=False, seed=None):
+        self.C = C
+        self.lr = lr
+        self.n_iters = n_iters
+        self.batch_size = max(1, int(batch_size))
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+
+    def train(self, source, classes, weights, biases, transform=None):
+        """
+        Args:
+            source (DataSource): training data, streamed chunk by chunk every epoch.
+            classes (np.ndarray): class label of every weight row, targets are 1 for it and -1 otherwise.
+            weights (np.ndarray): (n_classes, n_features) initial weights, updated in place.
+            biases (np.ndarray): (n_classes,) initial biases, updated in place.
+            transform (callable, optional): feature map applied to every chunk (LandMarkSVM).
+
+        Returns:
+            (np.ndarray, np.ndarray): the trained weights and biases.
+        """
+        classes = np.asarray(classes, dtype=np.float64)
+        for _ in range(self.n_iters):
+            for X, y in source.batches(self.shuffle, self.rng):
+                if transform is not None:
+                    X = transform(X)
+                targets = np.where(y[:, np.newaxis] == classes[np.newaxis, :], 1.0, -1.0)
+                self._train_chunk(X, targets, weights, biases)
+
+        return weights, biases
+
+    def _train_chunk(self, X, targets, weights, biases):
+        """One pass of mini-batch updates over a chunk"""
+        n_samples = X.shape[0]
+        decay = 2 * self.C
+
+        order = self.rng.permutation(n_samples) if self.shuffle else None
+        for start in range(0, n_samples, self.batch_size):
+            if order is None:
+                X_batch = X[start:start + self.batch_size]
+                t_batch = targets[start:start + self.batch_size]
+            else:
+                batch = order[start:start + self.batch_size]
+                X_batch = X[batch]
+                t_batch = targets[batch]
+
+            margins = t_batch * (X_batch @ weights.T + biases)
+            # hinge gradient only for (sample, class) pairs inside the margin
+            active_targets = np.where(margins < 1, t_batch, 0.0)
+            scale = self.lr / X_batch.shape[0]
+            weights *= 1 - self.lr * decay
+            weights += scale * (active_targets.T @ X_batch)
+            biases += scale * active_targets.sum(axis=0)
+
+
+def fit_binary_svm(trainer, source, n_features, transform=None):
+    """Trains one weight vector for class 1 vs the rest, returns (weights, bias)"""
+    weights, biases = trainer.train(source, [1], np.zeros((1, n_features)), np.zeros(1), transform)
+    return weights[0], np.float64(biases[0])
+
+
+def fit_one_vs_rest_svm(trainer, source, classes, weights, biases, transform=None):
+    """
+    Trains the rows of the classes present in the data, the other classes keep their weights.
+    Class labels are the row indices of weights.
+    """
+    rows = classes.astype(int)
+    class_weights, class_biases = trainer.train(
+        source, classes, weights[rows].astype(np.float64), biases[rows].astype(np.float64), transform
+    )
+    weights[rows] = class_weights
+    biases[rows] = class_biases
+    return weights, biases
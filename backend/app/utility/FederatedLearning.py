@@ -5,6 +5,13 @@ from schema import FederatedLearningInfo, User
 from sqlalchemy import and_, desc, select
 from models.FederatedSession import FederatedSession, FederatedSessionClient
 from utility.Server import Server
+from utility.aggregation import FedAvgAggregator
+from utility.ModelBuilder import get_model_class
+from utility.client_updates import delete_client_updates, stream_buffered_updates, stream_client_updates
+from utility.fedbuff import fedbuff_settings, is_too_stale, staleness_weight
+from utility.server_optimizers import server_optimizer_from_config, step_committed
+from utility.parameters import flatten_parameters, unflatten_parameters
+from utility.tensor_codec import SparseDelta
 import numpy as np
 from models import User as UserModel
 from sqlalchemy.orm import Session, joinedload
@@ -134,6 +141,7 @@ class FederatedLearning:
         #     "biases": [list of numpy arrays],
         #     "other_parameters": [list of numpy arrays]
         # }
+        # Returns the new global parameters, or None if the round has no usable update.
         # ========================================================================================================
         """
         # Retrieve client parameters
@@ -142,55 +150,40 @@ class FederatedLearning:
             
             if not federated_session:
                 raise ValueError(f"FederatedSession with ID {session_id} not found.")
-            # Count the number of clients
-            num_interested_clients = len(federated_session.clients)
-            client_parameters = json.loads(federated_session.client_parameters or "{}")  # Ensure client_parameters is a dict
+            if step_committed(federated_session.optimizer_state, federated_session.curr_round, federated_session.global_version):
+                # aggregated and committed by a worker that lost the session's lease afterwards,
+                # stepping the server optimizer again would apply the round twice
+                print(f"Round {federated_session.curr_round} was aggregated already, keeping its global model.")
+                return self._global_parameters(federated_session)
+            # Stream the stored updates of the current round one client at a time straight
+            # into the accumulator, so only one client's payload is held in memory
+            aggregator = FedAvgAggregator()
+            base = None
+            for user_id, update, manifest, metadata in stream_client_updates(db, session_id, federated_session.curr_round):
+                if not isinstance(update, SparseDelta):
+                    aggregator.add_flat(update, manifest)
+                    continue
+                if metadata["base_version"] != federated_session.global_version:
+                    # uploads are checked on arrival, this only catches one racing an aggregation
+                    print(f"Skipping stale sparse delta of user {user_id} (base version {metadata['base_version']}).")
+                    continue
+                if base is None:
+                    base = self._global_buffer(federated_session, manifest)
+                aggregator.add_sparse_delta(update, manifest, base)
 
-            # Initialize a dictionary to hold the aggregated sums of parameters
-            aggregated_sums = {}
+            if aggregator.count == 0:
+                # every update was skipped, the caller re-opens the round (see aggregate_and_test_round)
+                print(f"No usable client updates in round {federated_session.curr_round}, the global model is kept.")
+                return None
 
-            def initialize_aggregated_sums(param, aggregated):
-                if isinstance(param, list):
-                    return [initialize_aggregated_sums(sub_param, aggregated) for sub_param in param]
-                else:
-                    return np.zeros_like(param)
-
-            def sum_parameters(aggregated, param):
-                if isinstance(param, list):
-                    for i in range(len(param)):
-                        aggregated[i] = sum_parameters(aggregated[i], param[i])
-                    return aggregated
-                else:
-                    return aggregated + np.array(param)
-
-            def average_parameters(aggregated, count):
-                if isinstance(aggregated, list):
-                    return [average_parameters(sub_aggregated, count) for sub_aggregated in aggregated]
-                else:
-                    return (aggregated / count).tolist()
-
-            # Iterate over each client's parameters
-            for client in client_parameters:
-                client_param = client_parameters[client]
-
-                # Initialize aggregated_sums with the same structure as the first client's parameters
-                if not aggregated_sums:
-                    for key in client_param:
-                        aggregated_sums[key] = initialize_aggregated_sums(client_param[key], aggregated_sums)
-
-                # Sum the parameters for each key
-                for key in client_param:
-                    aggregated_sums[key] = sum_parameters(aggregated_sums[key], client_param[key])
-
-            # Average the aggregated sums
-            for key in aggregated_sums:
-                aggregated_sums[key] = average_parameters(aggregated_sums[key], num_interested_clients)
+            aggregated_sums = self._apply_server_optimizer(federated_session, aggregator)
 
             print("Aggregated Parameters after FedAvg:",
                   {k: (type(v), len(v) if isinstance(v, list) else 'N/A') for k, v in aggregated_sums.items()})
 
             # Save the aggregated parameters back to the session
             federated_session.global_parameters = json.dumps(aggregated_sums)
+            federated_session.global_version += 1
 
             # Save aggregated_sums dictionary into a text file with appending
             file_path = "aggregated_sums.txt"  # Specify the desired file path and name
@@ -206,5 +199,135 @@ class FederatedLearning:
 
             print(f"Aggregated sums have been appended to {file_path} with a separator.")
             db.commit()
+            return aggregated_sums
+
+    def aggregate_sufficient_statistics(self, session_id: str):
+        """
+        One-shot aggregation: sums the sufficient statistics sent by the clients (see
+        LinearRegression.sufficient_statistics) and solves the model on the server.
+        training_config['ridge'] sets an optional ridge penalty.
+
+        Returns:
+            dict: the solved global parameters, None if no client sent its statistics.
+        """
+        with Session(engine) as db:
+            federated_session = db.query(FederatedSession).filter_by(id=session_id).first()
+
+            if not federated_session:
+                raise ValueError(f"FederatedSession with ID {session_id} not found.")
+
+            aggregator = FedAvgAggregator()
+            for _, buffer, manifest, _ in stream_client_updates(db, session_id, federated_session.curr_round):
+                aggregator.add_flat(buffer, manifest)
+            if aggregator.count == 0:
+                print(f"No client statistics in round {federated_session.curr_round}, nothing to solve.")
+                return None
+
+            federated_info = federated_session.federated_info
+            ridge = float((federated_info.get('training_config') or {}).get('ridge', 0.0))
+            model_class = get_model_class(federated_info['model_name'])
+            global_parameters = model_class.solve_sufficient_statistics(aggregator.sum_result(), ridge)
+
+            print(f"Solved global model from the statistics of {aggregator.count} clients.")
+            federated_session.global_parameters = json.dumps(global_parameters)
+            federated_session.global_version += 1
+            db.commit()
+            return global_parameters
+
+    def aggregate_buffered_updates(self, session_id: str):
+        """
+        FedBuff step of an asynchronous session (see utility/fedbuff.py): folds every buffered
+        update into the global model, weighted by its staleness, and publishes a new global_version.
+        The folded updates are deleted in the same transaction, uploads arriving meanwhile stay buffered.
+
+        Returns:
+            (dict, list): the new global parameters (None if every update was too stale) and the ids
+            of the users whose updates were consumed.
+        """
+        with Session(engine) as db:
+            federated_session = db.query(FederatedSession).filter_by(id=session_id).first()
+
+            if not federated_session:
+                raise ValueError(f"FederatedSession with ID {session_id} not found.")
+            settings = fedbuff_settings(federated_session.federated_info)
+            version = federated_session.global_version
+
+            aggregator = FedAvgAggregator()
+            base = None
+            folded_ids, dropped_ids, contributors = [], [], []
+            for update_id, user_id, base_version, update, manifest, _ in stream_buffered_updates(db, session_id):
+                staleness = version - base_version
+                if is_too_stale(staleness, settings) or (isinstance(update, SparseDelta) and version == 0):
+                    print(f"Dropping update of user {user_id} with staleness {staleness}.")
+                    dropped_ids.append(update_id)
+                    contributors.append(user_id)
+                    continue
+                # version 0 has no global model yet, the first fold is a plain average
+                if base is None and version > 0:
+                    base = self._global_buffer(federated_session, manifest)
+                weight = staleness_weight(staleness)
+                if isinstance(update, SparseDelta):
+                    aggregator.add_sparse_delta(update, manifest, base, weight)
+                else:
+                    aggregator.add_flat(update, manifest, weight)
+                folded_ids.append(update_id)
+                contributors.append(user_id)
+
+            if not folded_ids:
+                delete_client_updates(db, dropped_ids)
+                db.commit()
+                return None, contributors
+
+            if base is None:
+                new_buffer = aggregator.average_buffer()
+            else:
+                # sum of s_i * (w_i - global) over the buffer, see utility/fedbuff.py
+                weighted_deltas = aggregator.sum_buffer() - aggregator.total_weight * base
+                new_buffer = base + settings.server_lr * weighted_deltas / len(folded_ids)
+            global_parameters = unflatten_parameters(new_buffer, aggregator.manifest)
+
+            print(f"Folded {len(folded_ids)} buffered updates into global version {version + 1}.")
+            federated_session.global_parameters = json.dumps(global_parameters)
+            federated_session.global_version = version + 1
+            delete_client_updates(db, folded_ids + dropped_ids)
+            db.commit()
+            return global_parameters, contributors
+
+    def _apply_server_optimizer(self, federated_session, aggregator):
+        """
+        Global parameters of a round: the client average, or with a server optimizer one step
+        from the current global model along the averaged client delta (see utility/server_optimizers.py).
+        """
+        optimizer = server_optimizer_from_config(federated_session.federated_info)
+        if optimizer is None:
+            return aggregator.result()
+
+        average = aggregator.average_buffer()
+        try:
+            global_buffer = self._global_buffer(federated_session, aggregator.manifest)
+        except ValueError:
+            # no global model yet (first round), the average starts the optimization
+            return aggregator.result()
+
+        optimizer.load_state(federated_session.optimizer_state)
+        new_buffer = optimizer.step(global_buffer, average)
+        # the caller publishes the result as the next global_version, in the same commit
+        federated_session.optimizer_state = optimizer.encode_state(
+            federated_session.curr_round, federated_session.global_version + 1
+        )
+        return unflatten_parameters(new_buffer, aggregator.manifest)
 
+    @staticmethod
+    def _global_parameters(federated_session):
+        global_parameters = federated_session.global_parameters
+        if isinstance(global_parameters, str):
+            global_parameters = json.loads(global_parameters)
+        return global_parameters
 
+    @classmethod
+    def _global_buffer(cls, federated_session, manifest):
+        """Current global parameters as a flat buffer, checked against the manifest of the client updates"""
+        buffer, global_manifest = flatten_parameters(cls._global_parameters(federated_session))
+        if global_manifest != manifest:
+            raise ValueError("Client updates do not match the structure of the global parameters.")
+        return buffer
@@ -4,37 +4,131 @@
 # project_root = os.path.dirname(os.path.abspath(__file__))
 # sys.path.insert(0, project_root)
 
-from .CustomModels.LandMarkSVM import LandMarkSVM
-from .CustomModels.CustomSVM import CustomSVM
-from .CustomModels.LinearRegression import LinearRegression
-from .CustomModels.MultiLayerPerceptron import MultiLayerPerceptron
-from .CustomModels.CustomCNN import CustomCNN
+from collections.abc import Mapping
+from importlib import import_module
+from dotenv import load_dotenv
+import threading
 import json
+import os
+
+load_dotenv()
+
+
+class LazyModelRegistry(Mapping):
+    """
+    Model name -> model class, where every class is given as "module:Class" and only imported
+    on first use. Importing this module therefore does not import TensorFlow (CustomCNN,
+    MultiLayerPerceptron), API workers that never build such a model never pay for it.
+    Relative module paths are resolved against this package.
+    """
+
+    def __init__(self, class_paths):
+        self._class_paths = dict(class_paths)
+        self._classes = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, model_name):
+        class_path = self._class_paths[model_name]
+        model_class = self._classes.get(model_name)
+        if model_class is None:
+            with self._lock:
+                model_class = self._classes.get(model_name)
+                if model_class is None:
+                    module_name, class_name = class_path.split(":")
+                    model_class = getattr(import_module(module_name, __package__), class_name)
+                    self._classes[model_name] = model_class
+        return model_class
+
+    def __iter__(self):
+        return iter(self._class_paths)
+
+    def __len__(self):
+        return len(self._class_paths)
+
+    def is_loaded(self, model_name):
+        return model_name in self._classes
 
 
 # ==========================================================================================
 # The Key here should be exactly equal to the key (not label) of model in request.jsx file of the client (that is model_name)
 # ==========================================================================================
-model_classes = {
-    "LinearRegression": LinearRegression,
-    "SVM": CustomSVM,
-    "LandMarkSVM": LandMarkSVM,
-    "multiLayerPerceptron":MultiLayerPerceptron,
-    "CNN": CustomCNN
+model_classes = LazyModelRegistry({
+    "LinearRegression": ".CustomModels.LinearRegression:LinearRegression",
+    "SVM": ".CustomModels.CustomSVM:CustomSVM",
+    "LandMarkSVM": ".CustomModels.LandMarkSVM:LandMarkSVM",
+    "multiLayerPerceptron": ".CustomModels.MultiLayerPerceptron:MultiLayerPerceptron",
+    "CNN": ".CustomModels.CustomCNN:CustomCNN"
     #  Add other models here if necessary
-    }
+    })
+
+# Server side replacements used when a model is only built to predict (global evaluation),
+# MODEL_INFERENCE_BACKEND=keras keeps evaluating CNN sessions with TensorFlow
+inference_model_classes = LazyModelRegistry({
+    "CNN": ".CustomModels.NumpyCNN:NumpyCNN",
+    })
+USE_INFERENCE_CLASSES = os.getenv("MODEL_INFERENCE_BACKEND", "numpy") == "numpy"
+
+
+# ==========================================================================================
+# Aggregation strategies, selected with federated_info['training_config']['aggregation']
+# ==========================================================================================
+AGGREGATION_FEDAVG = "fedavg"
+# clients send sufficient statistics once and the server solves the model in a single round,
+# only for model classes implementing sufficient_statistics / solve_sufficient_statistics
+AGGREGATION_SUFFICIENT_STATISTICS = "sufficient_statistics"
+# buffered asynchronous aggregation without a round barrier, see utility/fedbuff.py
+AGGREGATION_FEDBUFF = "fedbuff"
+
+
+def get_model_class(model_name):
+    model_class = model_classes.get(model_name)
+    if not model_class:
+        raise ValueError(f"Unknown model: {model_name}")
+    return model_class
+
+
+def session_aggregation(modelConfig):
+    """
+    Aggregation strategy of a session's federated_info, validated against the model.
 
+    Raises:
+        ValueError: for an unknown strategy or one the model does not support.
+    """
+    training_config = modelConfig.get("training_config") or {}
+    aggregation = training_config.get("aggregation", AGGREGATION_FEDAVG)
 
-def model_instance_from_config(modelConfig):
+    if aggregation in (AGGREGATION_FEDAVG, AGGREGATION_FEDBUFF):
+        return aggregation
+    if aggregation == AGGREGATION_SUFFICIENT_STATISTICS:
+        model_class = get_model_class(modelConfig["model_name"])
+        if not hasattr(model_class, "solve_sufficient_statistics"):
+            raise ValueError(f"Model {modelConfig['model_name']} does not support {aggregation} aggregation.")
+        return aggregation
+    raise ValueError(f"Unknown aggregation: {aggregation}")
+
+
+def is_one_shot_aggregation(modelConfig):
+    """True if the session is solved in a single round"""
+    return session_aggregation(modelConfig) == AGGREGATION_SUFFICIENT_STATISTICS
+
+
+def model_instance_from_config(modelConfig, inference=False):
+    """
+    Builds the model of a federated_info config, None if it can not be built.
+    With inference=True a lighter predict-only class is used where one is registered, configs
+    it can not interpret (e.g. an activation it does not implement) use the model class itself.
+    """
     try:
         model_name = modelConfig["model_name"]
         config = modelConfig["model_info"]
 
-        model_class = model_classes[model_name]   # Model Class of selected model
-
-        if not model_class:
-            raise ValueError(f"Unknown model: {model_name}")
+        if inference and USE_INFERENCE_CLASSES and model_name in inference_model_classes:
+            try:
+                return inference_model_classes[model_name](config)
+            except Exception as e:
+                print(f"Inference model for {model_name} can not be built ({e}), using the {model_name} model class.")
 
+        model_class = get_model_class(model_name)   # Model Class of selected model
         model_instance = model_class(config) ## removed **config
 
         return model_instance
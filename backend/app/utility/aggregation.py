@@ -0,0 +1,109 @@
+import numpy as np
+from .parameters import ParameterManifest, iter_tensors, unflatten_parameters
+
+
+class FedAvgAggregator:
+    """
+    Streaming Federated Averaging.
+
+    Every client update is added into one preallocated flat accumulator as soon as it is
+    available, so memory and time depend on the model size and not on how many clients
+    (and how many nested python lists) are held at once. Only the final global model is
+    converted back into the nested-list form.
+    """
+
+    def __init__(self, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self.manifest = None
+        self.accumulator = None
+        self.count = 0
+        self.total_weight = 0.0
+        # global model the sparse deltas are based on, and the summed weight of those clients
+        self.base = None
+        self.base_weight = 0.0
+
+    def _ensure_accumulator(self, manifest):
+        if self.accumulator is None:
+            self.manifest = manifest
+            self.accumulator = np.zeros(manifest.size, dtype=self.dtype)
+        elif manifest != self.manifest:
+            raise ValueError("Client parameters do not match the structure of the other clients' parameters.")
+
+    def add(self, parameters, weight=1.0):
+        """Adds one client's parameter tree, tensor by tensor, into the accumulator"""
+        if self.accumulator is None:
+            tensors = list(iter_tensors(parameters, self.dtype))
+            self._ensure_accumulator(ParameterManifest([(path, tensor.shape) for path, tensor in tensors]))
+        else:
+            tensors = iter_tensors(parameters, self.dtype)
+
+        num_tensors = 0
+        for index, (path, tensor) in enumerate(tensors):
+            if index >= len(self.manifest) or self.manifest.entries[index] != (path, tensor.shape):
+                raise ValueError(f"Client parameter {list(path)} with shape {tensor.shape} does not match the other clients.")
+            start, size = self.manifest.offsets[index], self.manifest.sizes[index]
+            target = self.accumulator[start:start + size]
+            if weight == 1.0:
+                target += tensor.reshape(-1)
+            else:
+                target += weight * tensor.reshape(-1)
+            num_tensors += 1
+
+        if num_tensors != len(self.manifest):
+            raise ValueError("Client parameters are missing tensors present in the other clients' parameters.")
+        self.count += 1
+        self.total_weight += weight
+
+    def add_flat(self, buffer, manifest, weight=1.0):
+        """Adds an already flattened client update (see utility.parameters.flatten_parameters)"""
+        self._ensure_accumulator(manifest)
+        if weight == 1.0:
+            self.accumulator += buffer
+        else:
+            self.accumulator += weight * np.asarray(buffer, dtype=self.dtype)
+        self.count += 1
+        self.total_weight += weight
+
+    def add_sparse_delta(self, delta, manifest, base, weight=1.0):
+        """
+        Adds a client model given as base + sparse delta (see tensor_codec.SparseDelta).
+
+        Only the changed entries are scattered into the accumulator, the base buffer is added
+        once for all sparse clients when the result is computed.
+        """
+        self._ensure_accumulator(manifest)
+        if self.base is None:
+            if base.size != manifest.size:
+                raise ValueError("Sparse delta does not match the structure of the global parameters.")
+            self.base = base
+        elif base is not self.base:
+            raise ValueError("Sparse deltas of one aggregation must share the same base parameters.")
+        # the indices are unique, so the indexed add is a scatter-add
+        if weight == 1.0:
+            self.accumulator[delta.indices] += delta.values
+        else:
+            self.accumulator[delta.indices] += weight * np.asarray(delta.values, dtype=self.dtype)
+        self.count += 1
+        self.total_weight += weight
+        self.base_weight += weight
+
+    def sum_buffer(self):
+        """Flat (weighted) sum of the client models"""
+        if self.accumulator is None:
+            raise ValueError("No client parameters were aggregated.")
+        if self.base_weight:
+            return self.accumulator + self.base_weight * self.base
+        return self.accumulator
+
+    def average_buffer(self):
+        if self.accumulator is None or self.total_weight == 0:
+            raise ValueError("No client parameters were aggregated.")
+        return self.sum_buffer() / self.total_weight
+
+    def sum_result(self):
+        """Plain (weighted) sum of the client updates in the nested-list form, e.g. for sufficient statistics"""
+        return unflatten_parameters(self.sum_buffer(), self.manifest)
+
+    def result(self):
+        """Federated average in the nested-list form used for global_parameters"""
+        return unflatten_parameters(self.average_buffer(), self.manifest)
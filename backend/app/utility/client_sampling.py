@@ -0,0 +1,127 @@
+import math
+from typing import NamedTuple
+import numpy as np
+
+"""
+Client selection of synchronous sessions, set in federated_info['training_config']:
+
+    client_sampling     "all" (default), "random" or "latency"
+    sample_fraction     fraction C of the training clients selected per round (default 1.0)
+    max_skip_rounds     "latency" only: a client skipped this many rounds in a row is selected
+                        in the next one (default 3)
+
+"random" draws C * n clients per round, seeded by session and round so a resumed round selects
+the same clients. "latency" ranks the clients by their round_history (see round_completion.py):
+the mean arrival time of their last LATENCY_WINDOW rounds, where a missed round counts as twice
+the deadline (or twice the slowest arrival seen). Clients without history go first so their
+latency gets measured. Skipped rounds are recorded in round_history as well, which bounds how
+long a slow client can be left out and gives the participation counts for jain_fairness_index.
+"""
+
+SAMPLING_ALL = "all"
+SAMPLING_RANDOM = "random"
+SAMPLING_LATENCY = "latency"
+LATENCY_WINDOW = 5
+
+
+class SamplingSettings(NamedTuple):
+    strategy: str
+    fraction: float
+    max_skip_rounds: int
+
+
+def sampling_settings(modelConfig):
+    """
+    Client sampling options of a session's federated_info.
+
+    Raises:
+        ValueError: for invalid options.
+    """
+    training_config = modelConfig.get("training_config") or {}
+
+    strategy = training_config.get("client_sampling", SAMPLING_ALL)
+    fraction = float(training_config.get("sample_fraction", 1.0))
+    max_skip_rounds = int(training_config.get("max_skip_rounds", 3))
+    if strategy not in (SAMPLING_ALL, SAMPLING_RANDOM, SAMPLING_LATENCY):
+        raise ValueError(f"Unknown client_sampling: {strategy}")
+    if not 0 < fraction <= 1:
+        raise ValueError(f"sample_fraction must be a fraction in (0, 1], got {fraction}")
+    if max_skip_rounds < 0:
+        raise ValueError(f"max_skip_rounds must not be negative, got {max_skip_rounds}")
+    return SamplingSettings(strategy, fraction, max_skip_rounds)
+
+
+def skipped_streak(history):
+    """Rounds in a row the client was left out, up to the latest round"""
+    streak = 0
+    for entry in reversed(history or []):
+        if not entry.get("skipped"):
+            break
+        streak += 1
+    return streak
+
+
+def latency_score(history, missed_seconds):
+    """Mean arrival time of the recent rounds the client took part in, 0 without history"""
+    rounds = [entry for entry in history or [] if not entry.get("skipped")][-LATENCY_WINDOW:]
+    if not rounds:
+        return 0.0
+    return float(np.mean([
+        missed_seconds if entry.get("missed") or entry.get("seconds") is None else entry["seconds"]
+        for entry in rounds
+    ]))
+
+
+def select_clients(settings, histories, session_id, round, deadline=None):
+    """
+    Clients to train in a round.
+
+    Args:
+        histories (dict): user id -> round_history of every training client.
+        deadline (float, optional): round_deadline, the cost of a missed round in the latency ranking.
+
+    Returns:
+        list: selected user ids.
+    """
+    user_ids = sorted(histories)
+    num_selected = max(1, math.ceil(settings.fraction * len(user_ids))) if user_ids else 0
+    if settings.strategy == SAMPLING_ALL or num_selected >= len(user_ids):
+        return user_ids
+
+    if settings.strategy == SAMPLING_RANDOM:
+        rng = np.random.default_rng([int(session_id), int(round)])
+        return sorted(int(user_id) for user_id in rng.choice(user_ids, num_selected, replace=False))
+
+    if deadline:
+        missed_seconds = 2 * deadline
+    else:
+        seen = [entry["seconds"] for history in histories.values() for entry in history or [] if entry.get("seconds") is not None]
+        missed_seconds = 2 * max(seen, default=1.0)
+
+    forced = [user_id for user_id in user_ids if skipped_streak(histories[user_id]) >= settings.max_skip_rounds]
+    ranked = sorted(
+        (user_id for user_id in user_ids if user_id not in forced),
+        key=lambda user_id: (latency_score(histories[user_id], missed_seconds), user_id)
+    )
+    return sorted(forced + ranked[:max(0, num_selected - len(forced))])
+
+
+def record_round_skipped(client, round):
+    """Records that a FederatedSessionClient was not selected for a round. The caller commits."""
+    client.round_history = (client.round_history or []) + [{"round": round, "skipped": True}]
+
+
+def participation_counts(histories):
+    """user id -> number of rounds the client was selected for"""
+    return {
+        user_id: sum(1 for entry in history or [] if not entry.get("skipped"))
+        for user_id, history in histories.items()
+    }
+
+
+def jain_fairness_index(counts):
+    """(sum x)^2 / (n * sum x^2), 1 when every client took part equally often, 1/n at worst"""
+    values = np.asarray(list(counts), dtype=np.float64)
+    if values.size == 0 or not values.any():
+        return 1.0
+    return float(values.sum() ** 2 / (values.size * np.square(values).sum()))
@@ -0,0 +1,92 @@
+from datetime import datetime
+from sqlalchemy import and_, delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.FederatedSession import ClientUpdate
+from .tensor_codec import decode_update
+
+
+def save_client_update(db: Session, session_id: int, round: int, user_id: int, payload: bytes):
+    """
+    Stores one client's encoded update for a round as a single insert.
+
+    A client re-sending parameters for the same round only replaces its own row,
+    so concurrent uploads of different clients never touch each other's data.
+    """
+    try:
+        db.add(ClientUpdate(session_id=session_id, round=round, user_id=user_id, payload=payload))
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        db.execute(
+            update(ClientUpdate)
+            .where(and_(
+                ClientUpdate.session_id == session_id,
+                ClientUpdate.round == round,
+                ClientUpdate.user_id == user_id
+            ))
+            .values(payload=payload, updatedAt=datetime.now())
+        )
+        db.commit()
+
+
+def count_client_updates(db: Session, session_id: int, round: int, user_ids=None) -> int:
+    """Updates of a round, only those of user_ids if given"""
+    conditions = [ClientUpdate.session_id == session_id, ClientUpdate.round == round]
+    if user_ids is not None:
+        conditions.append(ClientUpdate.user_id.in_(list(user_ids)))
+    return db.execute(select(func.count(ClientUpdate.id)).where(and_(*conditions))).scalar()
+
+
+def stream_client_updates(db: Session, session_id: int, round: int):
+    """
+    Yields (user_id, update, manifest, metadata) for every update of the round, fetching
+    one row at a time so only one client's payload is in memory. update is the flat
+    buffer, or a SparseDelta for sparse uploads (see tensor_codec.decode_update).
+    """
+    stmt = select(ClientUpdate.user_id, ClientUpdate.payload).where(and_(
+        ClientUpdate.session_id == session_id,
+        ClientUpdate.round == round
+    )).execution_options(yield_per=1)
+
+    for user_id, payload in db.execute(stmt):
+        update, manifest, metadata = decode_update(payload)
+        yield user_id, update, manifest, metadata
+
+
+def count_buffered_updates(db: Session, session_id: int, min_base_version: int = None) -> int:
+    """Buffered updates of an asynchronous session, whose round column holds the base version"""
+    conditions = [ClientUpdate.session_id == session_id]
+    if min_base_version is not None:
+        conditions.append(ClientUpdate.round >= min_base_version)
+    return db.execute(select(func.count(ClientUpdate.id)).where(and_(*conditions))).scalar()
+
+
+def stream_buffered_updates(db: Session, session_id: int):
+    """
+    Yields (id, user_id, base_version, update, manifest, metadata) for every buffered
+    update of an asynchronous session, one row at a time.
+    """
+    stmt = select(ClientUpdate.id, ClientUpdate.user_id, ClientUpdate.round, ClientUpdate.payload).where(
+        ClientUpdate.session_id == session_id
+    ).order_by(ClientUpdate.id).execution_options(yield_per=1)
+
+    for update_id, user_id, base_version, payload in db.execute(stmt):
+        update, manifest, metadata = decode_update(payload)
+        yield update_id, user_id, base_version, update, manifest, metadata
+
+
+def delete_client_updates(db: Session, update_ids):
+    """Deletes folded updates by id, updates uploaded meanwhile stay buffered (no commit)"""
+    if update_ids:
+        db.execute(delete(ClientUpdate).where(ClientUpdate.id.in_(list(update_ids))))
+
+
+def clear_client_updates(db: Session, session_id: int, round: int = None):
+    """Deletes the stored updates of a round (or of every round when round is None)"""
+    conditions = [ClientUpdate.session_id == session_id]
+    if round is not None:
+        conditions.append(ClientUpdate.round == round)
+    db.execute(delete(ClientUpdate).where(and_(*conditions)))
+    db.commit()
@@ -0,0 +1,129 @@
+from typing import NamedTuple
+
+"""
+Early stopping of a session on its global test results, set in
+federated_info['training_config']['early_stopping']:
+
+    metric          test_metrics entry to watch (required)
+    patience        rounds without improvement before the session ends (default 3)
+    min_delta       smallest change of the metric that counts as an improvement (default 0)
+    mode            "min" or "max", by default "min" for the error metrics (mse, mae, ...) and
+                    "max" for the others (accuracy, r2_score, ...)
+    restore_best    the session ends with the best round's model as global_parameters (default true)
+
+The round loop updates an EarlyStopping with every round's results. Whenever the metric improves
+the global parameters are checkpointed in FederatedSession.best_parameters, after 'patience'
+rounds without improvement the session ends before max_round. The state is saved with the test
+results, so a resumed session keeps counting, and the results file records the stop reason and
+the best round.
+"""
+
+MODE_MIN = "min"
+MODE_MAX = "max"
+LOWER_IS_BETTER = ("mse", "mae", "rmse", "msle", "mape", "log_loss")
+
+STOP_MAX_ROUND = "max_round"
+STOP_EARLY = "early_stopping"
+
+
+class EarlyStoppingSettings(NamedTuple):
+    metric: str
+    patience: int
+    min_delta: float
+    mode: str
+    restore_best: bool
+
+
+def early_stopping_settings(modelConfig):
+    """
+    Early stopping options of a session's federated_info, None when the session runs all its rounds.
+
+    Raises:
+        ValueError: for invalid options or a metric the session does not test.
+    """
+    training_config = modelConfig.get("training_config") or {}
+    options = training_config.get("early_stopping")
+    if not options:
+        return None
+    if not isinstance(options, dict):
+        raise ValueError("early_stopping must be an object with at least a 'metric'.")
+
+    metric = options.get("metric")
+    test_metrics = (modelConfig.get("model_info") or {}).get("test_metrics") or []
+    if metric not in test_metrics:
+        raise ValueError(f"early_stopping metric must be one of the test_metrics {test_metrics}, got {metric}")
+    patience = int(options.get("patience", 3))
+    min_delta = float(options.get("min_delta", 0.0))
+    mode = options.get("mode", MODE_MIN if metric in LOWER_IS_BETTER else MODE_MAX)
+    restore_best = bool(options.get("restore_best", True))
+    if patience < 1:
+        raise ValueError(f"early_stopping patience must be at least 1, got {patience}")
+    if min_delta < 0:
+        raise ValueError(f"early_stopping min_delta must not be negative, got {min_delta}")
+    if mode not in (MODE_MIN, MODE_MAX):
+        raise ValueError(f"Unknown early_stopping mode: {mode}")
+    return EarlyStoppingSettings(metric, patience, min_delta, mode, restore_best)
+
+
+class EarlyStopping:
+    """Patience / min_delta policy on one metric of the global test results"""
+
+    def __init__(self, settings, state=None):
+        self.settings = settings
+        self.best_round = None
+        self.best_value = None
+        self.best_results = None
+        self.rounds_without_improvement = 0
+        self.last_round = None
+        if state and state.get("metric") == settings.metric:
+            self.best_round = state.get("best_round")
+            self.best_value = state.get("best_value")
+            self.best_results = state.get("best_results")
+            self.rounds_without_improvement = int(state.get("rounds_without_improvement", 0))
+            self.last_round = state.get("last_round")
+
+    def update(self, round, round_results):
+        """
+        Takes the test results of a round.
+
+        Returns:
+            bool: True if the round is the new best one and its model should be checkpointed.
+        """
+        value = (round_results or {}).get(self.settings.metric)
+        # rounds without test results say nothing, a round resumed after it was counted is not counted twice
+        if value is None or (self.last_round is not None and round <= self.last_round):
+            return False
+        self.last_round = round
+
+        if self.best_value is None or self._improves(float(value)):
+            self.best_round = round
+            self.best_value = float(value)
+            self.best_results = round_results
+            self.rounds_without_improvement = 0
+            return True
+        self.rounds_without_improvement += 1
+        return False
+
+    def _improves(self, value):
+        if self.settings.mode == MODE_MIN:
+            return value < self.best_value - self.settings.min_delta
+        return value > self.best_value + self.settings.min_delta
+
+    @property
+    def should_stop(self):
+        return self.rounds_without_improvement >= self.settings.patience
+
+    def state(self):
+        """Saved with the test results, see Test.save_test_results"""
+        return {
+            "metric": self.settings.metric,
+            "mode": self.settings.mode,
+            "patience": self.settings.patience,
+            "min_delta": self.settings.min_delta,
+            "best_round": self.best_round,
+            "best_value": self.best_value,
+            # all test metrics of the checkpointed round (best_round is the session round)
+            "best_results": self.best_results,
+            "rounds_without_improvement": self.rounds_without_improvement,
+            "last_round": self.last_round,
+        }
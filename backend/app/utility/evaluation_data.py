@@ -0,0 +1,130 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+"""
+Process-wide cache of the global test sets used to evaluate the aggregated models.
+
+Test sets live in utility/global_test_data/<dataset code>/X_test.npy and Y_test.npy, where
+the dataset code is Dataset.code of the session's dataset (federated_info['dataset_info']['dataset_code']).
+Sessions without a code, or codes without their own folder, use the files directly inside
+utility/global_test_data. The arrays are memory-mapped read-only, so sessions evaluating
+against the same data share the pages instead of loading a copy every round, and
+predictions run on batched views of the mapping.
+"""
+
+GLOBAL_TEST_DATA_DIR = os.path.join("utility", "global_test_data")
+DEFAULT_DATASET_KEY = "default"
+
+
+def evaluation_dataset_code(model_config):
+    """Dataset code of a session's federated_info, None if the session did not set one"""
+    dataset_info = (model_config or {}).get("dataset_info") or {}
+    return dataset_info.get("dataset_code") or None
+
+
+def _load_array(path):
+    """
+    Memory-maps a numeric .npy file.
+
+    Raises:
+        ValueError: for object arrays, loading them would unpickle the file. Convert them to a
+            numeric dtype offline, e.g. np.save(path, np.load(path, allow_pickle=True).astype(np.float32)).
+    """
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError as e:
+        raise ValueError(f"Test data {path} can not be memory-mapped, it must be a numeric array without pickled objects: {e}") from e
+
+
+class EvaluationDataset:
+    """Read-only test set of one dataset code"""
+
+    def __init__(self, key, data_dir, X, Y, mtime):
+        if len(X) != len(Y):
+            raise ValueError(f"Test data of '{key}' has {len(X)} samples but {len(Y)} labels.")
+        self.key = key
+        self.data_dir = data_dir
+        self.X = X
+        self.Y = Y
+        self.mtime = mtime
+        self.nbytes = X.nbytes + Y.nbytes
+
+    def __len__(self):
+        return len(self.X)
+
+    def batches(self, batch_size):
+        """Yields (X, Y) views of at most batch_size samples, nothing is copied"""
+        batch_size = max(1, int(batch_size))
+        for start in range(0, len(self.X), batch_size):
+            yield self.X[start:start + batch_size], self.Y[start:start + batch_size]
+
+
+class EvaluationDataCache:
+    """
+    LRU cache of EvaluationDatasets bounded by the total size of the cached arrays.
+
+    Args:
+        max_bytes (int): memory budget, the least recently used datasets are dropped past it.
+            The dataset just requested is always kept, even if it alone exceeds the budget.
+        data_dir (str): folder holding the test sets.
+    """
+
+    def __init__(self, max_bytes, data_dir=GLOBAL_TEST_DATA_DIR):
+        self.max_bytes = max_bytes
+        self.data_dir = data_dir
+        self._datasets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _resolve_dir(self, dataset_code):
+        if dataset_code:
+            root = os.path.abspath(self.data_dir)
+            data_dir = os.path.abspath(os.path.join(root, str(dataset_code)))
+            # the code comes from the session's federated_info, '..' or an absolute path must not
+            # reach files outside the test data
+            if data_dir == root or os.path.commonpath([root, data_dir]) != root:
+                raise ValueError(f"Invalid dataset code {dataset_code!r}, it must name a folder inside {self.data_dir}")
+            if os.path.isdir(data_dir):
+                return str(dataset_code), data_dir
+        return DEFAULT_DATASET_KEY, self.data_dir
+
+    def get(self, dataset_code=None):
+        """
+        Returns the EvaluationDataset of a dataset code.
+
+        Raises:
+            FileNotFoundError: if the test set files do not exist.
+            ValueError: for a dataset code that points outside data_dir.
+        """
+        key, data_dir = self._resolve_dir(dataset_code)
+        x_path = os.path.join(data_dir, "X_test.npy")
+        y_path = os.path.join(data_dir, "Y_test.npy")
+        mtime = max(os.path.getmtime(x_path), os.path.getmtime(y_path))
+
+        with self._lock:
+            dataset = self._datasets.pop(key, None)
+            # files replaced on disk are mapped again
+            if dataset is None or dataset.mtime != mtime:
+                dataset = EvaluationDataset(key, data_dir, _load_array(x_path), _load_array(y_path), mtime)
+                print(f"Loaded test data '{key}' ({len(dataset)} samples)")
+            self._datasets[key] = dataset
+            self._evict()
+            return dataset
+
+    def _evict(self):
+        total = sum(dataset.nbytes for dataset in self._datasets.values())
+        while total > self.max_bytes and len(self._datasets) > 1:
+            _, dataset = self._datasets.popitem(last=False)
+            total -= dataset.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._datasets.clear()
+
+
+evaluation_data_cache = EvaluationDataCache(int(os.getenv("EVAL_DATA_CACHE_MAX_BYTES", 1024 ** 3)))
+EVAL_BATCH_SIZE = int(os.getenv("EVAL_BATCH_SIZE", 4096))
@@ -0,0 +1,68 @@
+import math
+from typing import NamedTuple, Optional
+from .ModelBuilder import AGGREGATION_FEDBUFF, session_aggregation
+
+"""
+Buffered asynchronous aggregation (FedBuff), training_config['aggregation'] = "fedbuff".
+
+There is no round barrier. Clients train on the newest global_parameters they can get and
+upload with the global_version they started from as 'base_version'. Once 'buffer_size'
+updates are buffered, the server folds them into the global model:
+
+    new = global + server_lr * sum_i s_i * delta_i / K,    s_i = 1 / sqrt(1 + staleness_i)
+
+staleness_i is how many global versions were published since the client's base version.
+Updates staler than 'max_staleness' are dropped. Sparse deltas are exact deltas against their
+base. Dense uploads are full models, their delta is taken against the current global model.
+
+Every fold is one "round" of the session (curr_round, test results) and max_round limits
+the number of folds.
+"""
+
+DEFAULT_BUFFER_SIZE = 10
+DEFAULT_SERVER_LR = 1.0
+
+
+class FedBuffSettings(NamedTuple):
+    buffer_size: int
+    server_lr: float
+    max_staleness: Optional[int]
+
+
+def fedbuff_settings(modelConfig, num_clients=None):
+    """
+    FedBuff options of a session's federated_info, None for sessions with a round barrier.
+
+    Args:
+        num_clients (int, optional): training clients (status 4) of the session, the buffer never
+            waits for more updates than they can send.
+
+    Raises:
+        ValueError: for invalid options.
+    """
+    if session_aggregation(modelConfig) != AGGREGATION_FEDBUFF:
+        return None
+    training_config = modelConfig.get("training_config") or {}
+
+    buffer_size = int(training_config.get("buffer_size", DEFAULT_BUFFER_SIZE))
+    server_lr = float(training_config.get("server_lr", DEFAULT_SERVER_LR))
+    max_staleness = training_config.get("max_staleness")
+    max_staleness = int(max_staleness) if max_staleness not in (None, "") else None
+    if buffer_size < 1:
+        raise ValueError(f"buffer_size must be at least 1, got {buffer_size}")
+    if server_lr <= 0:
+        raise ValueError(f"server_lr must be positive, got {server_lr}")
+    if max_staleness is not None and max_staleness < 0:
+        raise ValueError(f"max_staleness must not be negative, got {max_staleness}")
+
+    if num_clients:
+        buffer_size = min(buffer_size, num_clients)
+    return FedBuffSettings(buffer_size, server_lr, max_staleness)
+
+
+def staleness_weight(staleness):
+    return 1 / math.sqrt(1 + staleness)
+
+
+def is_too_stale(staleness, settings):
+    return settings.max_staleness is not None and staleness > settings.max_staleness
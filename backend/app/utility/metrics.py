@@ -1,5 +1,8 @@
 import numpy as np
 
+# np.trapz was renamed in numpy 2.0 and removed later
+_trapezoid = getattr(np, "trapezoid", None) or np.trapz
+
 
 def mean_squared_error(y_true, y_pred):
     return np.mean((y_true - y_pred) ** 2)
@@ -56,7 +59,7 @@ def auc_score(y_true, y_pred):
     fpr = fps / fps[-1]
     tpr = tps / tps[-1]
 
-    area = np.trapz(tpr, fpr)
+    area = _trapezoid(tpr, fpr)
     return area
 
 
@@ -106,3 +109,297 @@ def calculate_metrics(y_true, y_pred, metrics):
     except Exception as e:
         print(f"Error calculating metrics: {e}")
         return None
+
+
+"""
+Streaming accumulators for evaluating large test sets batch by batch.
+
+Each accumulator keeps O(1) state (O(#distinct scores) for the exact AUC) and exposes
+update(y_true, y_pred) for a batch, merge(other) to combine partial results, e.g. from
+several worker processes, and result(). They reproduce the functions above on the
+concatenated batches.
+"""
+
+
+def _as_batch(y_true, y_pred, scores=False):
+    """
+    Flat float arrays of one batch, a single prediction is broadcast like in the functions above.
+
+    Class probabilities (n, k) of a classifier (e.g. a CNN with a softmax output) become the
+    predicted classes, one-hot labels their class index. With scores=True (auc, log_loss) a
+    two-class output gives the probability of class 1 instead.
+
+    Raises:
+        ValueError: if the predictions do not fit the labels.
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    if y_true.ndim == 2 and y_true.shape[1] > 1:
+        y_true = y_true.argmax(axis=1)
+    if y_pred.ndim == 2 and y_pred.shape[1] > 1:
+        y_pred = y_pred[:, 1] if scores and y_pred.shape[1] == 2 else y_pred.argmax(axis=1).astype(np.float64)
+
+    y_true = y_true.reshape(-1)
+    y_pred = y_pred.reshape(-1)
+    if y_pred.size != y_true.size:
+        if y_pred.size != 1:
+            raise ValueError(f"Predictions of shape {y_pred.shape} do not match labels of shape {y_true.shape}.")
+        y_pred = np.broadcast_to(y_pred, y_true.shape)
+    return y_true, y_pred
+
+
+class RunningMoments:
+    """Count, mean and sum of squared deviations (Chan et al.), merged without loss of precision"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        if values.size == 0:
+            return
+        other = RunningMoments()
+        other.count = values.size
+        other.mean = float(values.mean())
+        other.m2 = float(np.sum((values - other.mean) ** 2))
+        self.merge(other)
+
+    def merge(self, other):
+        count = self.count + other.count
+        if count == 0:
+            return self
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count else float("nan")
+
+
+class ConfusionAccumulator:
+    """Counts behind accuracy, precision, recall and f1_score (class 1 is the positive class)"""
+
+    def __init__(self):
+        self.count = 0
+        self.correct = 0
+        self.true_positive = 0
+        self.predicted_positive = 0
+        self.actual_positive = 0
+
+    def update(self, y_true, y_pred):
+        y_true, y_pred = _as_batch(y_true, y_pred)
+        self.count += y_true.size
+        self.correct += int(np.sum(y_true == y_pred))
+        self.true_positive += int(np.sum((y_true == 1) & (y_pred == 1)))
+        self.predicted_positive += int(np.sum(y_pred == 1))
+        self.actual_positive += int(np.sum(y_true == 1))
+
+    def merge(self, other):
+        self.count += other.count
+        self.correct += other.correct
+        self.true_positive += other.true_positive
+        self.predicted_positive += other.predicted_positive
+        self.actual_positive += other.actual_positive
+        return self
+
+    def result(self):
+        precision = self.true_positive / self.predicted_positive if self.predicted_positive else 0
+        recall = self.true_positive / self.actual_positive if self.actual_positive else 0
+        return {
+            "accuracy": self.correct / self.count if self.count else float("nan"),
+            "precision": precision,
+            "recall": recall,
+            "f1_score": 2 * (precision * recall) / (precision + recall) if (precision + recall) else 0,
+        }
+
+
+class RegressionAccumulator:
+    """Running sums behind mse, mae, rmse, msle, mape and r2_score"""
+
+    def __init__(self):
+        self.count = 0
+        self.squared_error = 0.0
+        self.absolute_error = 0.0
+        self.squared_log_error = 0.0
+        self.absolute_percentage_error = 0.0
+        self.y_true = RunningMoments()
+        self.residuals = RunningMoments()
+
+    def update(self, y_true, y_pred):
+        y_true, y_pred = _as_batch(y_true, y_pred)
+        residuals = y_true - y_pred
+        self.count += y_true.size
+        self.squared_error += float(np.sum(residuals ** 2))
+        self.absolute_error += float(np.sum(np.abs(residuals)))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.squared_log_error += float(np.sum((np.log1p(y_true) - np.log1p(y_pred)) ** 2))
+            self.absolute_percentage_error += float(np.sum(np.abs(residuals / y_true)))
+        self.y_true.update(y_true)
+        self.residuals.update(residuals)
+
+    def merge(self, other):
+        self.count += other.count
+        self.squared_error += other.squared_error
+        self.absolute_error += other.absolute_error
+        self.squared_log_error += other.squared_log_error
+        self.absolute_percentage_error += other.absolute_percentage_error
+        self.y_true.merge(other.y_true)
+        self.residuals.merge(other.residuals)
+        return self
+
+    def result(self):
+        count = self.count or float("nan")
+        mse = self.squared_error / count
+        return {
+            "mse": mse,
+            "mae": self.absolute_error / count,
+            "rmse": np.sqrt(mse),
+            "msle": self.squared_log_error / count,
+            "mape": self.absolute_percentage_error / count * 100,
+            "r2_score": 1 - (self.residuals.variance / self.y_true.variance),
+        }
+
+
+class LogLossAccumulator:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+
+    def update(self, y_true, y_pred):
+        y_true, y_pred = _as_batch(y_true, y_pred, scores=True)
+        y_pred = np.clip(y_pred, 1e-15, 1 - 1e-15)
+        self.count += y_true.size
+        self.total += float(np.sum(y_true * np.log(y_pred) + (1 - y_true) * np.log(1 - y_pred)))
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        return self
+
+    def result(self):
+        return -self.total / self.count if self.count else float("nan")
+
+
+class AUCAccumulator:
+    """
+    Positive / negative label counts per score, the ROC curve is built from them in result().
+
+    Args:
+        bins (int, optional): None keeps one entry per distinct score, which is exact and small
+            for models predicting labels. With bins, scores are clipped to [0, 1] and counted in
+            a fixed histogram, so the state stays constant for continuous scores (approximate AUC).
+    """
+
+    def __init__(self, bins=None):
+        self.bins = bins
+        if bins is None:
+            self.scores = np.empty(0, dtype=np.float64)
+            self.positives = np.empty(0, dtype=np.float64)
+            self.negatives = np.empty(0, dtype=np.float64)
+        else:
+            self.scores = (np.arange(bins, dtype=np.float64) + 0.5) / bins
+            self.positives = np.zeros(bins, dtype=np.float64)
+            self.negatives = np.zeros(bins, dtype=np.float64)
+
+    def _add(self, scores, positives, negatives):
+        if self.bins is None:
+            scores, inverse = np.unique(np.concatenate((self.scores, scores)), return_inverse=True)
+            counts = np.zeros((2, scores.size), dtype=np.float64)
+            np.add.at(counts[0], inverse, np.concatenate((self.positives, positives)))
+            np.add.at(counts[1], inverse, np.concatenate((self.negatives, negatives)))
+            self.scores, self.positives, self.negatives = scores, counts[0], counts[1]
+        else:
+            indices = np.clip((np.clip(scores, 0, 1) * self.bins).astype(np.int64), 0, self.bins - 1)
+            np.add.at(self.positives, indices, positives)
+            np.add.at(self.negatives, indices, negatives)
+
+    def update(self, y_true, y_pred):
+        y_true, y_pred = _as_batch(y_true, y_pred, scores=True)
+        self._add(y_pred, y_true, 1 - y_true)
+
+    def merge(self, other):
+        if self.bins != other.bins:
+            raise ValueError("Can not merge AUC accumulators with different bins.")
+        self._add(other.scores, other.positives, other.negatives)
+        return self
+
+    def result(self):
+        # thresholds from the highest score down, as in auc_score
+        occupied = (self.positives + self.negatives) > 0
+        tps = np.cumsum(self.positives[occupied][::-1])
+        fps = np.cumsum(self.negatives[occupied][::-1])
+
+        if tps.size == 0 or fps[0] == 0:
+            return 0.0
+
+        fpr = fps / fps[-1]
+        tpr = tps / tps[-1]
+        return float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
+
+
+_CLASSIFICATION_METRICS = ("accuracy", "precision", "recall", "f1_score")
+_REGRESSION_METRICS = ("mse", "mae", "rmse", "msle", "mape", "r2_score")
+
+
+class MetricsAccumulator:
+    """
+    Streaming counterpart of calculate_metrics, only the accumulators the metrics need are kept.
+
+    Args:
+        metrics (list): metric names as accepted by calculate_metrics.
+        auc_bins (int, optional): histogram bins for auc, None for the exact AUC.
+    """
+
+    def __init__(self, metrics, auc_bins=None):
+        self.metrics = list(metrics)
+        self.accumulators = {}
+        for metric in self.metrics:
+            if metric in _CLASSIFICATION_METRICS:
+                self.accumulators.setdefault("confusion", ConfusionAccumulator())
+            elif metric in _REGRESSION_METRICS:
+                self.accumulators.setdefault("regression", RegressionAccumulator())
+            elif metric == "auc":
+                self.accumulators.setdefault("auc", AUCAccumulator(auc_bins))
+            elif metric == "log_loss":
+                self.accumulators.setdefault("log_loss", LogLossAccumulator())
+
+    def update(self, y_true, y_pred):
+        for accumulator in self.accumulators.values():
+            accumulator.update(y_true, y_pred)
+
+    def merge(self, other):
+        for name, accumulator in other.accumulators.items():
+            if name in self.accumulators:
+                self.accumulators[name].merge(accumulator)
+            else:
+                self.accumulators[name] = accumulator
+        return self
+
+    def result(self):
+        try:
+            values = {}
+            if "confusion" in self.accumulators:
+                values.update(self.accumulators["confusion"].result())
+            if "regression" in self.accumulators:
+                values.update(self.accumulators["regression"].result())
+            if "auc" in self.accumulators:
+                values["auc"] = self.accumulators["auc"].result()
+            if "log_loss" in self.accumulators:
+                values["log_loss"] = self.accumulators["log_loss"].result()
+
+            results = {}
+            for metric in self.metrics:
+                if metric in values:
+                    results[metric] = round(float(values[metric]), 3)
+                else:
+                    print(f"Unknown metric: {metric}")
+            return results
+
+        except Exception as e:
+            print(f"Error calculating metrics: {e}")
+            return None
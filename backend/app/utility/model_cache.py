@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from .ModelBuilder import model_instance_from_config
+from .parameters import flatten_parameters
+
+load_dotenv()
+
+"""
+Process-wide cache of built models for the global evaluation.
+
+Models are built for inference (CNN sessions use the NumPy NumpyCNN, see ModelBuilder).
+Building a model (for CustomCNN: constructing and compiling the Keras graph) only depends on
+federated_info['model_name'] and ['model_info'], so sessions with the same architecture share
+built instances. Evaluation swaps in the session's weights with update_parameters anyway.
+An instance is checked out by one evaluation at a time, concurrent evaluations of the same
+architecture get instances of their own. Idle instances are evicted least recently used first,
+beyond MODEL_CACHE_MAX_ENTRIES instances or MODEL_CACHE_MAX_BYTES of parameters.
+"""
+
+
+def model_config_key(model_config):
+    """Canonical hash of the parts of federated_info that decide how the model is built"""
+    canonical = json.dumps(
+        {"model_name": model_config["model_name"], "model_info": model_config["model_info"]},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _parameter_nbytes(model):
+    """Size of the model's parameters, 0 while it has none"""
+    try:
+        buffer, _ = flatten_parameters(model.get_parameters(), dtype=None)
+        return buffer.nbytes
+    except Exception:
+        return 0
+
+
+class ModelCache:
+    def __init__(self, max_entries=8, max_bytes=512 * 1024 ** 2):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # idle instances, entry id -> (config key, model, nbytes), most recently used last
+        self._idle = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _take_idle(self, key):
+        for entry_id in reversed(self._idle):
+            if self._idle[entry_id][0] == key:
+                return self._idle.pop(entry_id)[1]
+        return None
+
+    @contextmanager
+    def checkout(self, model_config):
+        """
+        Yields a built model for the config (None if it can not be built) and returns it to the
+        cache afterwards. The caller must set the weights it needs, e.g. with update_parameters.
+        """
+        key = model_config_key(model_config)
+        with self._lock:
+            model = self._take_idle(key)
+
+        if model is None:
+            model = model_instance_from_config(model_config, inference=True)
+            if model is None:
+                yield None
+                return
+            print("Testing model built successfully")
+
+        yield model
+        # not reached if the evaluation raised, a possibly half updated instance is dropped
+        self._check_in(key, model)
+
+    def _check_in(self, key, model):
+        nbytes = _parameter_nbytes(model)
+        with self._lock:
+            self._idle[self._next_id] = (key, model, nbytes)
+            self._next_id += 1
+            self._evict()
+
+    def _evict(self):
+        total = sum(nbytes for _, _, nbytes in self._idle.values())
+        while self._idle and (len(self._idle) > self.max_entries or total > self.max_bytes):
+            _, (_, _, nbytes) = self._idle.popitem(last=False)
+            total -= nbytes
+
+    def clear(self):
+        with self._lock:
+            self._idle.clear()
+
+
+model_cache = ModelCache(
+    int(os.getenv("MODEL_CACHE_MAX_ENTRIES", 8)),
+    int(os.getenv("MODEL_CACHE_MAX_BYTES", 512 * 1024 ** 2)),
+)
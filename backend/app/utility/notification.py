@@ -1,42 +1,85 @@
 from datetime import datetime, timedelta
 from typing import List, Union
+from sqlalchemy import insert, literal, select
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import and_
 
 from helpers import date
-from models.Notification import Notification
+from models.Notification import NotificationMessage, NotificationRecipient
 from models.User import User
+from utility.notification_hub import notification_hub
+
+"""
+Notifications are stored as one NotificationMessage holding the payload, plus one small
+NotificationRecipient row per user. Fanning a message out to many users is a single
+multi-row insert and never copies the payload per user.
+"""
+
+def create_notification_message(db: Session, message: dict, valid_until: datetime = None) -> NotificationMessage:
+    notification_message = NotificationMessage(
+        message=message,
+        created_at=datetime.now(),
+        valid_until=valid_until
+    )
+    db.add(notification_message)
+    # Flush to get the id for the recipient rows
+    db.flush()
+    return notification_message
+
+def publish_notification(notification_message: NotificationMessage, user_ids: List[int]):
+    """Push a committed message to the users' open notification streams"""
+    notification_hub.publish(user_ids, {
+        "id": notification_message.id,
+        "message": notification_message.message,
+        "valid_until": notification_message.valid_until
+    })
 
 def add_notifications_for_recently_active_users(db: Session, message: dict, valid_until: datetime = None, excluded_users: List[User]  = []):
     # Calculate the time 24 hours ago
     last_updated_at = datetime.now() - timedelta(days=1)
 
-    # Fetch users whose updatedAt is within the last 24 hours
-    users_to_notify = db.query(User).filter(and_(
+    notification_message = create_notification_message(db, message, valid_until)
+
+    # Users whose updatedAt is within the last 24 hours become recipients with one INSERT ... SELECT
+    users_to_notify = select(literal(notification_message.id), User.id).where(and_(
         User.updatedAt >= last_updated_at,
         ~User.id.in_([user.id for user in excluded_users])
-    )).all()
-    
-    add_notifications_for(db, message, users_to_notify, valid_until)
+    ))
+    db.execute(
+        insert(NotificationRecipient).from_select(["message_id", "user_id"], users_to_notify)
+    )
 
-    # Optionally, return the newly added notifications (for debugging or logging purposes)
-    return users_to_notify
+    # Only the recipients with an open stream in this process need a push
+    connected_recipients = db.execute(
+        select(NotificationRecipient.user_id).where(and_(
+            NotificationRecipient.message_id == notification_message.id,
+            NotificationRecipient.user_id.in_(notification_hub.connected_user_ids())
+        ))
+    ).scalars().all()
+
+    # Commit the changes to the database
+    db.commit()
+    publish_notification(notification_message, connected_recipients)
+
+    return notification_message
 
 def add_notifications_for(db: Session, message: dict, users_to_notify: Union[List[int], List[User]], valid_until: datetime = None):
 
-    # Create a new notification for each user
-    for user in users_to_notify:
-        user_id = user if isinstance(user, int) else user.id
-        new_notification = Notification(
-            user_id=user_id,
-            message=message,
-            created_at=datetime.now(),
-            valid_until=valid_until
+    user_ids = [user if isinstance(user, int) else user.id for user in users_to_notify]
+    notification_message = create_notification_message(db, message, valid_until)
+
+    # One multi-row insert for all recipients
+    if user_ids:
+        db.execute(
+            insert(NotificationRecipient),
+            [{"message_id": notification_message.id, "user_id": user_id} for user_id in user_ids]
         )
-        db.add(new_notification)
 
     # Commit the changes to the database
     db.commit()
+    publish_notification(notification_message, user_ids)
+
+    return notification_message
     
 def add_notifications_for_user(db: Session, user_id: int, message: dict, valid_until: datetime = None):
     """
@@ -48,14 +91,4 @@ def add_notifications_for_user(db: Session, user_id: int, message: dict, valid_u
         message (dict): The message to send as a notification.
         valid_until (datetime, optional): The expiry time of the notification. Defaults to None.
     """
-    # Create a new notification for the specific user
-    new_notification = Notification(
-        user_id=user_id,
-        message=message,
-        created_at=datetime.now(),
-        valid_until=valid_until
-    )
-    db.add(new_notification)
-
-    # Commit the changes to the database
-    db.commit()
+    return add_notifications_for(db, message, [user_id], valid_until)
@@ -0,0 +1,57 @@
+import asyncio
+from typing import Iterable
+
+
+class NotificationHub:
+    """
+    In-process pub/sub between the code adding notifications and the open SSE streams.
+
+    add_notifications_for / add_notifications_for_user publish every committed notification
+    here, and each /notifications/stream connection awaits its own queue instead of polling
+    the DB. publish() may be called from the event loop or from threadpool handlers.
+    """
+
+    def __init__(self):
+        self._subscribers: dict[int, set[asyncio.Queue]] = {}
+        self._loop = None
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        queues = self._subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+    def connected_user_ids(self) -> list[int]:
+        """Users with an open stream in this process"""
+        return list(self._subscribers)
+
+    def publish(self, user_ids: Iterable[int], notification: dict):
+        """Push a committed notification ({'id', 'message', 'valid_until'}) to the users' open streams"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        user_ids = list(user_ids)
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is loop:
+            self._deliver(user_ids, notification)
+        else:
+            loop.call_soon_threadsafe(self._deliver, user_ids, notification)
+
+    def _deliver(self, user_ids, notification):
+        for user_id in user_ids:
+            for queue in self._subscribers.get(user_id, ()):
+                queue.put_nowait(notification)
+
+
+notification_hub = NotificationHub()
@@ -0,0 +1,135 @@
+import numpy as np
+
+"""
+Helpers to move model parameters between the nested-list form the models exchange
+(e.g. {'weights': [[kernel, bias], ...]}) and a single contiguous NumPy buffer.
+
+A parameter tree is made of dicts, lists and tensors. Every rectangular, numeric
+sub-list is one tensor; ragged lists (like a CNN layer's [kernel, bias]) are containers.
+The ParameterManifest records the path and shape of every tensor in traversal order,
+which is all that is needed to rebuild the tree from the flat buffer.
+"""
+
+
+class ParameterManifest:
+    def __init__(self, entries):
+        # entries: list of (path, shape), path is a tuple of dict keys (str) / list indices (int)
+        self.entries = [(tuple(path), tuple(int(dim) for dim in shape)) for path, shape in entries]
+        self.sizes = [int(np.prod(shape, dtype=np.int64)) for _, shape in self.entries]
+        self.offsets = np.concatenate(([0], np.cumsum(self.sizes, dtype=np.int64))).tolist()
+        self.size = self.offsets[-1]
+
+    def __eq__(self, other):
+        return isinstance(other, ParameterManifest) and self.entries == other.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def to_json(self):
+        return [[list(path), list(shape)] for path, shape in self.entries]
+
+    @classmethod
+    def from_json(cls, data):
+        return cls([(path, shape) for path, shape in data])
+
+
+def _probe_shape(node):
+    """Shape suggested by following the first element at every level (no copying)"""
+    shape = []
+    while isinstance(node, (list, tuple)):
+        shape.append(len(node))
+        if not node:
+            break
+        node = node[0]
+    if isinstance(node, np.ndarray):
+        shape.extend(node.shape)
+    elif isinstance(node, dict):
+        return None
+    return tuple(shape)
+
+
+def _as_tensor(node, dtype):
+    """Returns node as an ndarray if it is a rectangular numeric tensor, otherwise None"""
+    if isinstance(node, np.ndarray):
+        return node
+    if isinstance(node, dict):
+        return None
+    if isinstance(node, (list, tuple)) and node and isinstance(node[0], (list, tuple, np.ndarray, dict)):
+        # siblings with different shapes (e.g. [kernel, bias]) can never form one tensor
+        first_shape = _probe_shape(node[0])
+        if first_shape is None or any(_probe_shape(child) != first_shape for child in node[1:]):
+            return None
+    try:
+        return np.asarray(node, dtype=dtype)
+    except (ValueError, TypeError):
+        return None
+
+
+def iter_tensors(parameters, dtype=np.float64, path=()):
+    """Yields (path, ndarray) for every tensor of the parameter tree in a stable order"""
+    if isinstance(parameters, dict):
+        for key in parameters:
+            yield from iter_tensors(parameters[key], dtype, path + (key,))
+        return
+
+    tensor = _as_tensor(parameters, dtype)
+    if tensor is not None:
+        yield path, tensor
+        return
+
+    for index, child in enumerate(parameters):
+        yield from iter_tensors(child, dtype, path + (index,))
+
+
+def flatten_parameters(parameters, dtype=np.float64):
+    """
+    Flattens a parameter tree into one contiguous buffer.
+
+    Args:
+        parameters: parameter tree (dict / list of nested lists or ndarrays).
+        dtype: dtype of the buffer, None keeps float32 if every tensor is float32 and uses float64 otherwise.
+
+    Returns:
+        (np.ndarray, ParameterManifest): 1-D buffer of `dtype` and the manifest to rebuild the tree.
+    """
+    tensors = list(iter_tensors(parameters, dtype))
+    if dtype is None:
+        all_float32 = tensors and all(tensor.dtype == np.float32 for _, tensor in tensors)
+        dtype = np.float32 if all_float32 else np.float64
+    manifest = ParameterManifest([(path, tensor.shape) for path, tensor in tensors])
+    buffer = np.empty(manifest.size, dtype=dtype)
+    for (_, tensor), start, size in zip(tensors, manifest.offsets, manifest.sizes):
+        buffer[start:start + size] = tensor.reshape(-1)
+    return buffer, manifest
+
+
+def split_buffer(buffer, manifest):
+    """Yields (path, view) for every tensor in the buffer, views are reshaped but not copied"""
+    for (path, shape), start, size in zip(manifest.entries, manifest.offsets, manifest.sizes):
+        yield path, buffer[start:start + size].reshape(shape)
+
+
+def unflatten_parameters(buffer, manifest):
+    """Rebuilds the nested-list parameter tree (as sent to the clients) from a flat buffer"""
+    root = None
+    for path, tensor in split_buffer(buffer, manifest):
+        value = tensor.tolist()
+        if not path:
+            return value
+        if root is None:
+            root = {} if isinstance(path[0], str) else []
+
+        node = root
+        for key, next_key in zip(path[:-1], path[1:]):
+            if isinstance(node, dict):
+                if key not in node:
+                    node[key] = {} if isinstance(next_key, str) else []
+            elif key == len(node):
+                node.append({} if isinstance(next_key, str) else [])
+            node = node[key]
+
+        if isinstance(node, dict):
+            node[path[-1]] = value
+        else:
+            node.append(value)
+    return root if root is not None else {}
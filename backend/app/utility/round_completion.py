@@ -0,0 +1,76 @@
+import math
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+"""
+Round completion of synchronous sessions, set in federated_info['training_config']:
+
+    round_deadline  seconds after the training signal, None (default) waits for every client
+    min_quorum      fraction of the training clients whose updates are needed once the deadline
+                    has passed (default 1.0)
+    late_updates    "discard" (default) rejects updates for a closed round with a 409,
+                    "carry" stores them for the next round
+
+A round closes as soon as every training client (status 4) has uploaded, or once the deadline
+has passed and the quorum is met. It never closes without at least one update. Every upload is recorded in the client's round_history
+(seconds after the round started and whether it was late), clients that never uploaded get a
+missed entry when the round closes. Operators can tune the deadline from that history.
+"""
+
+LATE_UPDATES_DISCARD = "discard"
+LATE_UPDATES_CARRY = "carry"
+
+
+class RoundSettings(NamedTuple):
+    deadline: Optional[float]
+    min_quorum: float
+    late_updates: str
+
+    def quorum(self, num_clients):
+        """Number of updates needed to close the round after the deadline, never less than one"""
+        return max(1, math.ceil(self.min_quorum * num_clients))
+
+
+def round_settings(modelConfig):
+    """
+    Round completion options of a session's federated_info.
+
+    Raises:
+        ValueError: for invalid options.
+    """
+    training_config = modelConfig.get("training_config") or {}
+
+    deadline = training_config.get("round_deadline")
+    deadline = float(deadline) if deadline not in (None, "") else None
+    min_quorum = float(training_config.get("min_quorum", 1.0))
+    late_updates = training_config.get("late_updates", LATE_UPDATES_DISCARD)
+    if deadline is not None and deadline <= 0:
+        raise ValueError(f"round_deadline must be positive, got {deadline}")
+    if not 0 < min_quorum <= 1:
+        raise ValueError(f"min_quorum must be a fraction in (0, 1], got {min_quorum}")
+    if late_updates not in (LATE_UPDATES_DISCARD, LATE_UPDATES_CARRY):
+        raise ValueError(f"Unknown late_updates: {late_updates}")
+    return RoundSettings(deadline, min_quorum, late_updates)
+
+
+def record_round_arrival(client, round, round_started_at, late, now=None):
+    """
+    Records an upload in a FederatedSessionClient's round_history, replacing a missed entry
+    of the same round. The caller commits.
+    """
+    now = now or datetime.now()
+    seconds = (now - round_started_at).total_seconds() if round_started_at else None
+    entry = {"round": round, "seconds": seconds, "late": late, "missed": False}
+    # reassign, changes inside a JSON column are not tracked
+    client.round_history = [
+        previous for previous in (client.round_history or [])
+        if previous["round"] != round
+    ] + [entry]
+
+
+def record_round_missed(client, round):
+    if any(entry["round"] == round for entry in client.round_history or []):
+        return
+    client.round_history = (client.round_history or []) + [
+        {"round": round, "seconds": None, "late": True, "missed": True}
+    ]
@@ -0,0 +1,55 @@
+from .FederatedLearning import FederatedLearning
+from .ModelBuilder import AGGREGATION_SUFFICIENT_STATISTICS, session_aggregation
+from .model_cache import model_cache
+from .evaluation_data import evaluation_dataset_code
+from .test import evaluate_model
+
+"""
+CPU heavy work of a federated round. These functions run inside the round process pool
+(helpers/round_executor.py), so they must stay importable top-level functions and only
+take / return small picklable values. The aggregated parameters never leave the worker:
+they are written to the DB by the aggregation and evaluated in the same call.
+"""
+
+def aggregate_and_test_round(session_id, model_config, metrics):
+    """
+    Aggregates the stored client updates of the current round into global_parameters and
+    tests the new global model.
+
+    Returns:
+        (bool, dict): whether the round had usable updates (otherwise global_parameters is
+        unchanged and the round has to be re-opened) and the metrics of the global model on the
+        global test set (None if it was not tested or the test data is missing).
+    """
+    if session_aggregation(model_config) == AGGREGATION_SUFFICIENT_STATISTICS:
+        aggregated_parameters = FederatedLearning().aggregate_sufficient_statistics(session_id)
+    else:
+        aggregated_parameters = FederatedLearning().aggregate_weights_fedAvg_Neural(session_id)
+    if aggregated_parameters is None:
+        return False, None
+
+    return True, _test_global_model(model_config, aggregated_parameters, metrics)
+
+
+def aggregate_and_test_buffer(session_id, model_config, metrics):
+    """
+    Folds the buffered updates of an asynchronous (fedbuff) session into the global model
+    and tests it.
+
+    Returns:
+        (bool, dict, list): whether a new global model was published, its metrics (None if it
+        was not tested) and the users whose updates were consumed.
+    """
+    aggregated_parameters, user_ids = FederatedLearning().aggregate_buffered_updates(session_id)
+    if aggregated_parameters is None:
+        return False, None, user_ids
+    return True, _test_global_model(model_config, aggregated_parameters, metrics), user_ids
+
+
+def _test_global_model(model_config, aggregated_parameters, metrics):
+    # built models are shared by all sessions with the same architecture in this worker
+    with model_cache.checkout(model_config) as model:
+        if model is None:
+            raise ValueError("Model not built yet...")
+        print("Testing model...")
+        return evaluate_model(model, aggregated_parameters, metrics, evaluation_dataset_code(model_config))
@@ -0,0 +1,173 @@
+import numpy as np
+from .ModelBuilder import AGGREGATION_FEDAVG, session_aggregation
+from .parameters import ParameterManifest
+from .tensor_codec import decode_flat, decode_metadata, encode_flat
+
+"""
+Server optimizers of synchronous fedavg sessions (Reddi et al., "Adaptive Federated Optimization").
+
+The average of the client models minus the current global model is used as a pseudo-gradient
+and the global model takes one optimizer step along it, selected with
+federated_info['training_config']:
+
+    server_optimizer    "fedavg" (default, the average becomes the global model), "fedavgm",
+                        "fedadam" or "fedyogi"
+    server_lr           step size (default 1.0 for fedavg / fedavgm, 0.01 for fedadam / fedyogi)
+    server_momentum     momentum / first moment decay (default 0.9)
+    server_beta2        second moment decay of fedadam / fedyogi (default 0.99)
+    server_tau          adaptivity of fedadam / fedyogi (default 1e-3)
+
+Everything works on the flat parameter buffers (see parameters.py). The optimizer state (moments
+and step count) is stored per session in FederatedSession.optimizer_state in the binary tensor
+format, next to global_parameters. It also records the round of the step and the global_version
+its result was published as, so a round aggregated again after its commit (a worker that lost
+its lease) is not stepped twice, see step_committed.
+"""
+
+SERVER_OPTIMIZER_FEDAVG = "fedavg"
+SERVER_OPTIMIZER_FEDAVGM = "fedavgm"
+SERVER_OPTIMIZER_FEDADAM = "fedadam"
+SERVER_OPTIMIZER_FEDYOGI = "fedyogi"
+
+
+class ServerOptimizer:
+    # names of the per-parameter state buffers
+    state_names = ()
+
+    def __init__(self, lr=1.0):
+        self.lr = lr
+        self.step_count = 0
+        self.state = {}
+
+    def _ensure_state(self, size):
+        if any(self.state.get(name) is None or self.state[name].size != size for name in self.state_names):
+            self.state = {name: np.zeros(size, dtype=np.float64) for name in self.state_names}
+            self.step_count = 0
+
+    def step(self, global_buffer, average_buffer):
+        """
+        Returns:
+            np.ndarray: the new global model buffer.
+        """
+        global_buffer = np.asarray(global_buffer, dtype=np.float64)
+        self._ensure_state(global_buffer.size)
+        self.step_count += 1
+        pseudo_gradient = np.asarray(average_buffer, dtype=np.float64) - global_buffer
+        return global_buffer + self._update(pseudo_gradient)
+
+    def _update(self, pseudo_gradient):
+        return self.lr * pseudo_gradient
+
+    def encode_state(self, round=None, global_version=None):
+        """
+        Optimizer state in the binary tensor format, None for stateless optimizers.
+
+        Args:
+            round (int, optional): round of the last step.
+            global_version (int, optional): global_version the result of the last step is published as.
+        """
+        if not self.state:
+            return None
+        manifest = ParameterManifest([((name,), self.state[name].shape) for name in self.state_names])
+        buffer = np.concatenate([self.state[name] for name in self.state_names])
+        return encode_flat(buffer, manifest, {"step": self.step_count, "round": round, "global_version": global_version})
+
+    def load_state(self, payload):
+        if not payload or not self.state_names:
+            return
+        buffer, manifest, metadata = decode_flat(payload)
+        state = {}
+        for (path, _), start, size in zip(manifest.entries, manifest.offsets, manifest.sizes):
+            state[path[0]] = np.array(buffer[start:start + size], dtype=np.float64)
+        if set(state) == set(self.state_names):
+            self.state = state
+            self.step_count = int(metadata.get("step", 0))
+
+
+class FedAvgM(ServerOptimizer):
+    state_names = ("momentum",)
+
+    def __init__(self, lr=1.0, momentum=0.9):
+        super().__init__(lr)
+        self.momentum = momentum
+
+    def _update(self, pseudo_gradient):
+        velocity = self.state["momentum"]
+        velocity *= self.momentum
+        velocity += pseudo_gradient
+        return self.lr * velocity
+
+
+class FedAdam(ServerOptimizer):
+    state_names = ("m", "v")
+
+    def __init__(self, lr=0.01, beta1=0.9, beta2=0.99, tau=1e-3):
+        super().__init__(lr)
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.tau = tau
+
+    def _second_moment(self, v, squared):
+        v *= self.beta2
+        v += (1 - self.beta2) * squared
+
+    def _update(self, pseudo_gradient):
+        m, v = self.state["m"], self.state["v"]
+        m *= self.beta1
+        m += (1 - self.beta1) * pseudo_gradient
+        self._second_moment(v, np.square(pseudo_gradient))
+        return self.lr * m / (np.sqrt(v) + self.tau)
+
+
+class FedYogi(FedAdam):
+    def _second_moment(self, v, squared):
+        # v grows or shrinks by at most (1 - beta2) * delta^2 per round
+        v -= (1 - self.beta2) * squared * np.sign(v - squared)
+
+
+def step_committed(payload, round, global_version):
+    """
+    True if the optimizer_state payload holds the step of this round and global_parameters at
+    global_version are its result: the round was aggregated and committed already.
+    """
+    if not payload:
+        return False
+    metadata = decode_metadata(payload)
+    return metadata.get("round") == round and metadata.get("global_version") == global_version
+
+
+def server_optimizer_from_config(modelConfig):
+    """
+    Server optimizer of a session's federated_info, None for plain fedavg.
+
+    Raises:
+        ValueError: for an unknown optimizer or invalid options.
+    """
+    training_config = modelConfig.get("training_config") or {}
+    name = training_config.get("server_optimizer", SERVER_OPTIMIZER_FEDAVG)
+    if name == SERVER_OPTIMIZER_FEDAVG:
+        return None
+    if name not in (SERVER_OPTIMIZER_FEDAVGM, SERVER_OPTIMIZER_FEDADAM, SERVER_OPTIMIZER_FEDYOGI):
+        raise ValueError(f"Unknown server_optimizer: {name}")
+    if session_aggregation(modelConfig) != AGGREGATION_FEDAVG:
+        raise ValueError(f"server_optimizer {name} needs {AGGREGATION_FEDAVG} aggregation.")
+
+    adaptive = name in (SERVER_OPTIMIZER_FEDADAM, SERVER_OPTIMIZER_FEDYOGI)
+    lr = float(training_config.get("server_lr", 0.01 if adaptive else 1.0))
+    momentum = float(training_config.get("server_momentum", 0.9))
+    if lr <= 0:
+        raise ValueError(f"server_lr must be positive, got {lr}")
+    if not 0 <= momentum < 1:
+        raise ValueError(f"server_momentum must be in [0, 1), got {momentum}")
+
+    if name == SERVER_OPTIMIZER_FEDAVGM:
+        return FedAvgM(lr, momentum)
+
+    beta2 = float(training_config.get("server_beta2", 0.99))
+    tau = float(training_config.get("server_tau", 1e-3))
+    if not 0 <= beta2 < 1:
+        raise ValueError(f"server_beta2 must be in [0, 1), got {beta2}")
+    if tau <= 0:
+        raise ValueError(f"server_tau must be positive, got {tau}")
+    optimizer_class = FedAdam if name == SERVER_OPTIMIZER_FEDADAM else FedYogi
+    return optimizer_class(lr, momentum, beta2, tau)
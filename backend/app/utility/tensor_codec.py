@@ -0,0 +1,272 @@
+import json
+import struct
+import numpy as np
+from typing import NamedTuple
+from .parameters import ParameterManifest, flatten_parameters, unflatten_parameters
+
+"""
+Binary wire format for model parameters (safetensors-style).
+
+    [8 bytes: header length N, little-endian uint64][N bytes: JSON header][raw little-endian tensor data]
+
+The JSON header holds the buffer dtype, the ParameterManifest (path + shape of every tensor)
+and free-form metadata (session_id, is_first, ...). All tensors share one contiguous buffer,
+so decoding is a single np.frombuffer call and the float values round-trip bit-exactly.
+
+JSON stays the default transport; clients opt in with the MEDIA_TYPE in the
+Content-Type (uploads) or Accept (downloads) header.
+
+Uploads can also be compressed (training_config['update_codec'] of the session):
+    "float16"   buffer stored as <f2
+    "int8"      per-tensor affine quantization, x ~ scale * (q - zero_point), with the
+                "scales" and "zero_points" of every tensor in the header
+decode_flat dequantizes them back to a float buffer in a few vectorized operations.
+
+Sparse deltas (training_config['update_mode'] = "sparse_delta") only carry the top-k changed
+entries relative to the global model version the client downloaded:
+    [header with "sparse": {"nnz", "index_dtype"} and metadata["base_version"]]
+    [nnz strictly increasing flat indices][nnz values]
+decode_update returns them as a SparseDelta, the server adds them onto the global model.
+"""
+
+MEDIA_TYPE = "application/x-fl-tensors"
+
+_HEADER_LENGTH = struct.Struct("<Q")
+_SUPPORTED_DTYPES = ("<f4", "<f8", "<f2", "|i1")
+
+# value dtypes of sparse deltas
+_SPARSE_DTYPES = ("<f4", "<f8", "<f2")
+_INDEX_DTYPES = ("<u4", "<i8")
+
+# update codecs a session can choose, None / "float32" / "float64" send the parameters unchanged
+UPDATE_CODECS = ("float32", "float64", "float16", "int8")
+
+
+def quantize_int8(buffer, manifest):
+    """
+    Per-tensor asymmetric int8 quantization of a flat buffer.
+
+    Returns:
+        (np.ndarray, list, list): int8 buffer, scale and zero point of every tensor.
+    """
+    buffer = np.asarray(buffer, dtype=np.float64)
+    quantized = np.empty(buffer.size, dtype=np.int8)
+    scales, zero_points = [], []
+    for start, size in zip(manifest.offsets, manifest.sizes):
+        tensor = buffer[start:start + size]
+        low = min(float(tensor.min()), 0.0) if size else 0.0
+        high = max(float(tensor.max()), 0.0) if size else 0.0
+        # the range always holds 0 so zero weights stay exactly zero
+        scale = (high - low) / 255 or 1.0
+        zero_point = int(round(-128 - low / scale))
+        quantized[start:start + size] = np.clip(np.rint(tensor / scale) + zero_point, -128, 127)
+        scales.append(scale)
+        zero_points.append(zero_point)
+    return quantized, scales, zero_points
+
+
+def dequantize_int8(quantized, scales, zero_points, manifest):
+    """Inverse of quantize_int8, every tensor's scale / zero point is repeated over its elements"""
+    sizes = np.asarray(manifest.sizes, dtype=np.int64)
+    element_scales = np.repeat(np.asarray(scales, dtype=np.float64), sizes)
+    element_zero_points = np.repeat(np.asarray(zero_points, dtype=np.float64), sizes)
+    return (quantized.astype(np.float64) - element_zero_points) * element_scales
+
+
+def encode_flat(buffer, manifest, metadata=None, codec=None):
+    """
+    Encodes an already flattened buffer with its manifest.
+
+    Args:
+        codec (str, optional): one of UPDATE_CODECS, None keeps the buffer's float32 / float64.
+    """
+    buffer = np.asarray(buffer)
+    header = {"manifest": manifest.to_json(), "metadata": metadata or {}}
+
+    if codec not in (None, *UPDATE_CODECS):
+        raise ValueError(f"Unsupported update codec: {codec}")
+    if codec == "int8":
+        buffer, header["scales"], header["zero_points"] = quantize_int8(buffer, manifest)
+        dtype = np.dtype("|i1")
+    elif codec is not None:
+        dtype = np.dtype(codec).newbyteorder("<")
+    else:
+        dtype = buffer.dtype.newbyteorder("<")
+        if dtype.str not in _SUPPORTED_DTYPES[:2]:
+            dtype = np.dtype("<f8")
+
+    header["dtype"] = dtype.str
+    header = json.dumps(header).encode("utf-8")
+    return b"".join((
+        _HEADER_LENGTH.pack(len(header)),
+        header,
+        np.ascontiguousarray(buffer, dtype=dtype).tobytes(),
+    ))
+
+
+def encode_parameters(parameters, metadata=None, dtype=None, codec=None):
+    """
+    Encodes a parameter tree into the binary wire format.
+
+    Args:
+        parameters: parameter tree, nested lists or ndarrays.
+        metadata (dict, optional): JSON serializable values sent along with the tensors.
+        dtype: buffer dtype, by default float32 models stay float32 and everything else is float64.
+        codec (str, optional): compression of the buffer, see encode_flat.
+
+    Returns:
+        bytes: encoded payload.
+    """
+    buffer, manifest = flatten_parameters(parameters, dtype)
+    return encode_flat(buffer, manifest, metadata, codec)
+
+
+class SparseDelta(NamedTuple):
+    """Changed entries of a flat buffer, indices are unique and sorted"""
+    indices: np.ndarray
+    values: np.ndarray
+
+
+def encode_sparse_delta(indices, values, manifest, base_version, metadata=None, dtype="<f4"):
+    """
+    Encodes a sparse delta against the global model version base_version.
+
+    Args:
+        indices: flat indices of the changed entries in the manifest's buffer.
+        values: delta of every index.
+        dtype: value dtype, float32 by default or float16 / float64.
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    order = np.argsort(indices, kind="stable")
+    indices, values = indices[order], np.asarray(values)[order]
+    if indices.size and (indices[0] < 0 or indices[-1] >= manifest.size or np.any(np.diff(indices) == 0)):
+        raise ValueError("Sparse delta indices must be unique and inside the parameter buffer.")
+
+    dtype = np.dtype(dtype).newbyteorder("<")
+    if dtype.str not in _SPARSE_DTYPES:
+        raise ValueError(f"Unsupported sparse delta dtype: {dtype}")
+    index_dtype = np.dtype("<u4") if manifest.size <= np.iinfo(np.uint32).max else np.dtype("<i8")
+    header = json.dumps({
+        "manifest": manifest.to_json(),
+        "metadata": {**(metadata or {}), "base_version": int(base_version)},
+        "dtype": dtype.str,
+        "sparse": {"nnz": int(indices.size), "index_dtype": index_dtype.str},
+    }).encode("utf-8")
+    return b"".join((
+        _HEADER_LENGTH.pack(len(header)),
+        header,
+        indices.astype(index_dtype).tobytes(),
+        np.ascontiguousarray(values, dtype=dtype).tobytes(),
+    ))
+
+
+def _read_header(payload):
+    if len(payload) < _HEADER_LENGTH.size:
+        raise ValueError("Payload is too short to contain a tensor header.")
+    (header_length,) = _HEADER_LENGTH.unpack_from(payload, 0)
+    data_start = _HEADER_LENGTH.size + header_length
+    if data_start > len(payload):
+        raise ValueError("Tensor header length exceeds payload size.")
+    header = json.loads(bytes(payload[_HEADER_LENGTH.size:data_start]).decode("utf-8"))
+    if header.get("dtype") not in _SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported tensor dtype: {header.get('dtype')}")
+    return header, data_start
+
+
+def _decode_sparse(payload, header, data_start, manifest, dtype):
+    sparse = header["sparse"]
+    if dtype.str not in _SPARSE_DTYPES or sparse.get("index_dtype") not in _INDEX_DTYPES:
+        raise ValueError(f"Unsupported sparse delta dtypes: {dtype.str} / {sparse.get('index_dtype')}")
+    if "base_version" not in header.get("metadata", {}):
+        raise ValueError("Sparse delta without the base_version of the global model it was computed against.")
+    nnz = int(sparse["nnz"])
+    index_dtype = np.dtype(sparse["index_dtype"])
+    expected = nnz * (index_dtype.itemsize + dtype.itemsize)
+    if len(payload) - data_start != expected:
+        raise ValueError(f"Sparse delta has {len(payload) - data_start} bytes, expected {expected}.")
+    indices = np.frombuffer(payload, dtype=index_dtype, count=nnz, offset=data_start)
+    values = np.frombuffer(payload, dtype=dtype, count=nnz, offset=data_start + nnz * index_dtype.itemsize)
+    if nnz and (int(indices[-1]) >= manifest.size or np.any(np.diff(indices.astype(np.int64)) <= 0)):
+        raise ValueError("Sparse delta indices must be strictly increasing and inside the parameter buffer.")
+    return SparseDelta(indices, values)
+
+
+def _decode_raw(payload):
+    """Validated header, manifest and the stored (possibly quantized or sparse) data of a payload"""
+    header, data_start = _read_header(payload)
+    manifest = ParameterManifest.from_json(header["manifest"])
+    dtype = np.dtype(header["dtype"])
+    if header.get("sparse"):
+        return header, manifest, _decode_sparse(payload, header, data_start, manifest, dtype)
+
+    expected = manifest.size * dtype.itemsize
+    if len(payload) - data_start != expected:
+        raise ValueError(f"Tensor data has {len(payload) - data_start} bytes, expected {expected}.")
+    if dtype.kind == "i":
+        if len(header.get("scales", ())) != len(manifest) or len(header.get("zero_points", ())) != len(manifest):
+            raise ValueError("Quantized tensor data needs a scale and zero point for every tensor.")
+    buffer = np.frombuffer(payload, dtype=dtype, count=manifest.size, offset=data_start)
+    return header, manifest, buffer
+
+
+def decode_header(payload):
+    """Validates a payload and returns its header without touching the tensor data"""
+    header, _, _ = _decode_raw(payload)
+    return header
+
+
+def decode_metadata(payload):
+    return decode_header(payload).get("metadata", {})
+
+
+def is_sparse_header(header):
+    return bool(header.get("sparse"))
+
+
+def decode_update(payload):
+    """
+    Decodes a client update.
+
+    Returns:
+        (np.ndarray | SparseDelta, ParameterManifest, dict): the dense float buffer (see decode_flat)
+        or the sparse delta, manifest and metadata.
+    """
+    header, manifest, data = _decode_raw(payload)
+    if isinstance(data, SparseDelta):
+        if data.values.dtype.itemsize == 2:
+            data = SparseDelta(data.indices, data.values.astype(np.float32))
+    elif data.dtype.kind == "i":
+        data = dequantize_int8(data, header["scales"], header["zero_points"], manifest)
+    elif data.dtype.itemsize == 2:
+        data = data.astype(np.float32)
+    return data, manifest, header.get("metadata", {})
+
+
+def decode_flat(payload):
+    """
+    Decodes a dense payload without rebuilding the nested lists.
+
+    Returns:
+        (np.ndarray, ParameterManifest, dict): flat float buffer, manifest and metadata. Uncompressed
+        buffers are a read-only view on the payload, float16 / int8 ones are dequantized.
+    """
+    buffer, manifest, metadata = decode_update(payload)
+    if isinstance(buffer, SparseDelta):
+        raise ValueError("Sparse deltas can only be decoded together with the global model they are based on.")
+    return buffer, manifest, metadata
+
+
+def decode_parameters(payload):
+    """
+    Decodes a payload back into the nested-list parameter tree.
+
+    Returns:
+        (parameters, dict): parameter tree and metadata.
+    """
+    buffer, manifest, metadata = decode_flat(payload)
+    return unflatten_parameters(buffer, manifest), metadata
+
+
+def is_tensor_media_type(header_value):
+    """True if a Content-Type / Accept header value asks for the binary tensor format"""
+    return MEDIA_TYPE in (header_value or "")
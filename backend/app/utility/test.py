@@ -1,15 +1,40 @@
 import numpy as np
 import os
 import json
-from .ModelBuilder import model_instance_from_config
-from .metrics import calculate_metrics
+from .metrics import MetricsAccumulator
+from .evaluation_data import EVAL_BATCH_SIZE, evaluation_data_cache
 from db import engine
 from sqlalchemy.orm import Session
 from models.FederatedSession import FederatedSession
 
+def evaluate_model(model, updated_weights, metrics, dataset_code=None):
+    """
+    Predict the global test set of the dataset with the updated weights and calculate the metrics.
+    The test set comes from the shared evaluation data cache and is predicted in batches.
+    """
+    model.update_parameters(updated_weights)
+
+    # read data from the cache
+    try:
+        dataset = evaluation_data_cache.get(dataset_code)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error loading test data: {e}")
+        return
+    # metrics are accumulated batch by batch, neither the predictions nor the labels are materialized
+    accumulator = MetricsAccumulator(metrics)
+    for X_batch, Y_batch in dataset.batches(EVAL_BATCH_SIZE):
+        Y_pred = model.predict(X_batch)
+        try:
+            accumulator.update(Y_batch, Y_pred)
+        except Exception as e:
+            # like calculate_metrics, a round whose metrics can not be computed has no results
+            print(f"Error calculating metrics: {e}")
+            return None
+    return accumulator.result()
+
+
 class Test:
-    def __init__(self, session_id, session_data):
-        self.model = None
+    def __init__(self, session_id, session_data, resume=False):
         self.session_id = session_id
          # Fetch session data and clients within an active session
         with Session(engine) as db:
@@ -24,49 +49,54 @@ class Test:
         self.metrics = self.model_config['model_info']['test_metrics'] # metrics to calculate in test
         self.round = 0
         self.test_results = {}
-        self.build_model()
-
-    def build_model(self):
-        """Build the model for testing"""
-        self.model = model_instance_from_config(self.model_config)
-        print("Testing model built successfully")
-
-    def start_test(self, updated_weights):
-        """Test the model with the updated weights"""
+        # participation / fairness of the client selection, see utility/client_sampling.py
+        self.client_sampling = None
+        # early stopping state and why the session ended, see utility/early_stopping.py
+        self.early_stopping = None
+        self.stop_reason = None
+        if resume:
+            self.load_test_results()
 
-        if self.model is None:
-            raise ValueError("Model not built yet...")
-        print("Testing model...")
-
-        self.model.update_parameters(updated_weights)
-            
-        # read data from file
-        try:
-            data_dir = os.path.join("utility", "global_test_data")
-            X_test = np.load(os.path.join(data_dir, "X_test.npy"))
-            Y_test = np.load(os.path.join(data_dir, "Y_test.npy"))
-        except FileNotFoundError as e:
-            print(f"Error loading test data: {e}")
+    def record_results(self, round_results):
+        """Store the results of one round, computed here or by the round worker"""
+        if round_results is None:
             return
-        Y_pred = self.model.predict(X_test)
-        # calculate metrics from calculate_metrics function in metrics.py
-        round_results = calculate_metrics(Y_test, Y_pred, self.metrics)
         # setting result with key "round 1", "round 2", etc
         self.test_results[f"round {self.round}"] = round_results
         self.round += 1
         return round_results
 
+    def results_path(self):
+        return os.path.join("Global_test_results", f"{self.session_id}_test_results.json")
+
+    def load_test_results(self):
+        """Continue from the results saved before the session was resumed by this worker"""
+        try:
+            with open(self.results_path(), "r") as f:
+                results = json.load(f)
+            self.test_results = results.get("test_results", {})
+            self.early_stopping = results.get("early_stopping")
+            self.round = len(self.test_results)
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
     def save_test_results(self):
         """Save test results to a file"""
         results_dir = "Global_test_results"
         if not os.path.exists(results_dir):
             os.makedirs(results_dir)
 
-        path = os.path.join(results_dir, f"{self.session_id}_test_results.json")
-        with open(path, "w") as f:
+        with open(self.results_path(), "w") as f:
             # Save results and session data with pretty printing
+            results = {"session_data": self.model_config, "num_clients": self.num_clients, "test_results": self.test_results}
+            if self.client_sampling is not None:
+                results["client_sampling"] = self.client_sampling
+            if self.early_stopping is not None:
+                results["early_stopping"] = self.early_stopping
+            if self.stop_reason is not None:
+                results["stop_reason"] = self.stop_reason
             json.dump(
-                {"session_data": self.model_config, "num_clients": self.num_clients, "test_results": self.test_results},
+                results,
                 f,
                 indent=4,  # Add indentation for pretty printing
                 separators=(',', ': ')  # Add a space after colon for readability
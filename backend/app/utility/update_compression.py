@@ -0,0 +1,146 @@
+import numpy as np
+from .parameters import flatten_parameters
+from .ModelBuilder import AGGREGATION_FEDAVG, AGGREGATION_FEDBUFF, session_aggregation
+from .tensor_codec import UPDATE_CODECS, decode_flat, encode_flat, encode_sparse_delta
+
+"""
+Compressed client updates.
+
+A session chooses the codec of its uploads with federated_info['training_config']['update_codec']
+("float32" by default, "float16" or "int8", see tensor_codec.py). Clients read it from the session
+info and encode their parameters with ErrorFeedbackCompressor. The server needs nothing else:
+decode_flat dequantizes every upload before it is added to the aggregator.
+
+With training_config['update_mode'] = "sparse_delta" clients upload only the 'top_k' fraction
+(default 0.01) of largest changes relative to the global_parameters version they downloaded
+(global_version of /get-model-parameters), encoded with TopKDeltaCompressor. The server
+rejects deltas against an outdated version and adds the others onto the global model.
+"""
+
+DEFAULT_UPDATE_CODEC = "float32"
+
+UPDATE_MODE_DENSE = "dense"
+UPDATE_MODE_SPARSE_DELTA = "sparse_delta"
+DEFAULT_TOP_K = 0.01
+
+
+def session_update_codec(modelConfig):
+    """
+    Update codec of a session's federated_info.
+
+    Raises:
+        ValueError: for an unknown codec.
+    """
+    training_config = modelConfig.get("training_config") or {}
+    codec = training_config.get("update_codec", DEFAULT_UPDATE_CODEC)
+    if codec not in UPDATE_CODECS:
+        raise ValueError(f"Unknown update codec: {codec}, expected one of {', '.join(UPDATE_CODECS)}")
+    return codec
+
+
+def session_update_mode(modelConfig):
+    """
+    Update mode of a session's federated_info, "dense" or "sparse_delta".
+
+    Raises:
+        ValueError: for an unknown mode, an invalid top_k or an aggregation sparse deltas do not work with.
+    """
+    training_config = modelConfig.get("training_config") or {}
+    mode = training_config.get("update_mode", UPDATE_MODE_DENSE)
+    if mode == UPDATE_MODE_DENSE:
+        return mode
+    if mode != UPDATE_MODE_SPARSE_DELTA:
+        raise ValueError(f"Unknown update mode: {mode}")
+    if session_aggregation(modelConfig) not in (AGGREGATION_FEDAVG, AGGREGATION_FEDBUFF):
+        raise ValueError(f"Update mode {mode} needs {AGGREGATION_FEDAVG} or {AGGREGATION_FEDBUFF} aggregation.")
+    if session_update_codec(modelConfig) not in ("float32", "float16"):
+        raise ValueError(f"Update mode {mode} sends float32 or float16 values.")
+    session_top_k(modelConfig)
+    return mode
+
+
+def session_top_k(modelConfig):
+    """Fraction of the parameters a sparse delta carries"""
+    training_config = modelConfig.get("training_config") or {}
+    top_k = float(training_config.get("top_k", DEFAULT_TOP_K))
+    if not 0 < top_k <= 1:
+        raise ValueError(f"top_k must be a fraction in (0, 1], got {top_k}")
+    return top_k
+
+
+class ErrorFeedbackCompressor:
+    """
+    Client side encoder with error feedback.
+
+    The quantization error of every upload is kept as a residual and added to the next
+    upload before it is quantized, so the errors do not accumulate over the rounds and the
+    aggregated model follows the full precision one. One instance per client and session.
+    """
+
+    def __init__(self, codec=DEFAULT_UPDATE_CODEC):
+        if codec not in UPDATE_CODECS:
+            raise ValueError(f"Unknown update codec: {codec}")
+        self.codec = codec
+        self.residual = None
+        self.manifest = None
+
+    def encode(self, parameters, metadata=None):
+        """
+        Encodes a parameter tree (e.g. model.get_parameters()) for /receive-client-parameters.
+
+        Returns:
+            bytes: payload in the binary tensor format (tensor_codec.MEDIA_TYPE).
+        """
+        buffer, manifest = flatten_parameters(parameters, dtype=np.float64)
+        corrected = buffer + self._residual(manifest)
+        payload = encode_flat(corrected, manifest, metadata, self.codec)
+        decoded, _, _ = decode_flat(payload)
+        self.residual = corrected - decoded
+        return payload
+
+    def _residual(self, manifest):
+        if self.residual is None or manifest != self.manifest:
+            self.residual = np.zeros(manifest.size, dtype=np.float64)
+            self.manifest = manifest
+        return self.residual
+
+    def reset(self):
+        self.residual = None
+        self.manifest = None
+
+
+class TopKDeltaCompressor(ErrorFeedbackCompressor):
+    """
+    Client side encoder of sparse deltas. The changes left out of an upload (and the float16
+    rounding of the sent ones) stay in the residual and are sent once they have grown large.
+    """
+
+    def __init__(self, top_k=DEFAULT_TOP_K, codec=DEFAULT_UPDATE_CODEC):
+        if codec not in ("float32", "float16"):
+            raise ValueError(f"Sparse deltas send float32 or float16 values, not {codec}")
+        super().__init__(codec)
+        self.top_k = top_k
+
+    def encode(self, parameters, base_parameters, base_version, metadata=None):
+        """
+        Encodes the change from base_parameters (the downloaded global_parameters) to parameters.
+
+        Args:
+            base_version (int): global_version of the downloaded global_parameters.
+
+        Returns:
+            bytes: payload in the binary tensor format (tensor_codec.MEDIA_TYPE).
+        """
+        buffer, manifest = flatten_parameters(parameters, dtype=np.float64)
+        base, base_manifest = flatten_parameters(base_parameters, dtype=np.float64)
+        if base_manifest != manifest:
+            raise ValueError("Parameters do not match the structure of the global parameters.")
+
+        delta = buffer - base + self._residual(manifest)
+        k = min(max(1, int(round(self.top_k * delta.size))), delta.size)
+        indices = np.argpartition(np.abs(delta), delta.size - k)[delta.size - k:]
+        values = delta[indices].astype(self.codec)
+
+        self.residual = delta
+        self.residual[indices] -= values
+        return encode_sparse_delta(indices, values, manifest, base_version, metadata, dtype=self.codec)
@@ -1,19 +1,47 @@
 from datetime import datetime
+from typing import List
 from models.User import User
-from sqlalchemy import Null
+from sqlalchemy import Null, update
 from sqlalchemy.orm import Session
 
-from models.Notification import Notification
+from models.Notification import NotificationMessage, NotificationRecipient
 
-def get_unnotified_notifications(user: User, db: Session):
+def get_unnotified_notifications(user: User, db: Session, after_id: int = None):
     """
     Fetch all notifications for this user that have not been notified.
+
+    When the stream reconnects with a Last-Event-ID (after_id), every notification after that
+    one is fetched again, even if it was marked notified but never reached the client.
+
+    Returns:
+        Rows with the message id as `id` and its `message`, ordered by id.
     """
-    return db.query(Notification).filter(
-        Notification.user_id == user.id,
-        Notification.notified_at.is_(None),
+    delivery_filter = (
+        NotificationRecipient.message_id > after_id
+        if after_id is not None
+        else NotificationRecipient.notified_at.is_(None)
+    )
+    return db.query(
+        NotificationMessage.id.label("id"),
+        NotificationMessage.message.label("message")
+    ).join(
+        NotificationRecipient, NotificationRecipient.message_id == NotificationMessage.id
+    ).filter(
+        NotificationRecipient.user_id == user.id,
+        delivery_filter,
         (
-            Notification.valid_until.is_(None)
-            | (Notification.valid_until > datetime.now())
+            NotificationMessage.valid_until.is_(None)
+            | (NotificationMessage.valid_until > datetime.now())
+        )
+    ).order_by(NotificationMessage.id).all()
+
+def mark_notifications_notified(user_id: int, notification_ids: List[int], db: Session):
+    db.execute(
+        update(NotificationRecipient)
+        .where(
+            NotificationRecipient.user_id == user_id,
+            NotificationRecipient.message_id.in_(notification_ids)
         )
-    ).all()
\ No newline at end of file
+        .values(notified_at = datetime.now())
+    )
+    db.commit()